@@ -0,0 +1,117 @@
+"""
+Compares the fixed-size Ball particle filter with the adaptive (KLD-sampling) one on recorded tracks.
+
+Usage:
+    python -m benchmarks.adaptive_particles [source ...] [--frames 600] [--runs 3] [--particles 300 1000] [--csv counts.csv]
+
+Sources use the same specs as `main.py --source` and need ground truth; the default is one
+synthetic clip, which drops out every 200 frames. The detector runs once per clip and both
+filters are fed the same measurements; `--particles` sets the sizes of the fixed filters
+to compare against. For each filter it reports the particle count
+(overall, while the object is measured and while it is lost), the update time and the
+tracking error, overall and during dropouts plus the `--settle-frames` after them.
+`--csv` writes the per-frame particle count and error for plotting.
+"""
+import argparse
+import csv
+import time
+
+import numpy as np
+
+from benchmarks.common import summarize
+from src.components.ball import Ball
+from src.settings import (
+    WIDTH, HEIGHT, CANVAS_SIZE, BALL_PARAMS, SHAPES, NUM_PARTICLES, MOTION_NOISE, ACCELERATION_NOISE
+)
+from src.utils.frame_source import open_source
+from src.utils.red_object_detector import RedObjectDetector
+
+
+def record_track(spec: str, max_frames: int, seed: int):
+    """Runs the detector over a clip; returns per-frame measurements and ground truth (or None)."""
+    source = open_source(spec, WIDTH, HEIGHT, max_frames, seed)
+    detector = RedObjectDetector()
+    measurements, truth = [], []
+    while source.isOpened() and len(measurements) < max_frames:
+        ret, frame = source.read()
+        if not ret:
+            break
+        measurements.append(detector.detect(frame))
+        points = source.ground_truth()
+        truth.append(points[0] if points is not None and len(points) else None)
+    source.release()
+    return measurements, truth
+
+
+def run_filter(measurements, truth, num_particles: int, adaptive: bool, seed: int):
+    np.random.seed(seed)
+    start = next(p for p in truth + measurements if p is not None)
+    ball = Ball(CANVAS_SIZE, BALL_PARAMS, SHAPES, num_particles, shape="circle", position=start, adaptive=adaptive,
+                tracker="particle")
+    counts, update_ms, errors = [], [], []
+    for z, x in zip(measurements, truth):
+        begin = time.perf_counter()
+        ball.update(z, MOTION_NOISE, ACCELERATION_NOISE)
+        update_ms.append((time.perf_counter() - begin) * 1000.0)
+        counts.append(ball.tracker.num_particles)
+        errors.append(float(np.linalg.norm(ball.get_position() - x)) if x is not None else None)
+    return counts, update_ms, errors
+
+
+def disturbed_frames(measurements, settle_frames: int) -> np.ndarray:
+    """Marks frames without a measurement and the `settle_frames` following each of them."""
+    missing = np.array([z is None for z in measurements])
+    disturbed = missing.copy()
+    for i in np.flatnonzero(missing):
+        disturbed[i:i + settle_frames + 1] = True
+    return disturbed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="*", default=["synthetic"])
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--settle-frames", type=int, default=30)
+    parser.add_argument("--particles", type=int, nargs="+", default=[NUM_PARTICLES],
+                        help="sizes of the fixed filters to compare against")
+    parser.add_argument("--csv", help="write per-frame particle counts and errors to this file")
+    args = parser.parse_args()
+
+    rows = []
+    for spec in args.sources:
+        measurements, truth = record_track(spec, args.frames, args.seed)
+        missing = np.array([z is None for z in measurements])
+        disturbed = disturbed_frames(measurements, args.settle_frames)
+        print(f"== {spec}: {len(measurements)} frames, {missing.sum()} without a measurement")
+        print(f"   {'filter':>10} {'n mean':>7} {'n tracked':>9} {'n lost':>7} {'n max':>6} {'upd ms':>7} "
+              f"{'err mean':>9} {'err p95':>8} {'disturbed err':>13}")
+        filters = [(f"fixed {n}", n, False) for n in args.particles] + [("adaptive", NUM_PARTICLES, True)]
+        for name, num_particles, adaptive in filters:
+            counts, update_ms, errors, rough = [], [], [], []
+            for run in range(args.runs):
+                c, u, e = run_filter(measurements, truth, num_particles, adaptive, args.seed + run)
+                counts.append(c)
+                update_ms += u
+                for i, err in enumerate(e):
+                    if err is not None:
+                        errors.append(err)
+                        if disturbed[i]:
+                            rough.append(err)
+                    rows.append([spec, name, run, i, c[i], err])
+            counts = np.array(counts, dtype=float)
+            lost = counts[:, missing].mean() if missing.any() else float("nan")
+            print(f"   {name:>10} {counts.mean():>7.0f} {counts[:, ~missing].mean():>9.0f} "
+                  f"{lost:>7.0f} {counts.max():>6.0f} {summarize(update_ms)['mean']:>7.3f} "
+                  f"{summarize(errors)['mean']:>9.1f} {summarize(errors)['p95']:>8.1f} {summarize(rough)['mean']:>13.1f}")
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["source", "filter", "run", "frame", "particles", "error"])
+            writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    main()
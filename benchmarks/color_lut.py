@@ -0,0 +1,69 @@
+"""
+Checks the compiled colour table against the HSV inRange path and compares their cost.
+
+Usage:
+    python -m benchmarks.color_lut [clip.mp4] [--bits 8 6 5]
+
+Agreement is measured over every 24-bit BGR colour, and the script fails if the exact
+(8-bit) table disagrees with cvtColor + inRange on any of them; timings use the clip if
+given, otherwise random noise frames at the canvas size.
+"""
+import argparse
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import load_frames, summarize
+from src.settings import RED_LOWER1, RED_UPPER1, RED_LOWER2, RED_UPPER2, CANVAS_SIZE
+from src.utils.color_lut import ColorLookupTable, all_colors, hsv_mask
+
+RANGES = [(RED_LOWER1, RED_UPPER1), (RED_LOWER2, RED_UPPER2)]
+
+
+def time_ms(fn, frames):
+    timings = []
+    for frame in frames:
+        start = time.perf_counter()
+        fn(frame)
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return summarize(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("clip", nargs="?")
+    parser.add_argument("--bits", type=int, nargs="+", default=[8, 6, 5])
+    parser.add_argument("--max-frames", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.clip:
+        frames = load_frames(args.clip, args.max_frames)
+    else:
+        rng = np.random.default_rng(0)
+        frames = [rng.integers(0, 256, CANVAS_SIZE, dtype=np.uint8) for _ in range(20)]
+
+    colors = all_colors()
+    reference = hsv_mask(colors, RANGES)
+    t = time_ms(lambda frame: hsv_mask(frame, RANGES), frames)
+    print(f"{'path':>10} {'mismatch %':>11} {'ms mean':>8} {'ms p95':>8} {'build s':>8}")
+    print(f"{'hsv':>10} {0.0:>11.4f} {t['mean']:>8.2f} {t['p95']:>8.2f} {'-':>8}")
+    with tempfile.TemporaryDirectory() as cache_dir:
+        for bits in args.bits:
+            start = time.perf_counter()
+            lut = ColorLookupTable(RANGES, bits, cache_dir)
+            build = time.perf_counter() - start
+            mismatches = np.count_nonzero(lut.classify(colors) != reference)
+            if bits == 8:
+                assert mismatches == 0, f"the exact table disagrees with cvtColor + inRange on {mismatches} colours"
+            mismatch = 100.0 * mismatches / reference.size
+            t = time_ms(lut.classify, frames)
+            print(f"{f'lut {bits}b':>10} {mismatch:>11.4f} {t['mean']:>8.2f} {t['p95']:>8.2f} {build:>8.2f}")
+
+            start = time.perf_counter()
+            ColorLookupTable(RANGES, bits, cache_dir)
+            print(f"{'':>10} cached reload {time.perf_counter() - start:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
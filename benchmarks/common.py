@@ -0,0 +1,30 @@
+import cv2
+import numpy as np
+from typing import Dict, List, Optional
+
+from src.utils.frame_source import load_ground_truth  # noqa: F401  (re-exported for the benchmarks)
+
+
+def load_frames(path: str, max_frames: Optional[int] = None) -> List[np.ndarray]:
+    """Decodes a video file into memory so decoding cost stays out of the measurements."""
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while cap.isOpened() and (max_frames is None or len(frames) < max_frames):
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"mean": float("nan"), "p50": float("nan"), "p95": float("nan"), "p99": float("nan")}
+    arr = np.asarray(values, dtype=float)
+    return {
+        "mean": float(arr.mean()),
+        "p50": float(np.percentile(arr, 50)),
+        "p95": float(np.percentile(arr, 95)),
+        "p99": float(np.percentile(arr, 99)),
+    }
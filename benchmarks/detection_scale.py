@@ -0,0 +1,56 @@
+"""
+Measures detection cost and tip accuracy of RedObjectDetector at several detection scales.
+
+Usage:
+    python -m benchmarks.detection_scale clip.mp4 [--ground-truth clip.csv] [--scales 1 0.5 0.25]
+
+Without a ground-truth CSV the full-resolution detections are used as the reference.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import load_frames, load_ground_truth, summarize
+from src.utils.red_object_detector import RedObjectDetector
+
+
+def run(frames, scale, refine):
+    detector = RedObjectDetector(scale=scale, refine=refine)
+    points, timings = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        points.append(detector.detect(frame))
+        timings.append((time.perf_counter() - start) * 1000.0)
+    return points, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("clip")
+    parser.add_argument("--ground-truth")
+    parser.add_argument("--scales", type=float, nargs="+", default=[1.0, 0.5, 0.25])
+    parser.add_argument("--max-frames", type=int)
+    args = parser.parse_args()
+
+    frames = load_frames(args.clip, args.max_frames)
+    if args.ground_truth:
+        reference = {i: p for i, p in load_ground_truth(args.ground_truth).items() if i < len(frames)}
+    else:
+        full_points, _ = run(frames, 1.0, False)
+        reference = {i: p for i, p in enumerate(full_points) if p is not None}
+
+    print(f"{len(frames)} frames, {len(reference)} with a reference point")
+    print(f"{'scale':>6} {'refine':>6} {'ms mean':>8} {'ms p95':>8} {'found %':>8} {'err mean':>9} {'err p50':>8} {'err p95':>8}")
+    for scale in args.scales:
+        for refine in ([False, True] if scale < 1.0 else [False]):
+            points, timings = run(frames, scale, refine)
+            errors = [float(np.linalg.norm(p - reference[i])) for i, p in enumerate(points)
+                      if p is not None and i in reference]
+            found = 100.0 * sum(p is not None for i, p in enumerate(points) if i in reference) / max(len(reference), 1)
+            t, e = summarize(timings), summarize(errors)
+            print(f"{scale:>6.2f} {str(refine):>6} {t['mean']:>8.2f} {t['p95']:>8.2f} {found:>8.1f} {e['mean']:>9.2f} {e['p50']:>8.2f} {e['p95']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Compares the detector hot path (mirroring + RedObjectDetector.detect) with and without reused buffers.
+
+Usage:
+    python -m benchmarks.detector_buffers [source] [--frames 300] [--scales 1 0.5]
+
+The source uses the same specs as `main.py --source` (default: a synthetic clip) and is
+read frame by frame; only the mirroring and detection are measured. The allocating mode
+mirrors into a new frame and lets OpenCV allocate every intermediate image, the reusing
+mode mirrors in place and writes into the detector's scratch buffers. Each mode runs
+twice over the clip: once timed, counting garbage collections, and once under
+tracemalloc to measure the memory allocated per frame.
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from benchmarks.common import summarize
+from src.settings import WIDTH, HEIGHT
+from src.utils.frame_source import open_source
+from src.utils.red_object_detector import RedObjectDetector
+
+
+def run(spec: str, num_frames: int, seed: int, scale: float, reuse: bool, trace: bool):
+    """Returns the per-frame latency (ms) and the per-frame peak allocation (bytes, if tracing)."""
+    source = open_source(spec, WIDTH, HEIGHT, num_frames, seed)
+    detector = RedObjectDetector(scale=scale, reuse_buffers=reuse)
+    timings, allocated = [], []
+    while source.isOpened():
+        ret, frame = source.read()
+        if not ret:
+            break
+        if trace:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        if reuse:
+            cv2.flip(frame, 1, dst=frame)
+        else:
+            frame = cv2.flip(frame, 1)
+        detector.detect(frame)
+        timings.append((time.perf_counter() - start) * 1000.0)
+        if trace:
+            allocated.append(tracemalloc.get_traced_memory()[1] - before)
+    source.release()
+    return timings, allocated
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", nargs="?", default="synthetic")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scales", type=float, nargs="+", default=[1.0, 0.5])
+    args = parser.parse_args()
+
+    collections = []
+    gc.callbacks.append(lambda phase, info: phase == "start" and collections.append(info["generation"]))
+
+    print(f"{'scale':>6} {'buffers':>9} {'ms mean':>8} {'ms p50':>7} {'ms p99':>7} {'ms std':>7} "
+          f"{'KiB/frame':>10} {'gc/100 fr':>10}")
+    for scale in args.scales:
+        for reuse in (False, True):
+            # The first frames warm up MOG2 and the buffers, they are left out.
+            skip = min(10, args.frames // 10)
+            collections.clear()
+            timings, _ = run(args.source, args.frames, args.seed, scale, reuse, trace=False)
+            gc_rate = 100.0 * len(collections) / max(len(timings), 1)
+
+            tracemalloc.start()
+            _, allocated = run(args.source, args.frames, args.seed, scale, reuse, trace=True)
+            tracemalloc.stop()
+
+            t = summarize(timings[skip:])
+            print(f"{scale:>6.2f} {'reused' if reuse else 'allocated':>9} {t['mean']:>8.2f} {t['p50']:>7.2f} "
+                  f"{t['p99']:>7.2f} {float(np.std(timings[skip:])):>7.2f} "
+                  f"{np.mean(allocated[skip:]) / 1024.0:>10.1f} {gc_rate:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Measures the batched multi-target tracker against one particle filter per player, for one to four players.
+
+Usage:
+    python -m benchmarks.multi_target [--players 1 2 3 4] [--particles 300] [--frames 300] [--runs 3]
+
+For every player count a synthetic clip with that many red pens is run through
+RedObjectDetector.detect_all once; both trackers are then fed the same detections.
+MultiTargetTracker does the assignment and one batched step for all tracks, the
+reference loops over per-player ParticleTrackers, stepping each with the detection the
+batched tracker assigned to it, so both do the same filtering work. Reported per frame:
+the update time of each, and for the batched tracker the tracking error against the
+ground truth and the identity switches (a pen picked up by a different track than before).
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import summarize
+from src.components.multi_target_tracker import MultiTargetTracker
+from src.components.trackers import ParticleTracker
+from src.settings import (
+    WIDTH, HEIGHT, CANVAS_SIZE, MOTION_NOISE, ACCELERATION_NOISE, MAX_PLAYERS, TRACK_GATE, TRACK_MAX_MISSES,
+    MIN_CANDIDATE_AREA
+)
+from src.utils.frame_source import open_source
+from src.utils.red_object_detector import RedObjectDetector
+
+
+def record_detections(players: int, max_frames: int, seed: int):
+    """Returns per-frame detections and ground-truth tips of a synthetic clip with `players` pens."""
+    source = open_source(f"synthetic:{players}", WIDTH, HEIGHT, max_frames, seed)
+    detector = RedObjectDetector()
+    detections, truth = [], []
+    while source.isOpened():
+        ret, frame = source.read()
+        if not ret:
+            break
+        detections.append(detector.detect_all(frame, MAX_PLAYERS, MIN_CANDIDATE_AREA))
+        truth.append(source.ground_truth())
+    source.release()
+    return detections, truth
+
+
+def run(detections, truth, num_particles: int, seed: int):
+    np.random.seed(seed)
+    tracker = MultiTargetTracker(CANVAS_SIZE, MAX_PLAYERS, num_particles, TRACK_GATE, TRACK_MAX_MISSES)
+    filters = [None] * MAX_PLAYERS
+    batched_ms, loop_ms, errors = [], [], []
+    owner = {}
+    switches = 0
+    for points, tips in zip(detections, truth):
+        start = time.perf_counter()
+        assignment = tracker.update(points, MOTION_NOISE, ACCELERATION_NOISE)
+        batched_ms.append((time.perf_counter() - start) * 1000.0)
+
+        start = time.perf_counter()
+        for track, filter_ in enumerate(filters):
+            if assignment[track] >= 0 and filter_ is None:
+                filters[track] = ParticleTracker(CANVAS_SIZE, points[assignment[track]], num_particles)
+            elif filter_ is not None:
+                filter_.predict(1.0, MOTION_NOISE, ACCELERATION_NOISE)
+                filter_.update(points[assignment[track]] if assignment[track] >= 0 else None)
+        loop_ms.append((time.perf_counter() - start) * 1000.0)
+
+        active = np.flatnonzero(tracker.active)
+        if len(tips) and len(active):
+            estimates = tracker.estimates()[active]
+            for pen, tip in enumerate(tips):
+                distances = np.linalg.norm(estimates - tip, axis=1)
+                nearest = int(np.argmin(distances))
+                errors.append(float(distances[nearest]))
+                if owner.get(pen, active[nearest]) != active[nearest]:
+                    switches += 1
+                owner[pen] = active[nearest]
+    return batched_ms, loop_ms, errors, switches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--players", type=int, nargs="+", default=[1, 2, 3, 4])
+    parser.add_argument("--particles", type=int, default=300)
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'players':>7} {'batched ms':>10} {'loop ms':>8} {'err mean':>9} {'err p95':>8} {'id switches':>11}")
+    for players in args.players:
+        detections, truth = record_detections(players, args.frames, args.seed)
+        batched, loop, errors, switches = [], [], [], 0
+        for run_index in range(args.runs):
+            b, l, e, s = run(detections, truth, args.particles, args.seed + run_index)
+            batched += b
+            loop += l
+            errors += e
+            switches += s
+        error = summarize(errors)
+        print(f"{players:>7} {summarize(batched)['mean']:>10.3f} {summarize(loop)['mean']:>8.3f} "
+              f"{error['mean']:>9.1f} {error['p95']:>8.1f} {switches / args.runs:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compares the compact (float32, in-place Generator noise) particle state with the float64 one across particle counts.
+
+Usage:
+    python -m benchmarks.particle_state [--particles 300 3000 30000] [--steps 500] [--obstacles 3]
+
+Runs the particle filter over a synthetic track (a circle with 5% missing measurements)
+the way the game does per frame: one update, then `--obstacles` + 2 position queries
+(the tracker, one per obstacle collision test, drawing). For each mode and particle
+count it reports the time per frame, the memory allocated per frame (peak under
+tracemalloc, in a separate pass), and the tracking error after the first 20 steps.
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.common import summarize
+from src.components.ball import Ball
+from src.components.trackers import ParticleTracker
+from src.settings import CANVAS_SIZE, BALL_PARAMS, SHAPES, MOTION_NOISE, ACCELERATION_NOISE
+from tests.tracks import synthetic_track
+
+
+def run(num_particles: int, steps: int, queries: int, compact: bool, seed: int, trace: bool):
+    """Returns the per-frame time (ms), allocation (bytes, if tracing) and tracking error."""
+    np.random.seed(seed)
+    truth, measurements = synthetic_track(steps, np.random.default_rng(seed))
+    ball = Ball(CANVAS_SIZE, BALL_PARAMS, SHAPES, num_particles, shape="circle", position=truth[0], tracker="particle")
+    ball.tracker = ParticleTracker(CANVAS_SIZE, truth[0], num_particles, compact=compact)
+
+    timings, allocated, errors = [], [], []
+    for z, x in zip(measurements, truth):
+        if trace:
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        ball.update(z, MOTION_NOISE, ACCELERATION_NOISE)
+        for _ in range(queries):
+            position = ball.get_position()
+        timings.append((time.perf_counter() - start) * 1000.0)
+        if trace:
+            allocated.append(tracemalloc.get_traced_memory()[1] - before)
+        errors.append(float(np.linalg.norm(position - x)))
+    return timings, allocated, errors[20:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--particles", type=int, nargs="+", default=[300, 3000, 30000])
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--obstacles", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    queries = args.obstacles + 2
+    print(f"{'particles':>9} {'state':>8} {'ms mean':>8} {'ms p99':>7} {'KiB/frame':>10} {'err mean':>9}")
+    for num_particles in args.particles:
+        for compact in (False, True):
+            timings, _, errors = run(num_particles, args.steps, queries, compact, args.seed, trace=False)
+            tracemalloc.start()
+            _, allocated, _ = run(num_particles, args.steps, queries, compact, args.seed, trace=True)
+            tracemalloc.stop()
+            t = summarize(timings[10:])
+            print(f"{num_particles:>9} {'float32' if compact else 'float64':>8} {t['mean']:>8.3f} {t['p99']:>7.3f} "
+                  f"{np.mean(allocated[10:]) / 1024.0:>10.1f} {summarize(errors)['mean']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+End-to-end benchmark that drives Game headlessly over recorded or synthetic clips.
+
+Usage:
+    python -m benchmarks.replay [source ...] [--frames 600] [--seed 0] [--motion mog2 knn | all]
+                                [--tracker particle kalman | all] [--json results.json]
+
+Sources use the same specs as `main.py --source`: a video file (with an optional
+`frame,x,y` ground-truth CSV next to it), an image directory, or `synthetic[:objects]`.
+The default is one synthetic clip. For every clip it reports frames per second,
+per-stage and per-sub-step p50/p99 latency and, where ground truth exists, the
+detection miss rate, detection error and tracking error of the ball. Tracking error skips the first
+`--settle-frames` frames after each ball respawn. The run never stops on game over.
+`--motion` runs every clip once per motion segmentation backend and ends with a
+table comparing their cost and detection miss rate. `--tracker` does the same for the
+tracker backends, comparing the time spent in the tracker per frame, the tracking error
+and the lag: the delay (ms) by which the estimate trails the ground truth, found as the
+shift that best aligns the two.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+from typing import Optional
+
+from benchmarks.common import summarize
+from src.game import Game, FRAME_STAGES
+from src.settings import WIDTH, HEIGHT, MOTION_BACKEND, TRACKER_BACKEND, SOURCE_FRAME_RATE
+from src.components.trackers import TRACKERS
+from src.utils.display import NullDisplay
+from src.utils.frame_source import open_source
+from src.utils.motion import MOTION_BACKENDS
+from src.utils.profiler import profiler
+from src.utils.red_object_detector import RedObjectDetector
+
+
+# Largest delay (frames) searched when estimating the tracker's lag.
+MAX_LAG_FRAMES = 15
+
+
+def estimate_lag(estimates: np.ndarray, truth: np.ndarray) -> Optional[float]:
+    """
+    Returns the shift (frames, sub-frame by a parabola through the best three) that
+    minimises the mean distance between estimate[i + shift] and truth[i]. NaN rows are skipped.
+    """
+    costs = []
+    for shift in range(min(MAX_LAG_FRAMES, len(truth) - 1) + 1):
+        distances = np.linalg.norm(estimates[shift:] - truth[:len(truth) - shift], axis=1)
+        distances = distances[~np.isnan(distances)]
+        costs.append(distances.mean() if len(distances) else np.inf)
+    if not costs or not np.isfinite(min(costs)):
+        return None
+    best = int(np.argmin(costs))
+    if 0 < best < len(costs) - 1 and np.all(np.isfinite(costs[best - 1:best + 2])):
+        left, mid, right = costs[best - 1:best + 2]
+        curvature = left - 2 * mid + right
+        if curvature > 0:
+            return best + 0.5 * (left - right) / curvature
+    return float(best)
+
+
+def run_clip(spec: str, max_frames: int, seed: int, settle_frames: int, motion: str = MOTION_BACKEND,
+             tracker: str = TRACKER_BACKEND) -> dict:
+    source = open_source(spec, WIDTH, HEIGHT, max_frames, seed)
+    game = Game(source=source, display=NullDisplay(), seed=seed, audio=False, tracker=tracker)
+    game.detector = RedObjectDetector(motion=motion)
+    profiler.enabled = True
+    profiler.window = max_frames
+    profiler.reset()
+
+    detection_errors, tracking_errors = [], []
+    estimates, targets = [], []
+    visible = missed = 0
+    last_respawn = 0
+
+    wall_start = time.perf_counter()
+    frames = 0
+    while frames < max_frames:
+        captured = game._capture()
+        if captured is None:
+            break
+        frame, timestamp = captured
+        measurement = game._detect(frame)
+        ball = game.ball
+        game._simulate(frame, measurement, timestamp)
+        game._present(frame, timestamp)
+        profiler.end_frame()
+
+        if game.ball is not ball:
+            last_respawn = frames
+        truth = source.ground_truth()
+        settled = game.ball is ball and frames - last_respawn >= settle_frames
+        estimates.append(ball.get_position() if settled else (np.nan, np.nan))
+        targets.append((np.nan, np.nan))
+        if truth is not None and len(truth):
+            # Game mirrors the camera image, so mirror the ground truth to match.
+            target = np.array([WIDTH - 1 - truth[0, 0], truth[0, 1]])
+            targets[-1] = target
+            visible += 1
+            if measurement is None:
+                missed += 1
+            else:
+                detection_errors.append(float(np.linalg.norm(measurement - target)))
+            if settled:
+                tracking_errors.append(float(np.linalg.norm(ball.get_position() - target)))
+        frames += 1
+    wall = time.perf_counter() - wall_start
+    game._cleanup()
+
+    lag = estimate_lag(np.array(estimates, dtype=float).reshape(-1, 2), np.array(targets, dtype=float).reshape(-1, 2))
+    fps = getattr(source, "fps", None) or SOURCE_FRAME_RATE
+    stats = profiler.stats()
+    order = [name for name in FRAME_STAGES if name in stats] + sorted(set(stats) - set(FRAME_STAGES))
+    return {
+        "source": spec,
+        "motion": motion,
+        "tracker": tracker,
+        "frames": frames,
+        "fps": frames / wall if wall > 0 else 0.0,
+        "stages_ms": {name: stats[name] for name in order},
+        "miss_rate": missed / visible if visible else None,
+        "detection_error": summarize(detection_errors) if visible else None,
+        "tracking_error": summarize(tracking_errors) if visible else None,
+        "lag_ms": lag * 1000.0 / fps if lag is not None else None,
+    }
+
+
+def print_result(result: dict):
+    print(f"== {result['source']} ({result['motion']}, {result['tracker']}): {result['frames']} frames, "
+          f"{result['fps']:.1f} fps")
+    print(f"   {'stage':>18} {'p50 ms':>8} {'p99 ms':>8}")
+    for stage, stats in result["stages_ms"].items():
+        print(f"   {stage:>18} {stats['p50']:>8.2f} {stats['p99']:>8.2f}")
+    if result["miss_rate"] is not None:
+        d, t = result["detection_error"], result["tracking_error"]
+        print(f"   detection miss rate {100 * result['miss_rate']:.1f}%")
+        print(f"   detection error px  mean {d['mean']:.1f}  p50 {d['p50']:.1f}  p95 {d['p95']:.1f}")
+        print(f"   tracking error px   mean {t['mean']:.1f}  p50 {t['p50']:.1f}  p95 {t['p95']:.1f}")
+    if result["lag_ms"] is not None:
+        print(f"   tracking lag ms     {result['lag_ms']:.1f}")
+
+
+def print_motion_comparison(results: list):
+    print(f"{'source':>12} {'motion':>16} {'fps':>6} {'detect p50':>10} {'detect p99':>10} {'motion mean':>11} "
+          f"{'miss %':>7} {'det err':>8} {'track err':>9}")
+    for r in results:
+        stages = r["stages_ms"]
+        detect, motion = stages.get("detect", {}), stages.get("detect.motion", {})
+        miss = f"{100 * r['miss_rate']:.1f}" if r["miss_rate"] is not None else "-"
+        det = f"{r['detection_error']['mean']:.1f}" if r["detection_error"] else "-"
+        track = f"{r['tracking_error']['mean']:.1f}" if r["tracking_error"] else "-"
+        print(f"{r['source'][-12:]:>12} {r['motion']:>16} {r['fps']:>6.1f} {detect.get('p50', float('nan')):>10.2f} "
+              f"{detect.get('p99', float('nan')):>10.2f} {motion.get('mean', float('nan')):>11.2f} "
+              f"{miss:>7} {det:>8} {track:>9}")
+
+
+def print_tracker_comparison(results: list):
+    print(f"{'source':>12} {'tracker':>10} {'fps':>6} {'tracker mean':>12} {'tracker p99':>11} "
+          f"{'track err':>9} {'err p95':>8} {'lag ms':>7}")
+    for r in results:
+        stage = r["stages_ms"].get("update.tracker", {})
+        error = r["tracking_error"]
+        mean = f"{error['mean']:.1f}" if error else "-"
+        p95 = f"{error['p95']:.1f}" if error else "-"
+        lag = f"{r['lag_ms']:.1f}" if r["lag_ms"] is not None else "-"
+        print(f"{r['source'][-12:]:>12} {r['tracker']:>10} {r['fps']:>6.1f} {stage.get('mean', float('nan')):>12.3f} "
+              f"{stage.get('p99', float('nan')):>11.3f} {mean:>9} {p95:>8} {lag:>7}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="*", default=["synthetic"])
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--settle-frames", type=int, default=30)
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    parser.add_argument("--trace", help="write the profiler trace of the last clip (.json for Chrome trace, else CSV)")
+    parser.add_argument("--motion", nargs="+", default=[MOTION_BACKEND],
+                        help=f"motion backends to compare, or 'all': {', '.join(MOTION_BACKENDS)}")
+    parser.add_argument("--tracker", nargs="+", default=[TRACKER_BACKEND],
+                        help=f"tracker backends to compare, or 'all': {', '.join(TRACKERS)}")
+    args = parser.parse_args()
+
+    backends = list(MOTION_BACKENDS) if args.motion == ["all"] else args.motion
+    trackers = list(TRACKERS) if args.tracker == ["all"] else args.tracker
+    results = [run_clip(spec, args.frames, args.seed, args.settle_frames, motion, tracker)
+               for spec in args.sources for motion in backends for tracker in trackers]
+    if args.trace:
+        profiler.export(args.trace)
+    for result in results:
+        print_result(result)
+    if len(backends) > 1:
+        print_motion_comparison(results)
+    if len(trackers) > 1:
+        print_tracker_comparison(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
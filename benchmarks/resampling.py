@@ -0,0 +1,69 @@
+"""
+Compares the particle-filter resampling schemes on a synthetic track.
+
+Usage:
+    python -m benchmarks.resampling [--particles 300 3000 30000] [--runs 5] [--steps 300]
+
+For each scheme and particle count it reports the time of one resampling call, the time
+of a full Ball.update, and the mean and variance of the per-frame tracking error.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.common import summarize
+from src.components.ball import Ball
+from src.settings import CANVAS_SIZE, BALL_PARAMS, SHAPES, MOTION_NOISE, ACCELERATION_NOISE
+from src.utils.resampling import RESAMPLERS
+from tests.tracks import synthetic_track
+
+
+def run(scheme: str, num_particles: int, steps: int, seed: int):
+    np.random.seed(seed)
+    truth, measurements = synthetic_track(steps, np.random.default_rng(seed))
+    ball = Ball(CANVAS_SIZE, BALL_PARAMS, SHAPES, num_particles, resampling_scheme=scheme, tracker="particle")
+    ball.tracker.particles[:, :2] = np.random.randn(num_particles, 2) * 20 + truth[0]
+
+    update_ms, errors = [], []
+    for z, x in zip(measurements, truth):
+        start = time.perf_counter()
+        ball.update(z, MOTION_NOISE, ACCELERATION_NOISE)
+        update_ms.append((time.perf_counter() - start) * 1000.0)
+        errors.append(float(np.linalg.norm(ball.get_position() - x)))
+    return update_ms, errors[20:]
+
+
+def time_resampler(resample, num_particles: int, repeats: int = 50) -> float:
+    weights = np.random.rand(num_particles) ** 4
+    weights /= weights.sum()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        resample(weights, num_particles)
+    return (time.perf_counter() - start) * 1000.0 / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--particles", type=int, nargs="+", default=[300, 3000, 30000])
+    parser.add_argument("--schemes", nargs="+", default=list(RESAMPLERS))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--steps", type=int, default=300)
+    args = parser.parse_args()
+
+    baseline = lambda w, n: np.random.choice(len(w), size=n, p=w)
+    print(f"{'particles':>9} {'scheme':>12} {'resample ms':>12} {'update ms':>10} {'err mean':>9} {'err var':>9}")
+    for num_particles in args.particles:
+        print(f"{num_particles:>9} {'np.choice':>12} {time_resampler(baseline, num_particles):>12.3f}")
+        for scheme in args.schemes:
+            update_ms, errors = [], []
+            for seed in range(args.runs):
+                u, e = run(scheme, num_particles, args.steps, seed)
+                update_ms += u
+                errors += e
+            print(f"{num_particles:>9} {scheme:>12} {time_resampler(RESAMPLERS[scheme], num_particles):>12.3f} "
+                  f"{summarize(update_ms)['mean']:>10.3f} {np.mean(errors):>9.2f} {np.var(errors):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
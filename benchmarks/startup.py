@@ -0,0 +1,101 @@
+"""
+Measures the game's time to first frame with the serial and the fast (concurrent) startup.
+
+Usage:
+    python -m benchmarks.startup [source] [--runs 5] [--open-delay 0.5] [--json startup.json] [--max-first-frame 2.0]
+
+Every run is a fresh Python process, so imports are included. The source uses the same
+specs as `main.py --source` (default: synthetic); `--open-delay` adds a sleep to opening
+it, standing in for a webcam negotiating its resolution. The game runs headless until
+its first game frame is presented. For each mode the median over the runs of every
+milestone (window shown, first camera frame, first game frame) and startup task is
+reported. With `--max-first-frame` the script exits with status 1 if the fast startup's
+median time to the first game frame exceeds that many seconds, to catch regressions.
+"""
+import time
+
+LAUNCH_TIME = time.perf_counter()
+
+import argparse
+import json
+import subprocess
+import sys
+
+import numpy as np
+
+MODES = ("serial", "fast")
+
+
+def child(args):
+    """Starts the game once in this process and prints its startup report as JSON."""
+    from src.game import Game
+    from src.settings import WIDTH, HEIGHT
+    from src.utils.display import NullDisplay
+    from src.utils.frame_source import open_source
+
+    def open_delayed():
+        time.sleep(args.open_delay)
+        return open_source(args.source, WIDTH, HEIGHT, seed=0)
+
+    game = Game(source=open_delayed, display=NullDisplay(), seed=0, audio=not args.no_audio,
+                fast_startup=args.child == "fast", launch_time=LAUNCH_TIME)
+    frame, timestamp = game._capture()
+    game._simulate(frame, game._detect(frame), timestamp)
+    game._present(frame, timestamp)
+    report = game.startup.report()
+    game._cleanup()
+    print(json.dumps(report))
+
+
+def run_mode(mode: str, args) -> list:
+    reports = []
+    for _ in range(args.runs):
+        command = [sys.executable, "-m", "benchmarks.startup", args.source, "--child", mode,
+                   "--open-delay", str(args.open_delay)] + (["--no-audio"] if args.no_audio else [])
+        output = subprocess.run(command, capture_output=True, text=True, check=True).stdout
+        reports.append(json.loads(output.strip().splitlines()[-1]))
+    return reports
+
+
+def medians(reports: list, kind: str) -> dict:
+    names = [name for report in reports for name in report[kind]]
+    return {name: float(np.median([r[kind][name] for r in reports if name in r[kind]]))
+            for name in dict.fromkeys(names)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", nargs="?", default="synthetic")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--open-delay", type=float, default=0.0)
+    parser.add_argument("--no-audio", action="store_true")
+    parser.add_argument("--json", help="write the per-mode medians to this file")
+    parser.add_argument("--max-first-frame", type=float, help="fail if the fast startup's median exceeds this")
+    parser.add_argument("--child", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    results = {}
+    for mode in MODES:
+        reports = run_mode(mode, args)
+        results[mode] = {"milestones": medians(reports, "milestones"), "tasks": medians(reports, "tasks")}
+        print(f"== {mode} startup, median of {args.runs} runs")
+        for kind in ("milestones", "tasks"):
+            for name, seconds in results[mode][kind].items():
+                print(f"   {kind[:-1]:>9} {name:>20} {seconds:>7.3f} s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.max_first_frame is not None:
+        first_frame = results["fast"]["milestones"]["first game frame"]
+        if first_frame > args.max_first_frame:
+            print(f"Fast startup took {first_frame:.3f} s to the first game frame, more than {args.max_first_frame} s")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
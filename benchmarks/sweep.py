@@ -0,0 +1,292 @@
+"""
+Tunes the tracker offline: replays the Ball filter over cached detector measurements for a grid or a random sample of parameters.
+
+Usage:
+    python -m benchmarks.sweep [source ...] --param motion_noise=5,10,20 --param sigma=25,50 [--random 50]
+                               [--frames 600] [--runs 3] [--workers 4] [--sort error] [--top 10] [--json sweep.json]
+
+Sources use the same specs as `main.py --source` (not cameras) and should have ground
+truth; the default is one synthetic clip. Parameters not given keep their value from
+src/settings.py:
+
+    motion_noise, accel_noise, sigma, particles   the Ball filter (MOTION_NOISE, ACCELERATION_NOISE,
+                                                   PARTICLE_SIGMA, NUM_PARTICLES)
+    red_hue, red_sat_min, red_val_min              the red HSV ranges, [0, red_hue] and
+                                                   [180 - red_hue, 180] above the saturation/value minima
+
+`--param name=a,b,c` lists values; every combination is run, or with `--random N` N
+configurations are drawn from them (`name=low:high` draws uniformly from a range).
+
+The detector runs once per clip and HSV setting; its measurements are cached under
+`--cache-dir` as compressed arrays keyed by the clip, its file stamp and the detector
+settings. Configurations then run on a pool of `--workers` processes, each with its own
+seed per run, so results do not depend on scheduling. Every finished configuration is
+appended to `results.jsonl` in the cache directory and skipped by later sweeps with the
+same clips, frames, runs and seed. Results are ranked by `--sort`: tracking error (mean
+or p95, pixels), jitter (mean frame-to-frame change of the estimated velocity, pixels)
+or CPU time per filter update.
+"""
+import argparse
+import hashlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.common import summarize
+from src.components.ball import Ball
+from src.settings import (
+    ROOT_DIR, WIDTH, HEIGHT, CANVAS_SIZE, BALL_PARAMS, SHAPES, NUM_PARTICLES, MOTION_NOISE, ACCELERATION_NOISE,
+    PARTICLE_SIGMA, RED_LOWER1, RED_UPPER1, MOTION_BACKEND, DETECTION_SCALE, DETECTION_REFINE, COLOR_LUT,
+    WORKER_START_METHOD
+)
+from src.utils.frame_source import open_source
+from src.utils.red_object_detector import RedObjectDetector
+
+# Bump when a change to the detector or the filter invalidates cached measurements or results.
+CACHE_VERSION = 1
+
+DETECTOR_PARAMS = {
+    "red_hue": int(RED_UPPER1[0]),
+    "red_sat_min": int(RED_LOWER1[1]),
+    "red_val_min": int(RED_LOWER1[2]),
+}
+FILTER_PARAMS = {
+    "motion_noise": float(MOTION_NOISE),
+    "accel_noise": float(ACCELERATION_NOISE),
+    "sigma": float(PARTICLE_SIGMA),
+    "particles": NUM_PARTICLES,
+}
+DEFAULTS = {**FILTER_PARAMS, **DETECTOR_PARAMS}
+METRICS = {"error": "error_mean", "p95": "error_p95", "jitter": "jitter", "cpu": "cpu_ms"}
+
+
+def digest(value) -> str:
+    return hashlib.sha1(json.dumps(value, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def parse_param(text: str):
+    """Parses `name=a,b,c` into (name, [values]) and `name=low:high` into (name, (low, high))."""
+    name, _, values = text.partition("=")
+    if name not in DEFAULTS or not values:
+        raise argparse.ArgumentTypeError(f"expected name=values with a name from {sorted(DEFAULTS)}, got '{text}'")
+    kind = type(DEFAULTS[name])
+    try:
+        if ":" in values:
+            low, high = values.split(":")
+            return name, (kind(low), kind(high))
+        return name, [kind(v) for v in values.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"could not read the {kind.__name__} values in '{text}'") from None
+
+
+def build_configs(params: Dict, num_random: int, seed: int) -> List[Dict]:
+    """Expands the parameter values into the full grid, or into `num_random` distinct random draws."""
+    if not num_random:
+        ranges = [name for name, values in params.items() if isinstance(values, tuple)]
+        if ranges:
+            raise ValueError(f"ranges ({', '.join(ranges)}) need --random")
+        names = list(params)
+        return [dict(DEFAULTS, **dict(zip(names, values))) for values in itertools.product(*params.values())]
+
+    rng = np.random.default_rng(seed)
+    configs = {}
+    for _ in range(num_random):
+        config = dict(DEFAULTS)
+        for name, values in params.items():
+            if isinstance(values, tuple):
+                value = rng.uniform(*values)
+                config[name] = int(round(value)) if isinstance(DEFAULTS[name], int) else round(float(value), 3)
+            else:
+                config[name] = values[rng.integers(len(values))]
+        configs.setdefault(digest(config), config)
+    return list(configs.values())
+
+
+def red_ranges(hue: int, sat_min: int, val_min: int):
+    return [(np.array([0, sat_min, val_min]), np.array([hue, 255, 255])),
+            (np.array([180 - hue, sat_min, val_min]), np.array([180, 255, 255]))]
+
+
+def measurement_key(spec: str, frames: int, seed: int, detector_params: Dict) -> str:
+    stamp = None
+    if os.path.exists(spec):
+        info = os.stat(spec)
+        stamp = [info.st_size, info.st_mtime_ns]
+    return digest({
+        "version": CACHE_VERSION, "source": spec, "stamp": stamp, "frames": frames, "seed": seed,
+        "size": [WIDTH, HEIGHT], "detector": detector_params, "motion": MOTION_BACKEND,
+        "scale": DETECTION_SCALE, "refine": DETECTION_REFINE, "lut": COLOR_LUT,
+    })
+
+
+def record_measurements(spec: str, frames: int, seed: int, detector_params: Dict, path: str) -> str:
+    """Runs the detector over a clip and saves its measurements and the ground truth (NaN where absent)."""
+    source = open_source(spec, WIDTH, HEIGHT, frames, seed)
+    detector = RedObjectDetector(red_ranges=red_ranges(detector_params["red_hue"], detector_params["red_sat_min"],
+                                                       detector_params["red_val_min"]))
+    measurements, truth, detect_ms = [], [], []
+    while source.isOpened() and len(measurements) < frames:
+        ret, frame = source.read()
+        if not ret:
+            break
+        start = time.perf_counter()
+        measurement = detector.detect(frame)
+        detect_ms.append((time.perf_counter() - start) * 1000.0)
+        points = source.ground_truth()
+        measurements.append(measurement if measurement is not None else (np.nan, np.nan))
+        truth.append(points[0] if points is not None and len(points) else (np.nan, np.nan))
+    source.release()
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez_compressed(f, measurements=np.array(measurements, dtype=np.float32).reshape(-1, 2),
+                            truth=np.array(truth, dtype=np.float32).reshape(-1, 2),
+                            detect_ms=np.array(detect_ms, dtype=np.float32))
+    os.replace(tmp_path, path)
+    return path
+
+
+@lru_cache(maxsize=None)
+def load_measurements(path: str):
+    with np.load(path) as data:
+        return data["measurements"], data["truth"]
+
+
+def evaluate(config: Dict, paths: List[str], runs: int, seed: int) -> Dict:
+    """Replays the filter of one configuration over every cached clip, `runs` times each."""
+    errors, jitter = [], []
+    cpu_time = updates = 0
+    for path in paths:
+        measurements, truth = load_measurements(path)
+        known = np.vstack([truth, measurements])
+        known = known[~np.isnan(known[:, 0])]
+        if not len(known):
+            continue
+        for run in range(runs):
+            np.random.seed(seed + run)
+            random.seed(seed + run)
+            ball = Ball(CANVAS_SIZE, BALL_PARAMS, SHAPES, config["particles"], shape="circle",
+                        position=known[0].astype(float), sigma=config["sigma"], tracker="particle")
+            positions = np.empty((len(measurements), 2))
+            start = time.process_time()
+            for i, z in enumerate(measurements):
+                ball.update(None if np.isnan(z[0]) else z.astype(float), config["motion_noise"], config["accel_noise"])
+                positions[i] = ball.get_position()
+            cpu_time += time.process_time() - start
+            updates += len(measurements)
+
+            visible = ~np.isnan(truth[:, 0])
+            errors.extend(np.linalg.norm(positions[visible] - truth[visible], axis=1).tolist())
+            jitter.extend(np.linalg.norm(np.diff(positions, n=2, axis=0), axis=1).tolist())
+
+    error = summarize(errors)
+    return {
+        "config": config,
+        "error_mean": error["mean"],
+        "error_p95": error["p95"],
+        "jitter": summarize(jitter)["mean"],
+        "cpu_ms": cpu_time * 1000.0 / updates if updates else float("nan"),
+    }
+
+
+def load_results(path: str) -> Dict[str, Dict]:
+    results = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    results[record["key"]] = record
+                except (ValueError, KeyError):
+                    continue  # a line cut short by an interrupted sweep
+    return results
+
+
+def print_ranking(results: List[Dict], sort: str, top: int):
+    names = [name for name in DEFAULTS if len({r["config"][name] for r in results}) > 1] or list(FILTER_PARAMS)
+    header = " ".join(f"{name:>12}" for name in names)
+    print(f"{'rank':>4} {header} {'err mean':>9} {'err p95':>8} {'jitter':>7} {'cpu ms':>7}")
+    for rank, r in enumerate(results[:top], 1):
+        values = " ".join(f"{r['config'][name]:>12g}" for name in names)
+        print(f"{rank:>4} {values} {r['error_mean']:>9.2f} {r['error_p95']:>8.2f} {r['jitter']:>7.2f} {r['cpu_ms']:>7.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="*", default=["synthetic"])
+    parser.add_argument("--param", type=parse_param, action="append", default=[], help="name=a,b,c or name=low:high")
+    parser.add_argument("--random", type=int, default=0, help="draw this many configurations instead of the grid")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--sort", choices=METRICS, default="error")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--cache-dir", default=os.path.join(ROOT_DIR, ".cache", "sweep"))
+    parser.add_argument("--json", help="write the ranked results to this file")
+    args = parser.parse_args()
+
+    if any(str(spec).isdigit() for spec in args.sources):
+        parser.error("sweeps need recorded clips or synthetic sources, not cameras")
+    try:
+        configs = build_configs(dict(args.param), args.random, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    measurement_dir = os.path.join(args.cache_dir, "measurements")
+    os.makedirs(measurement_dir, exist_ok=True)
+    results_path = os.path.join(args.cache_dir, "results.jsonl")
+
+    def detector_params(config):
+        return {name: config[name] for name in DETECTOR_PARAMS}
+
+    # Each configuration's result is keyed by everything that went into it.
+    paths, keys = {}, {}
+    for config in configs:
+        clip_keys = [measurement_key(spec, args.frames, args.seed, detector_params(config)) for spec in args.sources]
+        for spec, clip_key in zip(args.sources, clip_keys):
+            paths[clip_key] = (spec, detector_params(config), os.path.join(measurement_dir, f"{clip_key}.npz"))
+        keys[digest({"version": CACHE_VERSION, "config": config, "clips": clip_keys,
+                     "runs": args.runs, "seed": args.seed})] = (config, clip_keys)
+
+    finished = load_results(results_path)
+    todo = {key: value for key, value in keys.items() if key not in finished}
+    missing = {clip_key: value for clip_key, value in paths.items() if not os.path.exists(value[2])}
+    print(f"{len(configs)} configurations: {len(keys) - len(todo)} cached, {len(todo)} to run; "
+          f"{len(missing)} of {len(paths)} measurement sets to record")
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=mp.get_context(WORKER_START_METHOD)) as pool:
+        for future in as_completed([pool.submit(record_measurements, spec, args.frames, args.seed, params, path)
+                                    for spec, params, path in missing.values()]):
+            future.result()
+
+        futures = {pool.submit(evaluate, config, [paths[k][2] for k in clip_keys], args.runs, args.seed): key
+                   for key, (config, clip_keys) in todo.items()}
+        with open(results_path, "a") as f:
+            for done, future in enumerate(as_completed(futures), 1):
+                record = dict(future.result(), key=futures[future])
+                finished[record["key"]] = record
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                print(f"\r{done}/{len(futures)} configurations", end="", flush=True)
+    if todo:
+        print(f"\nran in {time.perf_counter() - start:.1f} s")
+
+    metric = METRICS[args.sort]
+    ranked = sorted((finished[key] for key in keys), key=lambda r: (np.nan_to_num(r[metric], nan=np.inf), r["key"]))
+    print_ranking(ranked, args.sort, args.top)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(ranked, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,15 @@
+import time
+
+# Taken before the heavy imports, so the startup metrics cover them too.
+LAUNCH_TIME = time.perf_counter()
+
 import sys
 import os
+import argparse
 from src.game import Game
-from src.settings import SOUNDS
+from src.settings import SOUNDS, WIDTH, HEIGHT, FAST_STARTUP, TRACKER_BACKEND
+from src.components.trackers import TRACKERS
+from src.utils.frame_source import open_source
 
 if getattr(sys, 'frozen', False):
     os.chdir(sys._MEIPASS)
@@ -10,7 +18,33 @@ def main():
     """
     Initializes and runs the game.
     """
+    parser = argparse.ArgumentParser(description="Particle filter shape matching game.")
+    parser.add_argument("--source", nargs="+", default=["0"],
+                        help="camera index, video file, image directory, or 'synthetic[:objects]' (default: camera 0); "
+                             "several sources are detected in parallel worker processes and fused")
+    parser.add_argument("--detect-workers", action="store_true",
+                        help="run detection in a worker process even for a single source")
+    parser.add_argument("--seed", type=int, help="seed for reproducible runs")
+    parser.add_argument("--serial-startup", action="store_true",
+                        help="set everything up one after another, without the warming-up screen")
+    parser.add_argument("--tracker", choices=sorted(TRACKERS), default=TRACKER_BACKEND,
+                        help=f"backend estimating the ball's position (default: {TRACKER_BACKEND})")
+    args = parser.parse_args()
+
+    # Opened by the game, so a fast startup can do it while it sets up everything else.
+    if len(args.source) > 1 or args.detect_workers:
+        # Imported only here: the worker pool pulls in multiprocessing and shared memory.
+        from src.utils.detection_workers import CameraPool
+        source = lambda: CameraPool(args.source, WIDTH, HEIGHT, seed=args.seed or 0)
+    else:
+        source = lambda: open_source(args.source[0], WIDTH, HEIGHT, seed=args.seed or 0)
+
     game = Game(
+        source=source,
+        seed=args.seed,
+        fast_startup=FAST_STARTUP and not args.serial_startup,
+        launch_time=LAUNCH_TIME,
+        tracker=args.tracker,
         score_sound_path=SOUNDS["score"],
         penalty_sound_path=SOUNDS["penalty"],
         levelup_sound_path=SOUNDS["levelup"],
@@ -4,84 +4,67 @@ import random
 from typing import Tuple, List, Optional, Dict
 
 from src.settings import (
-    CANVAS_SIZE, PARTICLE_SIGMA, ACCELERATION_NOISE, COLORS
+    CANVAS_SIZE, PARTICLE_SIGMA, COLORS, PARTICLE_VIS_MODE,
+    RESAMPLING_SCHEME, RESAMPLE_ESS_THRESHOLD, ADAPTIVE_PARTICLES, TRACKER_BACKEND
 )
+from src.components.trackers import create_tracker
 
 class Ball:
     """
-    Represents the game ball tracked by a particle filter.
-    Each particle's state is [x, y, vx, vy].
+    Represents the game ball. Its state [x, y, vx, vy] is estimated by a tracker
+    backend (see src/components/trackers.py), by default a particle filter.
     """
-    def __init__(self, canvas_size: Tuple[int, int, int], ball_params: Dict, shapes: List[str], num_particles: int):
+    def __init__(self, canvas_size: Tuple[int, int, int], ball_params: Dict, shapes: List[str], num_particles: int,
+                 resampling_scheme: str = RESAMPLING_SCHEME, ess_threshold: float = RESAMPLE_ESS_THRESHOLD,
+                 shape: Optional[str] = None, position: Optional[np.ndarray] = None,
+                 adaptive: bool = ADAPTIVE_PARTICLES, sigma: float = PARTICLE_SIGMA,
+                 tracker: str = TRACKER_BACKEND):
+        """
+        `shape` and `position` default to a random shape at a random position on the canvas.
+        `tracker` names the backend; the remaining arguments configure the particle filter:
+        `sigma` is the standard deviation (pixels) of the measurement likelihood, and with
+        `adaptive`, `num_particles` is only the initial count (KLD-sampling).
+        """
         self.canvas_size = canvas_size
         self.ball_params = ball_params
-        self.num_particles = num_particles
-        self.shape = random.choice(shapes)
+        self.shape = shape if shape is not None else random.choice(shapes)
         self.color = COLORS["ball"]
-        self.position = self._init_position()
-        self.particles = self._init_particles()
+        self.position = np.asarray(position) if position is not None else self._init_position()
+        self.tracker = create_tracker(tracker, canvas_size, self.position, num_particles,
+                                      resampling_scheme=resampling_scheme, ess_threshold=ess_threshold,
+                                      adaptive=adaptive, sigma=sigma)
+
+    @staticmethod
+    def get_margin(shape: str, ball_params: Dict) -> Tuple[int, int]:
+        """Returns the (x, y) distance the ball's centre keeps from the canvas edges when spawned."""
+        if shape == "circle":
+            r = ball_params["circle"]["radius"]
+            return r, r
+        if shape == "square":
+            s = ball_params["square"]["side"]
+            return s // 2, s // 2
+        if shape == "rectangle":
+            return ball_params["rectangle"]["width"] // 2, ball_params["rectangle"]["height"] // 2
+        if shape == "triangle":
+            s = ball_params["triangle"]["side"]
+            return s, s
+        return 0, 0
 
     def _init_position(self) -> np.ndarray:
-        if self.shape == "circle":
-            r = self.ball_params["circle"]["radius"]
-            x = random.randint(r, self.canvas_size[1] - r)
-            y = random.randint(r, self.canvas_size[0] - r)
-        elif self.shape == "square":
-            s = self.ball_params["square"]["side"]
-            x = random.randint(s // 2, self.canvas_size[1] - s // 2)
-            y = random.randint(s // 2, self.canvas_size[0] - s // 2)
-        elif self.shape == "rectangle":
-            w = self.ball_params["rectangle"]["width"]
-            h = self.ball_params["rectangle"]["height"]
-            x = random.randint(w // 2, self.canvas_size[1] - w // 2)
-            y = random.randint(h // 2, self.canvas_size[0] - h // 2)
-        elif self.shape == "triangle":
-            s = self.ball_params["triangle"]["side"]
-            x = random.randint(s, self.canvas_size[1] - s)
-            y = random.randint(s, self.canvas_size[0] - s)
+        mx, my = Ball.get_margin(self.shape, self.ball_params)
+        x = random.randint(mx, self.canvas_size[1] - mx)
+        y = random.randint(my, self.canvas_size[0] - my)
         return np.array([x, y])
 
-    def _init_particles(self) -> np.ndarray:
-        particles = np.zeros((self.num_particles, 4))
-        particles[:, :2] = np.random.randn(self.num_particles, 2) * 20 + self.position
-        particles[:, 2:] = np.random.randn(self.num_particles, 2) * 5
-        return particles
+    def update(self, measurement: Optional[np.ndarray], motion_noise: float, accel_noise: float, dt: float = 1.0):
+        """
+        Predicts the state `dt` simulation ticks ahead, then corrects it with the
+        measurement. Velocities are in pixels per tick and the noise figures are per tick;
+        noise grows with sqrt(dt), like a random walk.
+        """
+        self.tracker.predict(dt, motion_noise, accel_noise)
+        self.tracker.update(measurement)
 
-    def update(self, measurement: Optional[np.ndarray], motion_noise: float, accel_noise: float):
-        # Prediction Step
-        self.particles[:, :2] += self.particles[:, 2:] + np.random.randn(self.num_particles, 2) * motion_noise
-        self.particles[:, 2:] += np.random.randn(self.num_particles, 2) * accel_noise
-
-        # Boundary collision
-        self.particles[:, 0] = np.clip(self.particles[:, 0], 0, self.canvas_size[1] - 1)
-        self.particles[:, 1] = np.clip(self.particles[:, 1], 0, self.canvas_size[0] - 1)
-
-        left_collision = self.particles[:, 0] == 0
-        right_collision = self.particles[:, 0] == self.canvas_size[1] - 1
-        top_collision = self.particles[:, 1] == 0
-        bottom_collision = self.particles[:, 1] == self.canvas_size[0] - 1
-
-        self.particles[left_collision | right_collision, 2] *= -1
-        self.particles[top_collision | bottom_collision, 3] *= -1
-
-        # Correction (Update) Step
-        if measurement is not None:
-            distances = np.linalg.norm(self.particles[:, :2] - measurement, axis=1)
-            weights = np.exp(-(distances ** 2) / (2 * PARTICLE_SIGMA ** 2))
-            
-            if np.sum(weights) > 0:
-                weights /= np.sum(weights)
-            else:
-                weights = np.ones(self.num_particles) / self.num_particles
-
-            # Resampling
-            effective_N = 1.0 / np.sum(weights ** 2)
-            if effective_N < self.num_particles / 2.0:
-                indices = np.random.choice(self.num_particles, size=self.num_particles, p=weights)
-                self.particles = self.particles[indices]
-                self.particles[:, 2:] += np.random.randn(self.num_particles, 2) * accel_noise
-
-    
     def get_radius(self) -> int:
         """Returns the effective radius for collision detection based on the shape."""
         if self.shape == "circle":
@@ -98,13 +81,21 @@ class Ball:
         return 30 # Default fallback
     
     def get_position(self) -> np.ndarray:
-        return np.mean(self.particles[:, :2], axis=0)
+        return self.tracker.estimate()[:2]
+
+    def get_velocity(self) -> np.ndarray:
+        return self.tracker.estimate()[2:]
+
+    def get_spread(self) -> np.ndarray:
+        """Returns the standard deviation of the estimated position along x and y."""
+        return np.sqrt(np.diag(self.tracker.covariance())[:2])
 
+    def draw_particles(self, frame: np.ndarray, mode: str = PARTICLE_VIS_MODE):
+        """Draws the tracker's uncertainty (the particle cloud, or the Kalman covariance ellipse) for debugging."""
+        self.tracker.draw(frame, mode)
 
     def draw(self, frame: np.ndarray):
-        # (Optional) Draw particles for debugging/visualization.
-        for p in self.particles:
-            cv2.circle(frame, (int(p[0]), int(p[1])), 2, (100, 0, 0), -1)
+        self.draw_particles(frame)
 
         pos = self.get_position().astype(int)
         # Draw the main ball shape over the particles
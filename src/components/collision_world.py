@@ -0,0 +1,206 @@
+import cv2
+import numpy as np
+import random
+from typing import List, NamedTuple, Optional, Tuple
+
+from src.settings import COLLISION_GRID_CELL, COLLISION_GRID_THRESHOLD, SPAWN_GRID_CELL
+from src.components.obstacle import Obstacle
+from src.components.powerup import PowerUp
+from src.components.target import TargetMap
+
+
+class Contacts(NamedTuple):
+    """Result of `CollisionWorld.collide` for N query points."""
+    obstacle: np.ndarray  # (N,) bool, point inside any obstacle
+    powerups: np.ndarray  # (N, P) bool, ball overlaps power-up
+    target: np.ndarray  # (N,) index of the target hit, -1 for none
+
+
+class UniformGrid:
+    """
+    Broad phase over axis-aligned boxes. Every box is registered in each grid cell it
+    overlaps; the (cell, box) pairs are sorted once, so looking up the boxes of a cell is a
+    pair of `searchsorted` calls instead of a scan over all boxes.
+    """
+    def __init__(self, boxes: np.ndarray, cell_size: float, width: int):
+        self.cell_size = cell_size
+        self.num_boxes = len(boxes)
+        self.columns = int(np.ceil(width / cell_size)) + 1
+        cells, owners = self._cells(boxes)
+        order = np.argsort(cells, kind="stable")
+        self.cells = cells[order]
+        self.owners = owners[order]
+
+    def _cells(self, boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the flat cell key and box index of every (cell, box) overlap."""
+        lo = np.floor(np.maximum(boxes[:, :2], 0) / self.cell_size).astype(int)
+        hi = np.floor(np.maximum(boxes[:, 2:], 0) / self.cell_size).astype(int)
+        lo[:, 0] = np.minimum(lo[:, 0], self.columns - 1)
+        hi[:, 0] = np.minimum(hi[:, 0], self.columns - 1)
+        spans = hi - lo + 1
+        counts = spans[:, 0] * spans[:, 1]
+        owners = np.repeat(np.arange(len(boxes)), counts)
+        # Position of every overlap inside its box's span of cells.
+        local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        cx = lo[owners, 0] + local % spans[owners, 0]
+        cy = lo[owners, 1] + local // spans[owners, 0]
+        return cy * self.columns + cx, owners
+
+    def candidates(self, boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the unique (query index, box index) pairs sharing at least one cell."""
+        cells, queries = self._cells(boxes)
+        start = np.searchsorted(self.cells, cells, side="left")
+        stop = np.searchsorted(self.cells, cells, side="right")
+        counts = stop - start
+        query = np.repeat(queries, counts)
+        slot = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + np.repeat(start, counts)
+        # A query spanning several cells can meet the same box more than once.
+        pairs = np.unique(query * self.num_boxes + self.owners[slot])
+        return pairs // self.num_boxes, pairs % self.num_boxes
+
+
+class CollisionWorld:
+    """
+    Keeps every obstacle, power-up and the target layout as arrays, so all of them are
+    moved, bounced and tested against one or several balls in a single vectorised pass.
+    The Obstacle and PowerUp objects stay the public handles (they draw themselves);
+    their `position` and `velocity` are rebound to rows of the world's arrays, so the
+    objects and the arrays always agree. Once a test would compare more than
+    `grid_threshold` (ball, object) pairs it goes through a uniform grid broad phase
+    instead of testing every pair.
+    """
+    def __init__(self, canvas_size: Tuple[int, int, int], grid_cell: float = COLLISION_GRID_CELL,
+                 grid_threshold: int = COLLISION_GRID_THRESHOLD):
+        self.canvas_size = canvas_size
+        self.bounds = np.array([canvas_size[1], canvas_size[0]], dtype=float)
+        self.grid_cell = grid_cell
+        self.grid_threshold = grid_threshold
+        self.obstacles: List[Obstacle] = []
+        self.powerups: List[PowerUp] = []
+        self.target_map: Optional[TargetMap] = None
+        self._bind_obstacles()
+        self._bind_powerups()
+
+    def set_obstacles(self, obstacles: List[Obstacle]):
+        self.obstacles = list(obstacles)
+        self._bind_obstacles()
+
+    def add_powerup(self, powerup: PowerUp):
+        self.powerups.append(powerup)
+        self._bind_powerups()
+
+    def take_powerups(self, hit: np.ndarray) -> List[PowerUp]:
+        """Removes and returns the power-ups flagged in the (P,) boolean `hit` mask."""
+        if not np.any(hit):
+            return []
+        taken = [p for p, h in zip(self.powerups, hit) if h]
+        self.powerups = [p for p, h in zip(self.powerups, hit) if not h]
+        self._bind_powerups()
+        return taken
+
+    def clear_powerups(self):
+        self.powerups = []
+        self._bind_powerups()
+
+    def set_targets(self, target_map: TargetMap):
+        self.target_map = target_map
+
+    def _bind_obstacles(self):
+        self.obstacle_positions = np.array([o.position for o in self.obstacles], dtype=float).reshape(-1, 2)
+        self.obstacle_velocities = np.array([o.velocity for o in self.obstacles], dtype=float).reshape(-1, 2)
+        self.obstacle_sizes = np.array([o.size for o in self.obstacles], dtype=float).reshape(-1, 2)
+        self.previous_obstacle_positions = self.obstacle_positions.copy()
+        for i, obstacle in enumerate(self.obstacles):
+            obstacle.position = self.obstacle_positions[i]
+            obstacle.velocity = self.obstacle_velocities[i]
+
+    def _bind_powerups(self):
+        self.powerup_positions = np.array([p.position for p in self.powerups], dtype=float).reshape(-1, 2)
+        self.powerup_radii = np.array([p.radius for p in self.powerups], dtype=float)
+
+    def step(self):
+        """Moves every obstacle one tick and bounces those touching a canvas edge."""
+        np.copyto(self.previous_obstacle_positions, self.obstacle_positions)
+        self.obstacle_positions += self.obstacle_velocities
+        far = self.obstacle_positions + self.obstacle_sizes
+        bounce = (self.obstacle_positions <= 0) | (far >= self.bounds)
+        self.obstacle_velocities[bounce] *= -1
+
+    def obstacle_positions_at(self, alpha: float) -> np.ndarray:
+        """Obstacle positions `alpha` (0..1) of the way from the previous tick to the last one, for drawing."""
+        return self.previous_obstacle_positions + alpha * (self.obstacle_positions - self.previous_obstacle_positions)
+
+    def obstacle_hits(self, points: np.ndarray) -> np.ndarray:
+        """Returns, per (N, 2) point, whether it lies inside (or on the edge of) any obstacle."""
+        lo, hi = self.obstacle_positions, self.obstacle_positions + self.obstacle_sizes
+        if len(points) * len(lo) < self.grid_threshold:
+            p = points[:, None, :]
+            return np.any(np.all((p >= lo) & (p <= hi), axis=2), axis=1)
+
+        grid = UniformGrid(np.hstack([lo, hi]), self.grid_cell, self.canvas_size[1])
+        query, box = grid.candidates(np.hstack([points, points]))
+        p = points[query]
+        inside = np.all((p >= lo[box]) & (p <= hi[box]), axis=1)
+        hits = np.zeros(len(points), dtype=bool)
+        hits[query[inside]] = True
+        return hits
+
+    def powerup_hits(self, points: np.ndarray, radii: np.ndarray) -> np.ndarray:
+        """Returns the (N, P) matrix of which balls (centre, radius) overlap which power-ups."""
+        centres, r = self.powerup_positions, self.powerup_radii
+        if len(points) * len(centres) < self.grid_threshold:
+            d = points[:, None, :] - centres
+            return np.sum(d * d, axis=2) < (radii[:, None] + r) ** 2
+
+        grid = UniformGrid(np.hstack([centres - r[:, None], centres + r[:, None]]), self.grid_cell, self.canvas_size[1])
+        query, box = grid.candidates(np.hstack([points - radii[:, None], points + radii[:, None]]))
+        d = points[query] - centres[box]
+        overlap = np.einsum("ij,ij->i", d, d) < (radii[query] + r[box]) ** 2
+        hits = np.zeros((len(points), len(centres)), dtype=bool)
+        hits[query[overlap], box[overlap]] = True
+        return hits
+
+    def target_hits(self, points: np.ndarray) -> np.ndarray:
+        if self.target_map is None:
+            return np.full(len(points), -1)
+        return self.target_map.lookup(points)
+
+    def sample_free_position(self, margin: Tuple[int, int], clearance: float,
+                             cell: int = SPAWN_GRID_CELL) -> Optional[np.ndarray]:
+        """
+        Draws a uniformly random position at least `margin` (x, y) pixels inside the canvas
+        and more than `clearance` pixels away from every obstacle and target bounding box.
+        Sampling works on a grid of `cell`-pixel cells: a cell is occupied if any box touches
+        it, and a distance transform of the grid gives every free cell a conservative
+        clearance. Runs in bounded time: if nothing has the requested clearance it settles
+        for any free cell, and returns None if there is none.
+        """
+        height, width = self.canvas_size[:2]
+        rows, cols = -(-height // cell), -(-width // cell)
+        occupied = np.zeros((rows, cols), dtype=bool)
+        boxes = [np.hstack([self.obstacle_positions, self.obstacle_positions + self.obstacle_sizes])]
+        if self.target_map is not None:
+            boxes.append(self.target_map.bounding_boxes())
+        boxes = np.floor(np.maximum(np.vstack(boxes), 0) / cell).astype(int)
+        for x0, y0, x1, y1 in boxes:
+            occupied[y0:y1 + 1, x0:x1 + 1] = True
+        distance = cv2.distanceTransform((~occupied).astype(np.uint8), cv2.DIST_L2, 3)
+
+        # Only cells lying entirely inside the margins are candidates.
+        mx, my = margin
+        x0, y0 = -(-mx // cell), -(-my // cell)
+        x1, y1 = (width - mx + 1) // cell, (height - my + 1) // cell
+        window = distance[y0:y1, x0:x1]
+        # A point and the nearest occupied pixel can each sit anywhere in their cells, hence the +1.
+        for required in (clearance / cell + 1, 0.0):
+            candidates = np.flatnonzero(window > required)
+            if len(candidates):
+                cy, cx = divmod(int(candidates[random.randrange(len(candidates))]), window.shape[1])
+                return np.array([(cx + x0) * cell + random.randrange(cell), (cy + y0) * cell + random.randrange(cell)])
+        return None
+
+    def collide(self, points: np.ndarray, radii: np.ndarray) -> Contacts:
+        """Tests N balls (centres and radii) against everything in the world."""
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        radii = np.asarray(radii, dtype=float).reshape(-1)
+        return Contacts(self.obstacle_hits(points), self.powerup_hits(points, radii), self.target_hits(points))
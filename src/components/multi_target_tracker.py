@@ -0,0 +1,128 @@
+import numpy as np
+from typing import List, Tuple
+
+from src.settings import PARTICLE_SIGMA, RESAMPLE_ESS_THRESHOLD
+from src.utils.resampling import systematic_resample_batch
+
+class MultiTargetTracker:
+    """
+    Tracks several red objects (one per player) with one particle filter per track.
+    All filters live in a single (targets, particles, 4) array of [x, y, vx, vy] states,
+    so prediction, weighting and resampling run as batched array operations whose cost
+    grows with the total number of particles rather than with the number of players.
+    """
+    def __init__(self, canvas_size: Tuple[int, int, int], num_targets: int, num_particles: int,
+                 gate: float, max_misses: int, ess_threshold: float = RESAMPLE_ESS_THRESHOLD):
+        self.canvas_size = canvas_size
+        self.num_targets = num_targets
+        self.num_particles = num_particles
+        self.gate = gate
+        self.max_misses = max_misses
+        self.ess_threshold = ess_threshold
+        self.particles = np.zeros((num_targets, num_particles, 4))
+        self.active = np.zeros(num_targets, dtype=bool)
+        self.misses = np.zeros(num_targets, dtype=int)
+
+    def update(self, detections: List[np.ndarray], motion_noise: float, accel_noise: float,
+               dt: float = 1.0) -> np.ndarray:
+        """
+        Runs one predict/assign/correct step for detections taken `dt` simulation ticks
+        after the previous ones and returns, per track, the index of the detection
+        assigned to it (-1 if none). Like Tracker.predict, velocities are per tick and the
+        noise grows with sqrt(dt).
+        """
+        self._predict(dt, motion_noise, accel_noise)
+        points = np.asarray(detections, dtype=float).reshape(-1, 2)
+        assignment = self.assign(points)
+
+        matched = assignment >= 0
+        self.misses[matched] = 0
+        self.misses[~matched & self.active] += 1
+        self.active &= self.misses <= self.max_misses
+
+        # Tracks that were already running get a correction step; free tracks are
+        # (re)initialised around the detection they picked up.
+        correct = matched & self.active
+        spawn = matched & ~self.active
+        if np.any(correct):
+            self._correct(np.flatnonzero(correct), points[assignment[correct]], accel_noise)
+        for track in np.flatnonzero(spawn):
+            self._spawn(track, points[assignment[track]])
+        return assignment
+
+    def assign(self, points: np.ndarray) -> np.ndarray:
+        """
+        Greedily pairs active tracks with their nearest detections inside the gate, then
+        hands the remaining detections to free tracks, largest contour first.
+        """
+        assignment = np.full(self.num_targets, -1)
+        if len(points) == 0:
+            return assignment
+
+        taken = np.zeros(len(points), dtype=bool)
+        active = np.flatnonzero(self.active)
+        if len(active):
+            distances = np.linalg.norm(self.estimates()[active, None, :] - points[None, :, :], axis=2)
+            distances[distances > self.gate] = np.inf
+            for _ in range(min(len(active), len(points))):
+                t, d = np.unravel_index(np.argmin(distances), distances.shape)
+                if not np.isfinite(distances[t, d]):
+                    break
+                assignment[active[t]] = d
+                taken[d] = True
+                distances[t, :] = np.inf
+                distances[:, d] = np.inf
+
+        free = np.flatnonzero(~self.active)
+        for track, d in zip(free, np.flatnonzero(~taken)):
+            assignment[track] = d
+        return assignment
+
+    def estimates(self) -> np.ndarray:
+        """Returns the (targets, 2) mean particle position of every track; inactive rows are meaningless."""
+        return self.particles[:, :, :2].mean(axis=1)
+
+    def _predict(self, dt: float, motion_noise: float, accel_noise: float):
+        """Moves the active tracks; free slots are re-seeded when they pick up a detection."""
+        tracks = np.flatnonzero(self.active)
+        if len(tracks) == 0:
+            return
+        # With every slot in use the tracks are updated in place, otherwise gathered and scattered back.
+        all_active = len(tracks) == self.num_targets
+        particles = self.particles if all_active else self.particles[tracks]
+        noise = np.random.randn(*particles.shape)
+        noise *= np.sqrt(dt) * np.array([motion_noise, motion_noise, accel_noise, accel_noise])
+        noise[..., :2] += particles[..., 2:] * dt
+        particles += noise
+
+        # Boundary collision
+        upper = np.array([self.canvas_size[1] - 1, self.canvas_size[0] - 1])
+        np.clip(particles[..., :2], 0, upper, out=particles[..., :2])
+        hit = (particles[..., :2] == 0) | (particles[..., :2] == upper)
+        particles[..., 2:][hit] *= -1
+        if not all_active:
+            self.particles[tracks] = particles
+
+    def _correct(self, tracks: np.ndarray, measurements: np.ndarray, accel_noise: float):
+        particles = self.particles[tracks]
+        sq_distances = np.sum((particles[..., :2] - measurements[:, None, :]) ** 2, axis=2)
+        weights = np.exp(-sq_distances / (2 * PARTICLE_SIGMA ** 2))
+
+        totals = weights.sum(axis=1, keepdims=True)
+        weights = np.where(totals > 0, weights / np.where(totals > 0, totals, 1), 1.0 / self.num_particles)
+
+        # Resample only the tracks whose effective sample size dropped too low.
+        effective_n = 1.0 / np.sum(weights ** 2, axis=1)
+        rows = np.flatnonzero(effective_n < self.num_particles * self.ess_threshold)
+        if len(rows) == 0:
+            return
+        indices = systematic_resample_batch(weights[rows])
+        resampled = np.take_along_axis(particles[rows], indices[..., None], axis=1)
+        resampled[..., 2:] += np.random.randn(len(rows), self.num_particles, 2) * accel_noise
+        self.particles[tracks[rows]] = resampled
+
+    def _spawn(self, track: int, point: np.ndarray):
+        self.particles[track, :, :2] = np.random.randn(self.num_particles, 2) * 20 + point
+        self.particles[track, :, 2:] = np.random.randn(self.num_particles, 2) * 5
+        self.active[track] = True
+        self.misses[track] = 0
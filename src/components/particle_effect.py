@@ -1,31 +1,48 @@
-import cv2
 import numpy as np
-import random
-from typing import Tuple, List, Dict
+from typing import Tuple
 
-class ParticleEffect:
+from src.utils.drawing import draw_disks
+
+class ParticleSystem:
     """
-    Creates a particle explosion effect for visual feedback on game events.
+    Fixed-capacity pool holding the particles of every explosion effect as contiguous
+    arrays. Effects claim free slots when emitted, all particles are stepped and drawn
+    in one vectorised pass per frame, and expired slots are reused by later effects.
     """
-    def __init__(self, position: np.ndarray, num_particles: int = 50):
-        self.particles: List[Dict] = []
-        for _ in range(num_particles):
-            angle = random.uniform(0, 2 * np.pi)
-            speed = random.uniform(2, 7)
-            velocity = np.array([speed * np.cos(angle), speed * np.sin(angle)], dtype=float)
-            self.particles.append({
-                "pos": position.astype(float).copy(),
-                "vel": velocity,
-                "lifetime": random.randint(20, 40)
-            })
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.positions = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocities = np.zeros((capacity, 2), dtype=np.float32)
+        self.lifetimes = np.zeros(capacity, dtype=np.int16)  # slots with lifetime <= 0 are free
+        self.colors = np.zeros((capacity, 3), dtype=np.uint8)
+
+    def emit(self, position: np.ndarray, color: Tuple[int, int, int], num_particles: int = 50):
+        """Starts an explosion at `position`. If the pool is nearly full, fewer particles are emitted."""
+        slots = np.flatnonzero(self.lifetimes <= 0)[:num_particles]
+        n = len(slots)
+        if n == 0:
+            return
+        angles = np.random.uniform(0, 2 * np.pi, n)
+        speeds = np.random.uniform(2, 7, n)
+        self.positions[slots] = position
+        self.velocities[slots, 0] = speeds * np.cos(angles)
+        self.velocities[slots, 1] = speeds * np.sin(angles)
+        self.lifetimes[slots] = np.random.randint(20, 41, n)
+        self.colors[slots] = color
+
+    def step(self):
+        """Moves every live particle by one simulation tick and reduces its lifetime."""
+        alive = np.flatnonzero(self.lifetimes > 0)
+        if len(alive) == 0:
+            return
+        self.positions[alive] += self.velocities[alive]
+        self.lifetimes[alive] -= 1
+
+    def draw(self, frame: np.ndarray):
+        alive = np.flatnonzero(self.lifetimes > 0)
+        if len(alive):
+            draw_disks(frame, self.positions[alive], self.colors[alive], 2)
 
-    def update_and_draw(self, frame: np.ndarray, color: Tuple[int, int, int]):
-        """Updates particle positions, reduces their lifetime, and draws them."""
-        for p in self.particles:
-            p["pos"] += p["vel"]
-            p["lifetime"] -= 1
-            if p["lifetime"] > 0:
-                cv2.circle(frame, (int(p["pos"][0]), int(p["pos"][1])), 2, color, -1)
-        
-        self.particles = [p for p in self.particles if p["lifetime"] > 0]
-        return len(self.particles) == 0
\ No newline at end of file
+    @property
+    def active_count(self) -> int:
+        return int(np.count_nonzero(self.lifetimes > 0))
@@ -3,7 +3,7 @@ import numpy as np
 import random
 from typing import Tuple
 
-from src.settings import COLORS
+from src.settings import COLORS, POWERUP_DURATION, SIMULATION_RATE
 
 class PowerUp:
     """
@@ -17,7 +17,7 @@ class PowerUp:
             random.randint(self.radius, canvas_size[0] - self.radius)
         ], dtype=int)
         self.type = "shield"
-        self.duration = 300  # in frames
+        self.duration = round(POWERUP_DURATION * SIMULATION_RATE)  # in simulation ticks
         self.color = COLORS["powerup_shield"]
 
     def draw(self, frame: np.ndarray):
@@ -1,7 +1,7 @@
 import cv2
 import numpy as np
 import random
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Optional
 
 from src.settings import COLORS
 
@@ -16,6 +16,15 @@ class Target:
         self.target_params = target_params
         self.color = COLORS["target_outline"]
         self.thickness = 3
+        self.vertices = self._triangle_vertices() if shape == "triangle" else None
+
+    def _triangle_vertices(self) -> np.ndarray:
+        pos = self.position.astype(int)
+        s = self.target_params["triangle"]["side"]
+        pt1 = (pos[0], pos[1] - int(s / np.sqrt(3)))
+        pt2 = (pos[0] - s // 2, pos[1] + int(s / (2 * np.sqrt(3))))
+        pt3 = (pos[0] + s // 2, pos[1] + int(s / (2 * np.sqrt(3))))
+        return np.array([pt1, pt2, pt3], np.int32)
 
     @staticmethod
     def create_targets(canvas_size: Tuple, target_params: Dict, shapes: List[str]) -> List['Target']:
@@ -50,47 +59,105 @@ class Target:
         if shape == "triangle": return target_params["triangle"]["side"]
         return 50
 
-    def draw(self, frame: np.ndarray):
+    def draw(self, frame: np.ndarray, color: Optional[Tuple[int, int, int]] = None):
+        """Draws the outline; `color` overrides the outline colour, e.g. to draw a coverage mask."""
+        color = color or self.color
         pos = self.position.astype(int)
         if self.shape == "circle":
             r = self.target_params["circle"]["radius"]
-            cv2.circle(frame, tuple(pos), r, self.color, self.thickness, cv2.LINE_AA)
+            cv2.circle(frame, tuple(pos), r, color, self.thickness, cv2.LINE_AA)
         elif self.shape == "square":
             s = self.target_params["square"]["side"]
             top_left = (pos[0] - s // 2, pos[1] - s // 2)
             bottom_right = (pos[0] + s // 2, pos[1] + s // 2)
-            cv2.rectangle(frame, top_left, bottom_right, self.color, self.thickness)
+            cv2.rectangle(frame, top_left, bottom_right, color, self.thickness)
         elif self.shape == "rectangle":
             w = self.target_params["rectangle"]["width"]
             h = self.target_params["rectangle"]["height"]
             top_left = (pos[0] - w // 2, pos[1] - h // 2)
             bottom_right = (pos[0] + w // 2, pos[1] + h // 2)
-            cv2.rectangle(frame, top_left, bottom_right, self.color, self.thickness)
+            cv2.rectangle(frame, top_left, bottom_right, color, self.thickness)
         elif self.shape == "triangle":
-            s = self.target_params["triangle"]["side"]
-            pt1 = (pos[0], pos[1] - int(s / np.sqrt(3)))
-            pt2 = (pos[0] - s // 2, pos[1] + int(s / (2 * np.sqrt(3))))
-            pt3 = (pos[0] + s // 2, pos[1] + int(s / (2 * np.sqrt(3))))
-            pts = np.array([pt1, pt2, pt3], np.int32)
-            cv2.polylines(frame, [pts], isClosed=True, color=self.color, thickness=self.thickness)
+            cv2.polylines(frame, [self.vertices], isClosed=True, color=color, thickness=self.thickness)
 
     def point_inside(self, point: np.ndarray) -> bool:
-        pos = self.position
+        return bool(self.contains(np.asarray(point, dtype=float)[None, :])[0])
+
+    def contains(self, points: np.ndarray) -> np.ndarray:
+        """Vectorised `point_inside` for an (N, 2) array of points."""
+        d = points - self.position
         if self.shape == "circle":
             r = self.target_params["circle"]["radius"]
-            return np.linalg.norm(point - pos) < r
+            return np.einsum("ij,ij->i", d, d) < r ** 2
         elif self.shape == "square":
             s = self.target_params["square"]["side"]
-            return (abs(point[0] - pos[0]) < s / 2) and (abs(point[1] - pos[1]) < s / 2)
+            return (np.abs(d[:, 0]) < s / 2) & (np.abs(d[:, 1]) < s / 2)
         elif self.shape == "rectangle":
             w = self.target_params["rectangle"]["width"]
             h = self.target_params["rectangle"]["height"]
-            return (abs(point[0] - pos[0]) < w / 2) and (abs(point[1] - pos[1]) < h / 2)
+            return (np.abs(d[:, 0]) < w / 2) & (np.abs(d[:, 1]) < h / 2)
         elif self.shape == "triangle":
-            s = self.target_params["triangle"]["side"]
-            pt1 = (pos[0], pos[1] - int(s / np.sqrt(3)))
-            pt2 = (pos[0] - s // 2, pos[1] + int(s / (2 * np.sqrt(3))))
-            pt3 = (pos[0] + s // 2, pos[1] + int(s / (2 * np.sqrt(3))))
-            pts = np.array([pt1, pt2, pt3], np.int32)
-            return cv2.pointPolygonTest(pts, (int(point[0]), int(point[1])), False) >= 0
-        return False
\ No newline at end of file
+            # Inside or on the edge, like cv2.pointPolygonTest(...) >= 0 on the truncated point.
+            p = points.astype(int)
+            a, b, c = self.vertices.astype(int)
+            def side(u, v):
+                return (v[0] - u[0]) * (p[:, 1] - u[1]) - (v[1] - u[1]) * (p[:, 0] - u[0])
+            s1, s2, s3 = side(a, b), side(b, c), side(c, a)
+            return ((s1 >= 0) & (s2 >= 0) & (s3 >= 0)) | ((s1 <= 0) & (s2 <= 0) & (s3 <= 0))
+        return np.zeros(len(points), dtype=bool)
+
+
+class TargetMap:
+    """
+    The target layout compiled into a canvas-sized label image holding, at each pixel,
+    1 + the index of the target covering it (0 for none). Hit tests become a single array
+    lookup, and whole batches of points (every particle, every player) can be tested at once.
+    Where targets overlap the earlier one wins, matching a first-hit loop over the list.
+    Pixels a target's edge passes through are labelled EDGE instead; points falling in them
+    are tested exactly with `Target.contains`, so lookups agree with `point_inside` on
+    sub-pixel positions too.
+    """
+    EDGE = 255
+
+    def __init__(self, targets: List[Target], canvas_size: Tuple[int, int, int]):
+        self.targets = targets
+        self.labels = np.zeros(canvas_size[:2], dtype=np.uint8)
+        edges = np.zeros(canvas_size[:2], dtype=np.uint8)
+        height, width = self.labels.shape
+        for index in reversed(range(len(targets))):
+            target = targets[index]
+            margin = Target.get_margin(target.shape, target.target_params) + 2
+            x0, y0 = np.maximum(target.position.astype(int) - margin, 0)
+            x1, y1 = np.minimum(target.position.astype(int) + margin + 1, (width, height))
+            if x0 >= x1 or y0 >= y1:
+                continue
+            # Test the pixel corners: the shapes are convex, so a pixel whose four corners are
+            # inside is covered whole, and one whose corners disagree is cut by the edge.
+            ys, xs = np.mgrid[y0:y1 + 1, x0:x1 + 1]
+            corners = target.contains(np.stack([xs.ravel(), ys.ravel()], axis=1).astype(float)).reshape(xs.shape)
+            inside = corners[:-1, :-1] & corners[1:, :-1] & corners[:-1, 1:] & corners[1:, 1:]
+            touched = corners[:-1, :-1] | corners[1:, :-1] | corners[:-1, 1:] | corners[1:, 1:]
+            self.labels[y0:y1, x0:x1][inside] = index + 1
+            edges[y0:y1, x0:x1] |= (touched & ~inside).view(np.uint8)
+        # The dilation also catches an edge that crosses a pixel between its corners.
+        self.labels[cv2.dilate(edges, np.ones((3, 3), np.uint8)) > 0] = self.EDGE
+
+    def bounding_boxes(self) -> np.ndarray:
+        """Returns the (targets, 4) [x0, y0, x1, y1] boxes enclosing each target."""
+        margins = np.array([Target.get_margin(t.shape, t.target_params) for t in self.targets], dtype=float)
+        positions = np.array([t.position for t in self.targets], dtype=float).reshape(-1, 2)
+        return np.hstack([positions - margins[:, None], positions + margins[:, None]])
+
+    def lookup(self, points: np.ndarray) -> np.ndarray:
+        """Returns, for an (N, 2) array of points, the index of the target hit by each (-1 for none)."""
+        pixels = np.floor(points).astype(int)
+        height, width = self.labels.shape
+        valid = (pixels[:, 0] >= 0) & (pixels[:, 0] < width) & (pixels[:, 1] >= 0) & (pixels[:, 1] < height)
+        result = np.full(len(pixels), -1)
+        result[valid] = self.labels[pixels[valid, 1], pixels[valid, 0]].astype(int) - 1
+        edge = np.flatnonzero(result == self.EDGE - 1)
+        if len(edge):
+            result[edge] = -1
+            for index in reversed(range(len(self.targets))):
+                result[edge[self.targets[index].contains(points[edge])]] = index
+        return result
@@ -0,0 +1,377 @@
+import abc
+import cv2
+import numpy as np
+from typing import Callable, Dict, Optional, Tuple
+
+from src.settings import (
+    PARTICLE_SIGMA, PARTICLE_VIS_MODE, PARTICLE_VIS_DECIMATION, PARTICLE_VIS_CELL, PARTICLE_VIS_COLOR,
+    RESAMPLING_SCHEME, RESAMPLE_ESS_THRESHOLD, ADAPTIVE_PARTICLES, PARTICLE_COMPACT_STATE,
+    KLD_MIN_PARTICLES, KLD_MAX_PARTICLES, KLD_BIN_SIZE, KLD_EPSILON, KLD_DELTA,
+    KALMAN_MEASUREMENT_NOISE, HYBRID_INNOVATION_GATE, HYBRID_MAX_MISSES, HYBRID_SETTLE_FRAMES
+)
+from src.utils.drawing import draw_disks
+from src.utils.resampling import get_resampler, kld_resample
+from src.utils.profiler import profiler
+from src.utils.scratch import ScratchBuffers
+
+# Spread of a freshly spawned track: 20 px in position, 5 px/tick in velocity.
+INITIAL_STD = np.array([20.0, 20.0, 5.0, 5.0])
+
+
+class Tracker(abc.ABC):
+    """
+    Estimator of the ball state [x, y, vx, vy], in pixels and pixels per simulation tick.
+    `predict` moves the state `dt` ticks ahead with per-tick noise figures that grow
+    with sqrt(dt); `update` corrects it with a measured position, or None if nothing
+    was detected. Both bounce the state off the canvas edges.
+    """
+    @abc.abstractmethod
+    def predict(self, dt: float, motion_noise: float, accel_noise: float):
+        ...
+
+    @abc.abstractmethod
+    def update(self, measurement: Optional[np.ndarray]):
+        ...
+
+    @abc.abstractmethod
+    def estimate(self) -> np.ndarray:
+        """
+        Returns the mean state [x, y, vx, vy] as a read-only float64 snapshot: later steps
+        do not change it, so callers (e.g. Ball.get_position, which returns a slice of it)
+        can keep it without copying. It is cached until the next step.
+        """
+
+    @abc.abstractmethod
+    def covariance(self) -> np.ndarray:
+        """Returns the 4x4 covariance of the state, as a read-only snapshot like `estimate`."""
+
+    @abc.abstractmethod
+    def reset(self, mean: np.ndarray, covariance: np.ndarray):
+        """Restarts the estimate from a Gaussian, e.g. when handing over from another tracker."""
+
+    def draw(self, frame: np.ndarray, mode: str = PARTICLE_VIS_MODE):
+        """Visualises the uncertainty of the estimate; nothing in mode "off"."""
+
+
+class ParticleTracker(Tracker):
+    """
+    Bootstrap particle filter. Resamples when the effective sample size drops below
+    `ess_threshold`, or with `adaptive` every step with KLD-sampling, which picks the
+    size of the new set: it grows while the cloud is spread out (occlusion,
+    re-acquisition) and shrinks while it is tight.
+
+    Every step works in place on buffers kept between frames: the noise, distances,
+    weights and collision masks, and two particle arrays that resampling alternates
+    between. With `compact` the particles are float32 and the noise is filled in by a
+    numpy Generator (seeded from the global generator, so seeded runs stay
+    reproducible); otherwise they are float64 and draw from the global generator as
+    before. The mean and covariance are computed at most once per step.
+    """
+    def __init__(self, canvas_size: Tuple[int, int, int], position: np.ndarray, num_particles: int,
+                 resampling_scheme: str = RESAMPLING_SCHEME, ess_threshold: float = RESAMPLE_ESS_THRESHOLD,
+                 adaptive: bool = ADAPTIVE_PARTICLES, sigma: float = PARTICLE_SIGMA,
+                 compact: bool = PARTICLE_COMPACT_STATE):
+        self.canvas_size = canvas_size
+        self.num_particles = num_particles
+        self.resample = get_resampler(resampling_scheme)
+        self.ess_threshold = ess_threshold
+        self.adaptive = adaptive
+        self.sigma = sigma
+        self.accel_noise = 0.0
+        self.dtype = np.float32 if compact else np.float64
+        self.rng = np.random.default_rng(np.random.randint(2 ** 31)) if compact else None
+        self.upper = np.array([canvas_size[1] - 1, canvas_size[0] - 1], dtype=self.dtype)
+        self.buffers = ScratchBuffers()
+        self.front, self.back = "particles.a", "particles.b"
+        self._mean: Optional[np.ndarray] = None
+        self._cov: Optional[np.ndarray] = None
+
+        self.particles = self.buffers.get(self.front, (num_particles, 4), self.dtype)
+        self.particles[:, :2] = self._normal("noise.position", (num_particles, 2)) * INITIAL_STD[:2] + position
+        self.particles[:, 2:] = self._normal("noise.velocity", (num_particles, 2)) * INITIAL_STD[2:]
+
+    def _normal(self, name: str, shape: Tuple[int, ...]) -> np.ndarray:
+        """Returns the buffer `name` filled with standard normal noise."""
+        out = self.buffers.get(name, shape, self.dtype)
+        if self.rng is not None:
+            self.rng.standard_normal(out=out, dtype=self.dtype)
+        else:
+            out[...] = np.random.randn(*shape)
+        return out
+
+    def predict(self, dt: float, motion_noise: float, accel_noise: float):
+        with profiler.section("filter.predict"):
+            n = self.num_particles
+            noise_scale = np.sqrt(dt)
+            self.accel_noise = accel_noise
+            position, velocity = self.particles[:, :2], self.particles[:, 2:]
+            step = np.multiply(velocity, dt, out=self.buffers.get("step", (n, 2), self.dtype))
+            position_noise = self._normal("noise.position", (n, 2))
+            position_noise *= motion_noise * noise_scale
+            step += position_noise
+            position += step
+            velocity_noise = self._normal("noise.velocity", (n, 2))
+            velocity_noise *= accel_noise * noise_scale
+            velocity += velocity_noise
+
+            # Boundary collision: particles on an edge bounce off it.
+            np.clip(position, 0, self.upper, out=position)
+            at_edge = np.equal(position, 0, out=self.buffers.get("edge", (n, 2), np.bool_))
+            at_far_edge = np.equal(position, self.upper, out=self.buffers.get("far_edge", (n, 2), np.bool_))
+            np.logical_or(at_edge, at_far_edge, out=at_edge)
+            np.negative(velocity, out=velocity, where=at_edge)
+            self._invalidate()
+
+    def update(self, measurement: Optional[np.ndarray]):
+        n = self.num_particles
+        weights = None
+        if measurement is not None:
+            with profiler.section("filter.weights"):
+                offsets = np.subtract(self.particles[:, :2], np.asarray(measurement, dtype=self.dtype),
+                                      out=self.buffers.get("offsets", (n, 2), self.dtype))
+                weights = self.buffers.get("weights", (n,), np.float64)
+                np.einsum("ij,ij->i", offsets, offsets, out=weights)
+                weights *= -1.0 / (2 * self.sigma ** 2)
+                np.exp(weights, out=weights)
+
+                total = weights.sum()
+                if total > 0:
+                    weights /= total
+                else:
+                    weights.fill(1.0 / n)
+
+        if self.adaptive:
+            if weights is None:
+                # No measurement: resample uniformly, only to resize the set to the drifting cloud.
+                weights = self.buffers.get("weights", (n,), np.float64)
+                weights.fill(1.0 / n)
+            with profiler.section("filter.resample"):
+                indices = kld_resample(weights, self.particles[:, :2], KLD_MIN_PARTICLES, KLD_MAX_PARTICLES,
+                                       KLD_BIN_SIZE, KLD_EPSILON, KLD_DELTA)
+                self._apply_resample(indices)
+        elif weights is not None:
+            effective_N = 1.0 / np.dot(weights, weights)
+            if effective_N < n * self.ess_threshold:
+                with profiler.section("filter.resample"):
+                    self._apply_resample(self.resample(weights, n))
+
+    def _apply_resample(self, indices: np.ndarray):
+        """Gathers the chosen particles into the back buffer, which then becomes the front one."""
+        resampled = self.buffers.get(self.back, (len(indices), 4), self.dtype)
+        np.take(self.particles, indices, axis=0, out=resampled)
+        self.front, self.back = self.back, self.front
+        self.particles = resampled
+        self.num_particles = len(indices)
+        velocity_noise = self._normal("noise.velocity", (self.num_particles, 2))
+        velocity_noise *= self.accel_noise
+        self.particles[:, 2:] += velocity_noise
+        self._invalidate()
+
+    def _invalidate(self):
+        self._mean = self._cov = None
+
+    def estimate(self) -> np.ndarray:
+        # Particles are equally weighted after every step (the weights are only used to
+        # resample), so this is also the weighted mean.
+        if self._mean is None:
+            self._mean = self.particles.mean(axis=0, dtype=np.float64)
+            self._mean.flags.writeable = False
+        return self._mean
+
+    def covariance(self) -> np.ndarray:
+        if self._cov is None:
+            self._cov = np.cov(self.particles, rowvar=False, ddof=0, dtype=np.float64)
+            self._cov.flags.writeable = False
+        return self._cov
+
+    def reset(self, mean: np.ndarray, covariance: np.ndarray):
+        # Draws from the Gaussian; the jitter keeps the Cholesky factorisation defined for a collapsed covariance.
+        factor = np.linalg.cholesky(covariance + np.eye(4) * 1e-6)
+        self.particles[...] = mean + self._normal("noise.reset", (self.num_particles, 4)) @ factor.T
+        self._invalidate()
+
+    def draw(self, frame: np.ndarray, mode: str = PARTICLE_VIS_MODE):
+        """Draws the particle cloud in a single vectorised pass."""
+        if mode == "points":
+            draw_disks(frame, self.particles[:, :2], PARTICLE_VIS_COLOR, 2)
+        elif mode == "decimated":
+            draw_disks(frame, self.particles[::PARTICLE_VIS_DECIMATION, :2], PARTICLE_VIS_COLOR, 2)
+        elif mode == "heatmap":
+            self._draw_heatmap(frame)
+
+    def _draw_heatmap(self, frame: np.ndarray):
+        """Blends a coarse particle-density heatmap into the cells occupied by the cloud."""
+        cell = PARTICLE_VIS_CELL
+        max_cell = (frame.shape[1] // cell - 1, frame.shape[0] // cell - 1)
+        cells = np.clip((self.particles[:, :2] // cell).astype(np.intp), 0, max_cell)
+        x0, y0 = cells.min(axis=0)
+        x1, y1 = cells.max(axis=0) + 1
+        grid_w, grid_h = x1 - x0, y1 - y0
+        counts = np.bincount((cells[:, 1] - y0) * grid_w + (cells[:, 0] - x0), minlength=grid_w * grid_h)
+        density = (counts * (255.0 / counts.max())).astype(np.uint8).reshape(grid_h, grid_w)
+        colors = cv2.applyColorMap(density, cv2.COLORMAP_JET)
+
+        # View the covered region as a grid of cell x cell blocks and blend only the occupied ones.
+        blocks = frame[y0 * cell:y1 * cell, x0 * cell:x1 * cell].reshape(grid_h, cell, grid_w, cell, 3)
+        ys, xs = np.nonzero(density)
+        blocks[ys, :, xs] = (blocks[ys, :, xs] >> 1) + (colors[ys, xs][:, None, None, :] >> 1)
+
+
+class KalmanTracker(Tracker):
+    """
+    Constant-velocity Kalman filter. The process noise adds `motion_noise` to the
+    position and `accel_noise` to the velocity per tick, as the particle filter's
+    prediction does; measurements are positions with `measurement_noise` pixels of
+    standard deviation. A few 4x4 matrix products per frame instead of hundreds of particles.
+    """
+    def __init__(self, canvas_size: Tuple[int, int, int], position: np.ndarray,
+                 measurement_noise: float = KALMAN_MEASUREMENT_NOISE):
+        self.canvas_size = canvas_size
+        self.measurement_noise = measurement_noise
+        self.state = np.array([position[0], position[1], 0.0, 0.0])
+        self.cov = np.diag(INITIAL_STD ** 2)
+        self._invalidate()
+
+    def predict(self, dt: float, motion_noise: float, accel_noise: float):
+        transition = np.eye(4)
+        transition[0, 2] = transition[1, 3] = dt
+        self.state = transition @ self.state
+        self.cov = transition @ self.cov @ transition.T + np.diag([motion_noise ** 2] * 2 + [accel_noise ** 2] * 2) * dt
+
+        upper = (self.canvas_size[1] - 1, self.canvas_size[0] - 1)
+        for axis in (0, 1):
+            if not 0 <= self.state[axis] <= upper[axis]:
+                self.state[axis] = np.clip(self.state[axis], 0, upper[axis])
+                self.state[axis + 2] *= -1
+        self._invalidate()
+
+    def innovation(self, measurement: np.ndarray) -> float:
+        """Returns the squared Mahalanobis distance of a measurement from the predicted position."""
+        residual = measurement - self.state[:2]
+        return float(residual @ np.linalg.solve(self._innovation_cov(), residual))
+
+    def update(self, measurement: Optional[np.ndarray]):
+        if measurement is None:
+            return
+        gain = self.cov[:, :2] @ np.linalg.inv(self._innovation_cov())
+        self.state = self.state + gain @ (measurement - self.state[:2])
+        self.cov = self.cov - gain @ self.cov[:2, :]
+        self._invalidate()
+
+    def _innovation_cov(self) -> np.ndarray:
+        return self.cov[:2, :2] + np.eye(2) * self.measurement_noise ** 2
+
+    def _invalidate(self):
+        self._mean = self._cov = None
+
+    def estimate(self) -> np.ndarray:
+        if self._mean is None:
+            self._mean = self.state.copy()
+            self._mean.flags.writeable = False
+        return self._mean
+
+    def covariance(self) -> np.ndarray:
+        if self._cov is None:
+            self._cov = self.cov.copy()
+            self._cov.flags.writeable = False
+        return self._cov
+
+    def reset(self, mean: np.ndarray, covariance: np.ndarray):
+        self.state = np.array(mean, dtype=float)
+        self.cov = np.array(covariance, dtype=float)
+        self._invalidate()
+
+    def draw(self, frame: np.ndarray, mode: str = PARTICLE_VIS_MODE):
+        """Draws the two-sigma ellipse of the position."""
+        if mode == "off":
+            return
+        eigenvalues, eigenvectors = np.linalg.eigh(self.cov[:2, :2])
+        axes = tuple(int(round(2 * np.sqrt(max(v, 0.0)))) for v in eigenvalues)
+        angle = float(np.degrees(np.arctan2(eigenvectors[1, 0], eigenvectors[0, 0])))
+        center = tuple(int(round(v)) for v in self.state[:2])
+        cv2.ellipse(frame, center, axes, angle, 0, 360, PARTICLE_VIS_COLOR, 2, cv2.LINE_AA)
+
+
+class HybridTracker(Tracker):
+    """
+    Runs the Kalman filter while measurements fit its Gaussian, and hands over to a
+    particle filter, seeded from the Kalman estimate, when they stop fitting: after more
+    than `max_misses` frames without a measurement, or on a measurement outside the
+    innovation `gate` (a jump the constant-velocity model cannot explain, e.g. the
+    detector switching between two red objects). The detector reports one position per
+    frame, so such jumps are the only sign of a multimodal posterior it gives. Once
+    `settle_frames` measurements in a row fall inside the same gate around the cloud's
+    mean and covariance, the Kalman filter takes over again from them.
+    """
+    def __init__(self, canvas_size: Tuple[int, int, int], position: np.ndarray, num_particles: int,
+                 gate: float = HYBRID_INNOVATION_GATE, max_misses: int = HYBRID_MAX_MISSES,
+                 settle_frames: int = HYBRID_SETTLE_FRAMES, **particle_options):
+        self.kalman = KalmanTracker(canvas_size, position)
+        self.particle_filter = ParticleTracker(canvas_size, position, num_particles, **particle_options)
+        self.gate = gate
+        self.max_misses = max_misses
+        self.settle_frames = settle_frames
+        self.using_particles = False
+        self.misses = 0
+        self.settled = 0
+        self.switches = 0
+
+    @property
+    def active(self) -> Tracker:
+        return self.particle_filter if self.using_particles else self.kalman
+
+    def predict(self, dt: float, motion_noise: float, accel_noise: float):
+        self.active.predict(dt, motion_noise, accel_noise)
+
+    def update(self, measurement: Optional[np.ndarray]):
+        if not self.using_particles:
+            self.misses = 0 if measurement is not None else self.misses + 1
+            if self.misses > self.max_misses or (measurement is not None and self.kalman.innovation(measurement) > self.gate):
+                self._switch(self.kalman, self.particle_filter)
+        self.active.update(measurement)
+
+        if self.using_particles:
+            self.settled = self.settled + 1 if measurement is not None and self._fits_cloud(measurement) else 0
+            if self.settled >= self.settle_frames:
+                self._switch(self.particle_filter, self.kalman)
+
+    def _fits_cloud(self, measurement: np.ndarray) -> bool:
+        residual = measurement - self.particle_filter.estimate()[:2]
+        spread = self.particle_filter.covariance()[:2, :2] + np.eye(2) * self.kalman.measurement_noise ** 2
+        return float(residual @ np.linalg.solve(spread, residual)) <= self.gate
+
+    def _switch(self, source: Tracker, target: Tracker):
+        target.reset(source.estimate(), source.covariance())
+        self.using_particles = target is self.particle_filter
+        self.misses = self.settled = 0
+        self.switches += 1
+
+    def estimate(self) -> np.ndarray:
+        return self.active.estimate()
+
+    def covariance(self) -> np.ndarray:
+        return self.active.covariance()
+
+    def reset(self, mean: np.ndarray, covariance: np.ndarray):
+        self.kalman.reset(mean, covariance)
+        self.using_particles = False
+
+    def draw(self, frame: np.ndarray, mode: str = PARTICLE_VIS_MODE):
+        self.active.draw(frame, mode)
+
+
+TRACKERS: Dict[str, Callable[..., Tracker]] = {
+    "particle": ParticleTracker,
+    "kalman": lambda canvas_size, position, num_particles, **_: KalmanTracker(canvas_size, position),
+    "hybrid": HybridTracker,
+}
+
+
+def create_tracker(name: str, canvas_size: Tuple[int, int, int], position: np.ndarray, num_particles: int,
+                   **particle_options) -> Tracker:
+    """Builds a tracker backend by name; the Kalman filter ignores the particle filter options."""
+    try:
+        factory = TRACKERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown tracker backend '{name}', expected one of {sorted(TRACKERS)}") from None
+    return factory(canvas_size, position, num_particles, **particle_options)
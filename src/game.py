@@ -1,31 +1,87 @@
 import cv2
-import pygame
 import logging
 import random
+import threading
 import numpy as np
-from typing import Optional, List, Tuple
+from typing import Callable, NamedTuple, Optional, List, Tuple, Union
 
 from src.settings import *
 from src.components.ball import Ball
-from src.components.target import Target
+from src.components.target import Target, TargetMap
 from src.components.obstacle import Obstacle
 from src.components.powerup import PowerUp
-from src.components.particle_effect import ParticleEffect
+from src.components.collision_world import CollisionWorld
+from src.components.particle_effect import ParticleSystem
 from src.utils.red_object_detector import RedObjectDetector
+from src.utils.pipeline import LatestFrameQueue, PipelineStage
+from src.utils.sound_bank import NullSoundBank, create_sound_bank
+from src.utils.frame_source import FrameSource, CameraSource
+from src.utils.display import OpenCVDisplay
+from src.utils.seeding import seed_everything
+from src.utils.profiler import profiler
+from src.utils.layers import LayerStack, Sprite
+from src.utils.recorder import NullRecorder, SessionRecorder
+from src.utils.clock import FixedTimestepClock
+from src.utils.startup import StartupTimer, run_concurrently
+
+FRAME_STAGES = ["capture", "detect", "update", "collisions", "render", "present"]
+
+
+class TrackingSnapshot(NamedTuple):
+    """
+    What detection needs from the tracker, published whole by the simulation after every
+    update. Detection reads only this, never the ball, so in the pipelined loop it cannot
+    see a half-updated tracker. The arrays are never written after publishing.
+    """
+    detection_hint: Optional[Tuple[np.ndarray, np.ndarray]]  # predicted position and spread, for ROI detection
+    velocity: np.ndarray  # pixels per tick
+
 
 class Game:
     """
     Main game controller class that manages the game loop, state, and rendering.
     """
-    def __init__(self, **sound_paths):
+    def __init__(self, source: Union[FrameSource, Callable[[], FrameSource], None] = None, display=None,
+                 seed: Optional[int] = None, audio: bool = True, fast_startup: bool = False,
+                 launch_time: Optional[float] = None, tracker: str = TRACKER_BACKEND, **sound_paths):
+        """
+        `source` defaults to the webcam and `display` to an OpenCV window; pass a recorded
+        or synthetic source and a NullDisplay to run headless. `source` may also be a
+        function that opens one. `seed` makes the run reproducible, and `audio=False`
+        skips the mixer entirely.
+
+        With `fast_startup` a "warming up" screen is shown as soon as the window exists,
+        the source, the audio and the detector are set up concurrently behind it, and the
+        first STARTUP_WARMUP_FRAMES frames only seed the detector's motion model.
+        Startup milestones are measured from `launch_time`, a time.perf_counter() value.
+        `tracker` names the backend estimating the ball's state (see src/components/trackers.py).
+        """
         self._setup_logging()
-        self._init_pygame_mixer()
-        
-        self.cap = cv2.VideoCapture(0)
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, WIDTH)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, HEIGHT)
-        
-        self.detector = RedObjectDetector()
+        self.startup = StartupTimer(launch_time)
+        if seed is not None:
+            seed_everything(seed)
+        self.display = display if display is not None else OpenCVDisplay(WINDOW_NAME)
+        self._warming_up_frame = None
+        self.tracker_backend = tracker
+
+        if source is None:
+            open_source = lambda: CameraSource(0, WIDTH, HEIGHT)
+        elif callable(source):
+            open_source = source
+        else:
+            open_source = lambda: source
+        tasks = {"source": open_source, "audio": lambda: self._create_sound_bank(audio), "detector": RedObjectDetector}
+        if fast_startup:
+            self._show_warming_up()
+            resources = run_concurrently(tasks, self.startup, self._show_warming_up)
+        else:
+            resources = {name: self.startup.timed(name, task) for name, task in tasks.items()}
+        self.cap = resources["source"]
+        self.sound_bank = resources["audio"]
+        self.detector = resources["detector"]
+
+        self.recorder = SessionRecorder(RECORDING_DIR, RECORDING_SECONDS, RECORDING_FPS, RECORDING_SCALE,
+                                        (WIDTH, HEIGHT), RECORDING_ENCODE) if RECORDING_ENABLED else NullRecorder()
         
         self.score = 0
         self.hearts = 15
@@ -34,118 +90,281 @@ class Game:
         self.combo_multiplier = 1
         self.shield_active = False
         self.shield_timer = 0
-        self.frame_counter = 0
+        self.tick_counter = 0
         self.last_heart_threshold = 0
+        self.clock = FixedTimestepClock(SIMULATION_RATE, SIMULATION_MAX_TICKS)
+        self.powerup_spawn_ticks = max(1, round(POWERUP_SPAWN_INTERVAL * SIMULATION_RATE))
         
-        self.effects: List[ParticleEffect] = []
-        self.effect_colors: List[Tuple[int,int,int]] = []
+        self.tracking = TrackingSnapshot(None, np.zeros(2))
+        self.effects = ParticleSystem(PARTICLE_POOL_CAPACITY)
+        # Target outlines and HUD text only change on events, so they are cached as layers.
+        self.layers = LayerStack(CANVAS_SIZE)
+        self.world = CollisionWorld(CANVAS_SIZE)
         
         self._reset_game_elements()
+        if fast_startup:
+            self._warm_up(STARTUP_WARMUP_FRAMES)
 
     def _setup_logging(self):
         logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
         self.logger = logging.getLogger(__name__)
 
-    def _init_pygame_mixer(self) -> dict:
-        try:
-            pygame.mixer.init()
-            self.logger.info("Pygame mixer initialized successfully.")
-        except pygame.error as e:
-            self.logger.error(f"Pygame mixer could not be initialized: {e}")
-           
+    def _create_sound_bank(self, audio: bool):
+        if audio:
+            return create_sound_bank(SOUNDS, SOUND_CHANNELS, SOUND_COOLDOWN_MS, SOUND_PRIORITIES)
+        return NullSoundBank()
+
+    def _show_warming_up(self, frame: Optional[np.ndarray] = None):
+        """Shows the "warming up" banner, over `frame` or a blank screen; also keeps the window responsive."""
+        if frame is None:
+            if self._warming_up_frame is None:
+                self._warming_up_frame = np.zeros(CANVAS_SIZE, dtype=np.uint8)
+            frame = self._warming_up_frame
+        text = "Warming up..."
+        text_size = cv2.getTextSize(text, UI_TEXT_FONT, 2, 3)[0]
+        cv2.putText(frame, text, ((WIDTH - text_size[0]) // 2, (HEIGHT + text_size[1]) // 2),
+                    UI_TEXT_FONT, 2, UI_COLORS["warming_up"], 3)
+        self.display.show(frame)
+        self.startup.mark("window")
+
+    def _warm_up(self, num_frames: int):
+        """Shows the first frames under the warming-up banner and only uses them to seed the motion model."""
+        for _ in range(num_frames):
+            if not self.cap.isOpened():
+                break
+            ret, frame = self.cap.read()
+            if not ret:
+                break
+            if not self.cap.mirrored:
+                cv2.flip(frame, 1, dst=frame)
+            if not self.cap.detects:
+                self.detector.learn_background(frame)
+            self.startup.mark("first camera frame")
+            self._show_warming_up(frame)
 
     def _play_sound(self, name: str):
-        pygame.mixer.Sound.play(pygame.mixer.Sound(SOUNDS[name])) if name in SOUNDS else self.logger.warning(f"Sound '{name}' is not available or failed to load.")
-            
-    # In src/game.py
+        self.sound_bank.play(name)
 
     def _reset_game_elements(self):
-        self.ball = Ball(CANVAS_SIZE, BALL_PARAMS, SHAPES, NUM_PARTICLES)
         self.targets = Target.create_targets(CANVAS_SIZE, TARGET_PARAMS, SHAPES)
-        self.obstacles = [Obstacle(CANVAS_SIZE, self.level) for _ in range(3)]
-        self.powerups: List[PowerUp] = []
+        self.target_map = TargetMap(self.targets, CANVAS_SIZE)
+        self.world.set_targets(self.target_map)
+        self.world.set_obstacles([Obstacle(CANVAS_SIZE, self.level) for _ in range(3)])
+        self.world.clear_powerups()
+        self.tracking = self.tracking._replace(detection_hint=None)
+        self.untested_positions = []
+        self.layers.set("targets", Sprite.from_drawing(
+            CANVAS_SIZE, (0, 0), (WIDTH, HEIGHT),
+            lambda image, color: [target.draw(image, color) for target in self.targets]))
 
-        # This loop ensures the ball doesn't spawn inside an obstacle.
-        while True:
-            # Create a new ball at a random position
-            self.ball = Ball(CANVAS_SIZE, BALL_PARAMS, SHAPES, NUM_PARTICLES)
-            
-            # Check if the new ball's starting position is colliding with any obstacle
-            is_colliding = any(obs.collides_with(self.ball) for obs in self.obstacles)
-            
-            # If it's not colliding, we found a safe spot, so we can exit the loop
-            if not is_colliding:
-                break
+        # Spawn the ball directly in free space, clear of obstacles and targets.
+        shape = random.choice(SHAPES)
+        position = self.world.sample_free_position(Ball.get_margin(shape, BALL_PARAMS), SPAWN_CLEARANCE)
+        self.ball = Ball(CANVAS_SIZE, BALL_PARAMS, SHAPES, NUM_PARTICLES, shape=shape, position=position,
+                         tracker=self.tracker_backend)
 
     def run(self):
         """Main game loop."""
-        while self.cap.isOpened():
+        if PIPELINED_MODE:
+            self._run_pipelined()
+        else:
+            self._run_serial()
+        self._cleanup()
+
+    def _capture(self) -> Optional[Tuple[np.ndarray, float]]:
+        """Reads and mirrors the next frame and returns it with its capture time, or None when the source is exhausted."""
+        with profiler.section("capture"):
+            if not self.cap.isOpened():
+                return None
             ret, frame = self.cap.read()
             if not ret:
-                break
-            frame = cv2.flip(frame, 1)
-            self.frame_counter += 1
+                return None
+            if not self.cap.mirrored:
+                # Sources hand over a frame the caller owns, so it is mirrored in place.
+                cv2.flip(frame, 1, dst=frame)
+            timestamp = self.cap.frame_time()
+            self.recorder.record("camera", frame, timestamp)
+            return frame, timestamp
 
-            measurement = self.detector.detect(frame)
-            self._update_game_state(measurement)
-            self._check_collisions_and_events()
+    def _detect(self, frame: np.ndarray) -> Optional[np.ndarray]:
+        tracking = self.tracking
+        with profiler.section("detect"):
+            if self.cap.detects:
+                return self.cap.measurement(tracking.velocity * SIMULATION_RATE)
+            return self.detector.detect(frame, tracking.detection_hint)
+
+    def _simulate(self, frame: np.ndarray, measurement: Optional[np.ndarray], timestamp: float):
+        """
+        Advances the game to the frame's capture time (seconds) and renders it into `frame`.
+        The tracker predicts over the time elapsed since the previous frame; everything else
+        runs in fixed ticks of the simulation clock, so the gameplay speed does not depend
+        on the camera or render frame rate. Collisions are checked once per tick; the ball
+        positions of frames that run no tick are kept and tested along with the next one.
+        """
+        ticks = self.clock.advance(timestamp)
+        with profiler.section("update"):
+            self._update_tracker(measurement, min(self.clock.elapsed, SIMULATION_MAX_TICKS))
+            for _ in range(ticks):
+                self._tick()
+                if self.hearts <= 0:
+                    break
+            if ticks == 0:
+                self.untested_positions.append(self.ball.get_position())
+        with profiler.section("render"):
             self._render(frame)
 
-            if cv2.waitKey(1) & 0xFF == ord('q'):
+    def _run_serial(self):
+        while True:
+            captured = self._capture()
+            if captured is None:
+                break
+
+            frame, timestamp = captured
+            measurement = self._detect(frame)
+            self._simulate(frame, measurement, timestamp)
+
+            quit_requested = self._present(frame, timestamp)
+            profiler.end_frame()
+            if quit_requested:
                 break
             
             if self.hearts <= 0:
                 self._game_over_screen(frame)
                 break
 
-        self._cleanup()
+    def _run_pipelined(self):
+        """
+        Runs capture, detection and simulation/rendering on their own threads so that
+        detection of frame N overlaps with the simulation and rendering of frame N-1.
+        Presentation stays on the main thread, as required by the OpenCV window.
+        """
+        stop_event = threading.Event()
+        captured = LatestFrameQueue("captured", PIPELINE_QUEUE_SIZE)
+        detected = LatestFrameQueue("detected", PIPELINE_QUEUE_SIZE)
+        rendered = LatestFrameQueue("rendered", PIPELINE_QUEUE_SIZE)
+
+        def capture(_):
+            return self._capture()
+
+        def detect(captured):
+            frame, timestamp = captured
+            return frame, self._detect(frame), timestamp
+
+        def simulate(item):
+            self._simulate(*item)
+            return item[0], item[2]
+
+        self.pipeline_stages = [
+            PipelineStage("capture", capture, None, captured, stop_event),
+            PipelineStage("detect", detect, captured, detected, stop_event),
+            PipelineStage("simulate", simulate, detected, rendered, stop_event),
+        ]
+        self.pipeline_queues = [captured, detected, rendered]
+        for stage in self.pipeline_stages:
+            stage.start()
+
+        last_frame = None
+        self.presented_frames = 0
+        while not stop_event.is_set():
+            item = rendered.get(timeout=0.1)
+            if item is None:
+                if rendered.closed:
+                    break
+                continue
+            frame, timestamp = item
+            last_frame = frame
+            self.presented_frames += 1
+            quit_requested = self._present(frame, timestamp)
+            profiler.end_frame()
+            if quit_requested or self.hearts <= 0:
+                break
+            if self.presented_frames % PIPELINE_STATS_INTERVAL == 0:
+                self._log_pipeline_stats()
+
+        stop_event.set()
+        for queue in self.pipeline_queues:
+            queue.close()
+        for stage in self.pipeline_stages:
+            stage.join(timeout=1.0)
+            if stage.error is not None:
+                self.logger.error(f"Pipeline stage '{stage.name}' failed: {stage.error!r}")
+        self._log_pipeline_stats()
 
-    def _update_game_state(self, measurement: Optional[np.ndarray]):
-        self.ball.update(measurement, MOTION_NOISE, ACCELERATION_NOISE)
-        for obs in self.obstacles:
-            obs.update()
+        if self.hearts <= 0 and last_frame is not None:
+            self._game_over_screen(last_frame)
+
+    def pipeline_stats(self) -> dict:
+        """Returns per-stage throughput, queue depth and drop counts of the pipelined loop."""
+        stats = {stage.name: stage.stats() for stage in getattr(self, "pipeline_stages", [])}
+        if stats:
+            rendered = self.pipeline_queues[-1]
+            stats["present"] = {
+                "processed": self.presented_frames,
+                "input_depth": rendered.depth,
+                "input_max_depth": rendered.max_depth,
+            }
+        return stats
+
+    def _log_pipeline_stats(self):
+        for name, stats in self.pipeline_stats().items():
+            details = ", ".join(f"{k}={v:.2f}" if isinstance(v, float) else f"{k}={v}" for k, v in stats.items())
+            self.logger.info(f"Pipeline [{name}] {details}")
+
+    def _update_tracker(self, measurement: Optional[np.ndarray], dt: float):
+        """Updates the ball's filter with a measurement taken `dt` ticks after the previous one."""
+        with profiler.section("update.tracker"):
+            self.ball.update(measurement, MOTION_NOISE, ACCELERATION_NOISE, dt)
+        velocity = self.ball.get_velocity()
+        hint = None
+        if ROI_DETECTION:
+            # Where the tracker expects the object in the next frame, assuming the same frame interval.
+            hint = (self.ball.get_position() + velocity * dt, self.ball.get_spread())
+        self.tracking = TrackingSnapshot(hint, velocity)
+
+    def _tick(self):
+        """Advances the game logic by one fixed simulation tick."""
+        self.tick_counter += 1
+        self.world.step()
+        self.effects.step()
 
         if self.shield_active:
             self.shield_timer -= 1
             if self.shield_timer <= 0:
                 self.shield_active = False
 
-        if self.frame_counter % 500 == 0 and random.random() < 0.5:
-            self.powerups.append(PowerUp(CANVAS_SIZE))
+        if self.tick_counter % self.powerup_spawn_ticks == 0 and random.random() < 0.5:
+            self.world.add_powerup(PowerUp(CANVAS_SIZE))
+
+        with profiler.section("collisions"):
+            self._check_collisions_and_events()
             
     def _check_collisions_and_events(self):
-        ball_pos = self.ball.get_position()
-        event_triggered = False
+        # The current position and those of the frames since the last tick. A tick applies at
+        # most one obstacle penalty and one target hit, so their rate does not follow the frame rate.
+        positions = np.array(self.untested_positions + [self.ball.get_position()])
+        self.untested_positions = []
+        contacts = self.world.collide(positions, np.full(len(positions), self.ball.get_radius()))
 
         # Power-up collision
-        for powerup in self.powerups[:]:
-            if np.linalg.norm(ball_pos - powerup.position) < (self.ball.get_radius() + powerup.radius):
-                self.shield_active = True
-                self.shield_timer = powerup.duration
-                self.powerups.remove(powerup)
-                self._play_sound("powerup")
-                self.effects.append(ParticleEffect(powerup.position))
-                self.effect_colors.append(COLORS["effect_powerup"])
+        for powerup in self.world.take_powerups(contacts.powerups.any(axis=0)):
+            self.shield_active = True
+            self.shield_timer = powerup.duration
+            self._play_sound("powerup")
+            self.effects.emit(powerup.position, COLORS["effect_powerup"])
                 
         # Obstacle collision
-        for obs in self.obstacles:
-            if obs.collides_with(self.ball):
-                self._handle_penalty(ball_pos)
-                event_triggered = True
-                break
-        if event_triggered: return
+        if contacts.obstacle.any():
+            self._handle_penalty(positions[np.argmax(contacts.obstacle)])
+            return
 
         # Target collision
-        for target in self.targets:
-            if target.point_inside(ball_pos):
-                if self.ball.shape == target.shape:
-                    self._handle_success(target.position)
-                else:
-                    self._handle_penalty(target.position)
-                event_triggered = True
-                break
-        
-        if event_triggered:
+        hits = np.flatnonzero(contacts.target >= 0)
+        if len(hits):
+            target = self.targets[contacts.target[hits[0]]]
+            if self.ball.shape == target.shape:
+                self._handle_success(target.position)
+            else:
+                self._handle_penalty(target.position)
             self._check_level_up()
             self._reset_game_elements()
             
@@ -156,8 +375,7 @@ class Game:
         self._play_sound("score")
         if self.combo_counter > 0 and self.combo_counter % 3 == 0:
              self._play_sound("combo")
-        self.effects.append(ParticleEffect(position))
-        self.effect_colors.append(COLORS["effect_success"])
+        self.effects.emit(position, COLORS["effect_success"])
         
     def _handle_penalty(self, position: np.ndarray):
         if not self.shield_active:
@@ -166,8 +384,7 @@ class Game:
         self.shield_active = False
         self.combo_counter = 0
         self.combo_multiplier = 1
-        self.effects.append(ParticleEffect(position))
-        self.effect_colors.append(COLORS["effect_fail"])
+        self.effects.emit(position, COLORS["effect_fail"])
         
     def _check_level_up(self):
         new_level = self.score // 5 + 1
@@ -176,37 +393,43 @@ class Game:
             self._play_sound("levelup")
             
     def _render(self, frame: np.ndarray):
-        for target in self.targets: target.draw(frame)
-        self.ball.draw(frame)
-        for obs in self.obstacles: obs.draw(frame)
-        for powerup in self.powerups: powerup.draw(frame)
+        with profiler.section("render.layers"):
+            self._update_hud()
+            self.layers.composite(frame)
+        with profiler.section("render.ball"):
+            self.ball.draw(frame)
+        with profiler.section("render.objects"):
+            # Obstacles are drawn between their last two ticks, matching the frame's time.
+            positions = self.world.obstacle_positions_at(self.clock.alpha)
+            for obs, position in zip(self.world.obstacles, positions): obs.draw(frame, position)
+            for powerup in self.world.powerups: powerup.draw(frame)
         
-        active_effects = []
-        active_colors = []
-        # Iterate through the effects and their corresponding colors
-        for i, effect in enumerate(self.effects):
-            # update_and_draw returns True if the effect is finished
-            is_finished = effect.update_and_draw(frame, self.effect_colors[i])
-            
-            # Keep the effect and its color only if it's not finished
-            if not is_finished:
-                active_effects.append(effect)
-                active_colors.append(self.effect_colors[i])
-
-        # Replace the old lists with the new lists of active effects
-        self.effects = active_effects
-        self.effect_colors = active_colors
+        with profiler.section("render.effects"):
+            self.effects.draw(frame)
         
-        self._draw_ui(frame)
-        cv2.imshow("Shape Matching Game", frame)
-
-    def _draw_ui(self, frame: np.ndarray):
-        cv2.putText(frame, f"Score: {self.score}", (50, 50), UI_TEXT_FONT, UI_TEXT_SCALE, UI_COLORS["score"], UI_TEXT_THICKNESS)
-        cv2.putText(frame, f"Hearts: {self.hearts}", (50, 100), UI_TEXT_FONT, UI_TEXT_SCALE, UI_COLORS["hearts"], UI_TEXT_THICKNESS)
-        cv2.putText(frame, f"Level: {self.level}", (50, 150), UI_TEXT_FONT, UI_TEXT_SCALE, UI_COLORS["level"], UI_TEXT_THICKNESS)
-        cv2.putText(frame, f"Combo: x{self.combo_multiplier}", (50, 200), UI_TEXT_FONT, UI_TEXT_SCALE, UI_COLORS["combo"], UI_TEXT_THICKNESS)
-        if self.shield_active:
-            cv2.putText(frame, "Shield Active", (50, 250), UI_TEXT_FONT, UI_TEXT_SCALE, UI_COLORS["shield"], UI_TEXT_THICKNESS)
+        if PROFILER_OVERLAY and profiler.enabled:
+            profiler.draw_overlay(frame, (300, 40), FRAME_STAGES)
+
+    def _present(self, frame: np.ndarray, timestamp: float) -> bool:
+        """Shows the frame rendered for capture time `timestamp` and returns True if the player asked to quit."""
+        with profiler.section("present"):
+            self.recorder.record("game", frame, timestamp)
+            quit_requested = self.display.show(frame)
+        if self.startup.mark("first game frame"):
+            self.logger.info(f"Startup: {self.startup.summary()}")
+        return quit_requested
+
+    def _update_hud(self):
+        """Refreshes the HUD text layers; only lines whose value changed are re-rasterised."""
+        lines = [
+            ("score", f"Score: {self.score}", 50),
+            ("hearts", f"Hearts: {self.hearts}", 100),
+            ("level", f"Level: {self.level}", 150),
+            ("combo", f"Combo: x{self.combo_multiplier}", 200),
+            ("shield", "Shield Active" if self.shield_active else None, 250),
+        ]
+        for name, text, y in lines:
+            self.layers.set_text(name, text, (50, y), UI_COLORS[name], UI_TEXT_FONT, UI_TEXT_SCALE, UI_TEXT_THICKNESS)
             
     def _game_over_screen(self, frame: np.ndarray):
         text = "GAME OVER"
@@ -214,10 +437,14 @@ class Game:
         text_x = (WIDTH - text_size[0]) // 2
         text_y = (HEIGHT + text_size[1]) // 2
         cv2.putText(frame, text, (text_x, text_y), UI_TEXT_FONT, 2, UI_COLORS["game_over"], 4)
-        cv2.imshow("Shape Matching Game", frame)
-        cv2.waitKey(3000)
+        self.recorder.instant_replay("game", REPLAY_SECONDS)
+        self.display.hold(frame, 3000)
 
     def _cleanup(self):
+        if profiler.enabled and PROFILER_TRACE_PATH:
+            profiler.export(PROFILER_TRACE_PATH)
+            self.logger.info(f"Profiler trace written to {PROFILER_TRACE_PATH}")
         self.cap.release()
-        cv2.destroyAllWindows()
-        pygame.mixer.quit()
\ No newline at end of file
+        self.recorder.close()
+        self.display.close()
+        self.sound_bank.close()
\ No newline at end of file
@@ -1,9 +1,12 @@
 import numpy as np
 import os
 
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 # Screen Dimensions
 WIDTH, HEIGHT = 1280, 720
 CANVAS_SIZE = (HEIGHT, WIDTH, 3)
+WINDOW_NAME = "Shape Matching Game"
 
 # Colors (BGR format for OpenCV)
 COLORS = {
@@ -27,14 +30,70 @@ UI_COLORS = {
     "level": (130, 0, 75),
     "combo": (130, 0, 75),
     "shield": (0, 255, 0),
-    "game_over": (0, 0, 255)
+    "game_over": (0, 0, 255),
+    "warming_up": (255, 255, 255)
 }
 
+# Tracker Settings
+TRACKER_BACKEND = "particle"  # "particle", "kalman" (constant-velocity Kalman filter) or "hybrid" (Kalman, particles when in doubt)
+KALMAN_MEASUREMENT_NOISE = 8.0  # standard deviation (pixels) of a detected tip position
+HYBRID_INNOVATION_GATE = 13.8  # squared Mahalanobis distance (chi-square, 2 dof, 99.9%) above which a measurement is a jump
+HYBRID_MAX_MISSES = 5  # frames without a measurement the Kalman filter coasts before the particles take over
+HYBRID_SETTLE_FRAMES = 10  # consecutive measurements inside the gate of the cloud before the Kalman filter takes over again
+
 # Particle Filter Settings
 NUM_PARTICLES = 300
 MOTION_NOISE = 10
 ACCELERATION_NOISE = 2
 PARTICLE_SIGMA = 50.0
+RESAMPLING_SCHEME = "systematic"  # "systematic", "stratified", "residual" or "multinomial"
+RESAMPLE_ESS_THRESHOLD = 0.5  # resample when the effective sample size drops below this fraction of the particles
+PARTICLE_COMPACT_STATE = False  # float32 particles and in-place Generator noise; False keeps float64 and the global RNG stream
+ADAPTIVE_PARTICLES = False  # size the particle set every frame with KLD-sampling instead of NUM_PARTICLES
+KLD_MIN_PARTICLES = 100
+KLD_MAX_PARTICLES = 1000
+KLD_BIN_SIZE = 40.0  # histogram cell (pixels) used to measure how spread out the cloud is
+KLD_EPSILON = 0.15  # allowed KL divergence between the sample and the true posterior
+KLD_DELTA = 0.01  # probability of exceeding KLD_EPSILON
+
+# Particle Cloud Visualisation
+PARTICLE_VIS_MODE = "points"  # "off", "points", "decimated" or "heatmap"
+PARTICLE_VIS_DECIMATION = 4  # draw every n-th particle in "decimated" mode
+PARTICLE_VIS_CELL = 8  # heatmap cell size in pixels
+PARTICLE_VIS_COLOR = (100, 0, 0)
+
+# Frame Pipeline Settings
+PIPELINED_MODE = False  # run capture, detection and presentation on separate stages
+PIPELINE_QUEUE_SIZE = 1  # frames buffered between stages; the oldest is dropped when full
+PIPELINE_STATS_INTERVAL = 300  # presented frames between pipeline stats log lines
+
+# Startup Settings
+FAST_STARTUP = True  # main.py: set up the camera, audio and detector concurrently behind a "warming up" screen
+STARTUP_WARMUP_FRAMES = 10  # first camera frames of a fast startup, only used to seed the motion model
+
+# Simulation Clock Settings
+SIMULATION_RATE = 30.0  # game logic ticks per second, independent of the camera and render frame rate
+SIMULATION_MAX_TICKS = 5  # ticks run at most per frame; after a longer stall the game slows down instead
+SOURCE_FRAME_RATE = 30.0  # timestamps of recorded sources that do not report their own frame rate
+OBSTACLE_SPEED = 90.0  # pixels per second at level 1, +20% per level
+POWERUP_DURATION = 10.0  # seconds a shield lasts
+POWERUP_SPAWN_INTERVAL = 500 / 30  # seconds between chances (50%) of a power-up appearing
+
+# Particle Effect Settings
+PARTICLE_POOL_CAPACITY = 2000  # particles shared by all explosion effects alive at once
+
+# Profiling Settings
+PROFILER_ENABLED = False  # time every frame stage and sub-step
+PROFILER_OVERLAY = False  # draw per-stage latency histograms next to the score text
+PROFILER_WINDOW = 300  # samples per stage kept for the rolling statistics
+PROFILER_TRACE_CAPACITY = 200000  # most recent trace events kept for export
+PROFILER_TRACE_PATH = None  # written on exit; "*.json" for Chrome trace, anything else for CSV
+
+# Collision Settings
+COLLISION_GRID_CELL = 128  # broad-phase grid cell size in pixels
+COLLISION_GRID_THRESHOLD = 10000  # (ball, object) pairs per test above which the grid broad phase is used
+SPAWN_CLEARANCE = 30  # minimum distance (pixels) between a spawned ball and any obstacle or target
+SPAWN_GRID_CELL = 8  # resolution (pixels) of the free-space grid the ball spawn is sampled from
 
 # Game Object Shapes
 SHAPES = ["circle", "square", "triangle", "rectangle"]
@@ -59,12 +118,65 @@ RED_UPPER1 = np.array([10, 255, 255])
 RED_LOWER2 = np.array([170, 120, 70])
 RED_UPPER2 = np.array([180, 255, 255])
 
+# Colour Classification Settings
+COLOR_LUT = True  # classify red pixels with a precompiled lookup table instead of HSV conversion
+COLOR_LUT_BITS = 8  # bits per BGR channel of the table; 8 is exact, fewer gives a smaller cache
+COLOR_LUT_CACHE_DIR = os.path.join(ROOT_DIR, ".cache")
+
+# Motion Segmentation Settings
+MOTION_BACKEND = "mog2"  # "mog2", "mog2_noshadow", "knn", "running_average", "frame_difference", "mog2_subsampled" or "none"
+MOTION_DIFF_THRESHOLD = 25  # grey-level change counted as motion by "running_average" and "frame_difference"
+MOTION_AVERAGE_RATE = 0.05  # background learning rate of "running_average"
+MOTION_KNN_THRESHOLD = 400.0  # squared distance threshold of "knn"
+MOTION_SUBSAMPLE_SCALE = 0.5  # resolution "mog2_subsampled" runs MOG2 at, relative to the detection frame
+MOTION_SUBSAMPLE_INTERVAL = 3  # "mog2_subsampled" updates its model every this many frames
+
+# Detection Resolution Settings
+DETECTION_SCALE = 1.0  # segmentation runs on the frame resized by this factor, e.g. 0.5 or 0.25
+DETECTION_REFINE = False  # snap the tip to full-resolution red pixels when DETECTION_SCALE < 1
+DETECTION_REFINE_RADIUS = 6  # extra pixels around the upscaled tip searched during refinement
+DETECTION_REUSE_BUFFERS = True  # keep the detector's working images between frames instead of reallocating them
+
+# Multi-Target Tracking Settings
+MAX_PLAYERS = 4  # tracks kept by MultiTargetTracker, one per red object
+TRACK_GATE = 150.0  # pixels; farther detections are never assigned to a running track
+TRACK_MAX_MISSES = 30  # frames without a detection before a track is released
+MIN_CANDIDATE_AREA = 300  # contour area (pixels) below which a detection candidate is ignored
+
+# Region-of-Interest Detection Settings
+ROI_DETECTION = False  # search only around the tracker's prediction when it is confident
+ROI_SPREAD_SCALE = 3.0  # window half-size in standard deviations of the particle cloud
+ROI_MIN_HALF_SIZE = 80  # pixels
+ROI_MAX_SPREAD = 150.0  # particle spread (pixels) above which the object counts as lost
+
+# Multi-Camera Detection Worker Settings
+WORKER_START_METHOD = "spawn"  # multiprocessing start method for the per-camera detector processes
+WORKER_FRAME_SLOTS = 3  # shared-memory frame slots per camera
+WORKER_FRAME_TIMEOUT = 0.05  # seconds the game waits for a new primary frame before showing the last one again
+WORKER_STALL_TIMEOUT = 3.0  # seconds without a report before a worker is restarted
+WORKER_MAX_RESTARTS = 5  # restarts before a failing camera is given up
+FUSION_MAX_AGE = 0.2  # seconds after which a camera's measurement is ignored
+FUSION_TIME_CONSTANT = 0.05  # seconds; older measurements get exponentially less weight
+
+# Session Recording Settings
+RECORDING_ENABLED = False  # record the raw camera and the composited game frames
+RECORDING_DIR = os.path.join(ROOT_DIR, "recordings")
+RECORDING_SECONDS = 10  # length of the memory-mapped ring kept per stream
+RECORDING_FPS = 30  # frame rate of the recorded videos; the ring holds RECORDING_SECONDS at up to this rate
+RECORDING_SCALE = 0.5  # recorded frame size relative to the game frame
+RECORDING_ENCODE = True  # also encode every recorded frame to a video in the background
+REPLAY_SECONDS = 5  # length of the instant replay written on game over
+
 # Audio files
-ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SOUNDS = {
     "score": os.path.join(ROOT_DIR, "assets", "sounds", "score.wav"),
     "penalty": os.path.join(ROOT_DIR, "assets", "sounds", "penalty.mp3"),
     "levelup": os.path.join(ROOT_DIR, "assets", "sounds", "levelup.mp3"),
     "powerup": os.path.join(ROOT_DIR, "assets", "sounds", "Powerup.wav"),
     "combo": os.path.join(ROOT_DIR, "assets", "sounds", "combo.wav")
-}
\ No newline at end of file
+}
+
+# Sound Settings
+SOUND_CHANNELS = 4  # mixer channels reserved for game sound effects
+SOUND_COOLDOWN_MS = 80  # a sound restarted within this window of its last start is skipped
+SOUND_PRIORITIES = {"levelup": 3, "penalty": 2, "powerup": 2, "combo": 2, "score": 1}
@@ -0,0 +1,46 @@
+from typing import Optional
+
+
+class FixedTimestepClock:
+    """
+    Turns frame timestamps into a whole number of fixed simulation ticks. Elapsed time
+    is added to an accumulator, every full tick in it is handed out, and the remainder is
+    carried over; `alpha` is that remainder as a fraction of a tick, for interpolating
+    rendered positions between the last two ticks. After a stall at most `max_ticks` are
+    handed out and the rest of the backlog is dropped, so the game slows down instead of
+    spending ever longer catching up.
+    """
+    # Timestamps like i / 30 do not add up to whole ticks exactly in floating point.
+    EPSILON = 1e-6
+
+    def __init__(self, rate: float, max_ticks: int):
+        self.rate = rate
+        self.dt = 1.0 / rate
+        self.max_ticks = max_ticks
+        self.accumulator = 0.0  # in ticks
+        self.elapsed = 0.0  # ticks of real time between the last two frames, unclamped
+        self.ticks = 0  # total ticks handed out
+        self.dropped = 0.0  # ticks of backlog thrown away after stalls
+        self.last_time: Optional[float] = None
+
+    def advance(self, timestamp: float) -> int:
+        """Returns how many ticks to simulate for a frame captured at `timestamp` (seconds)."""
+        if self.last_time is None:
+            self.last_time = timestamp
+        self.elapsed = max(timestamp - self.last_time, 0.0) * self.rate
+        self.last_time = timestamp
+        self.accumulator += self.elapsed
+
+        ticks = int(self.accumulator + self.EPSILON)
+        if ticks > self.max_ticks:
+            self.dropped += ticks - self.max_ticks
+            self.accumulator -= ticks - self.max_ticks
+            ticks = self.max_ticks
+        self.accumulator = max(self.accumulator - ticks, 0.0)
+        self.ticks += ticks
+        return ticks
+
+    @property
+    def alpha(self) -> float:
+        """How far (0..1) the current frame lies between the last tick and the next one."""
+        return min(self.accumulator, 1.0)
@@ -0,0 +1,134 @@
+import cv2
+import hashlib
+import logging
+import os
+import numpy as np
+from typing import Optional, Sequence, Tuple
+
+from src.utils.scratch import ScratchBuffers
+
+logger = logging.getLogger(__name__)
+
+HsvRange = Tuple[np.ndarray, np.ndarray]
+
+
+def hsv_mask(frame: np.ndarray, ranges: Sequence[HsvRange]) -> np.ndarray:
+    """Reference classifier the table reproduces: cvtColor(BGR2HSV), inRange per range, OR-ed."""
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    mask = np.zeros(hsv.shape[:2], dtype=np.uint8)
+    for lower, upper in ranges:
+        cv2.bitwise_or(mask, cv2.inRange(hsv, lower, upper), dst=mask)
+    return mask
+
+
+def all_colors() -> np.ndarray:
+    """Returns every 24-bit BGR colour once, as a 4096x4096 image."""
+    values = np.arange(1 << 24, dtype=np.uint32)
+    bgr = np.stack([values & 0xFF, (values >> 8) & 0xFF, values >> 16], axis=-1).astype(np.uint8)
+    return bgr.reshape(4096, 4096, 3)
+
+
+class ColorLookupTable:
+    """
+    Compiled BGR -> mask classifier equivalent to running cvtColor(BGR2HSV) followed by
+    inRange over each HSV range and OR-ing the results.
+
+    The colour cube is quantised to `bits` per channel and each cell is classified once
+    by its centre colour; with 8 bits the table is exact. At runtime the table is
+    expanded to all 2^24 colours, so classification is a single gather indexed by the
+    packed 24-bit pixel value, whatever the quantisation. The quantised table is cached
+    on disk keyed by the ranges. The ranges are kept as read-only copies; `set_ranges`
+    swaps in new ones, rebuilding (or reloading) the table only if they differ.
+    """
+    def __init__(self, ranges: Sequence[HsvRange], bits: int = 8, cache_dir: Optional[str] = None):
+        if not 1 <= bits <= 8:
+            raise ValueError(f"bits must be between 1 and 8, got {bits}")
+        self.bits = bits
+        self.cache_dir = cache_dir
+        self._fingerprint = None
+        self._table = None
+        self.set_ranges(ranges)
+
+    def set_ranges(self, ranges: Sequence[HsvRange]):
+        """Classifies with new HSV ranges from now on."""
+        self.ranges = [tuple(self._frozen(bound) for bound in bounds) for bounds in ranges]
+        fingerprint = self._compute_fingerprint()
+        if fingerprint != self._fingerprint:
+            self._table = self._expand(self._load_or_build(fingerprint))
+            self._fingerprint = fingerprint
+
+    @staticmethod
+    def _frozen(bound) -> np.ndarray:
+        bound = np.array(bound)
+        bound.flags.writeable = False
+        return bound
+
+    def classify(self, frame: np.ndarray, out: Optional[np.ndarray] = None,
+                 scratch: Optional[ScratchBuffers] = None) -> np.ndarray:
+        """
+        Returns a uint8 mask (0 or 255) of the pixels whose colour falls within any of the ranges.
+        With an `out` mask and `scratch` buffers to work in, nothing is allocated per call.
+        """
+        shape = frame.shape[:2]
+        if scratch is None:
+            bgra = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA)
+            keys = bgra.view(np.uint32).reshape(shape)
+        else:
+            bgra = cv2.cvtColor(frame, cv2.COLOR_BGR2BGRA, dst=scratch.get("lut.bgra", shape + (4,)))
+            # np.take converts other index types to intp on every call, so build the keys as intp.
+            keys = scratch.get("lut.keys", shape, np.intp)
+        # Drop the alpha byte; little-endian packing gives B | G << 8 | R << 16.
+        np.bitwise_and(bgra.view(np.uint32).reshape(shape), 0x00FFFFFF, out=keys)
+        # Keys are always in range; "clip" also lets take write straight into `out`.
+        return np.take(self._table, keys, out=out, mode="clip")
+
+    def _compute_fingerprint(self) -> str:
+        h = hashlib.sha1(f"v1:{self.bits}".encode())
+        for lower, upper in self.ranges:
+            h.update(np.asarray(lower, dtype=np.int64).tobytes())
+            h.update(np.asarray(upper, dtype=np.int64).tobytes())
+        return h.hexdigest()[:16]
+
+    def _load_or_build(self, fingerprint: str) -> np.ndarray:
+        path = os.path.join(self.cache_dir, f"color_lut_{fingerprint}.npy") if self.cache_dir else None
+        levels = 1 << self.bits
+        if path and os.path.exists(path):
+            try:
+                packed = np.load(path)
+                return np.unpackbits(packed)[:levels ** 3].astype(bool).reshape(levels, levels, levels)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable colour table cache {path}: {e}")
+
+        grid = self._build_grid()
+        if path:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = f"{path}.{os.getpid()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    np.save(f, np.packbits(grid.ravel()))
+                os.replace(tmp_path, path)
+            except OSError as e:
+                logger.warning(f"Could not cache colour table to {path}: {e}")
+        return grid
+
+    def _build_grid(self) -> np.ndarray:
+        """Classifies the centre colour of every quantised cell, indexed [r, g, b]."""
+        levels = 1 << self.bits
+        shift = 8 - self.bits
+        centres = (np.arange(levels, dtype=np.uint16) << shift) + ((1 << shift) >> 1)
+        r, g, b = np.meshgrid(centres, centres, centres, indexing="ij")
+        bgr = np.stack([b.ravel(), g.ravel(), r.ravel()], axis=-1).astype(np.uint8).reshape(1, -1, 3)
+
+        hsv = cv2.cvtColor(bgr, cv2.COLOR_BGR2HSV)
+        mask = np.zeros(hsv.shape[:2], dtype=np.uint8)
+        for lower, upper in self.ranges:
+            mask |= cv2.inRange(hsv, lower, upper)
+        return (mask.ravel() > 0).reshape(levels, levels, levels)
+
+    def _expand(self, grid: np.ndarray) -> np.ndarray:
+        """Expands the [r, g, b] cell grid into a flat 2^24 table indexed by R << 16 | G << 8 | B."""
+        repeat = 1 << (8 - self.bits)
+        if repeat > 1:
+            grid = grid.repeat(repeat, axis=0).repeat(repeat, axis=1).repeat(repeat, axis=2)
+        return np.where(grid.ravel(), np.uint8(255), np.uint8(0))
+
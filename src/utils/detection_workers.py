@@ -0,0 +1,308 @@
+import logging
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.settings import (
+    WORKER_FRAME_SLOTS, WORKER_FRAME_TIMEOUT, WORKER_STALL_TIMEOUT, WORKER_MAX_RESTARTS, WORKER_START_METHOD,
+    FUSION_MAX_AGE, FUSION_TIME_CONSTANT
+)
+from src.utils.frame_source import FrameSource, open_source
+
+logger = logging.getLogger(__name__)
+
+
+class SharedFrameBuffer:
+    """
+    A ring of frame slots in shared memory, written by one worker process and read by the
+    game. Every slot has a sequence number in a small header that the writer clears before
+    and sets after copying a frame in (a seqlock), so a reader can tell a complete frame
+    from one that was overwritten while it was being copied.
+    """
+    def __init__(self, shape: Tuple[int, int, int], slots: int, name: Optional[str] = None):
+        self.shape = shape
+        self.slots = slots
+        frame_bytes = int(np.prod(shape))
+        create = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=8 * slots + frame_bytes * slots)
+        self.sequences = np.ndarray((slots,), dtype=np.int64, buffer=self.shm.buf)
+        self.frames = np.ndarray((slots,) + tuple(shape), dtype=np.uint8, buffer=self.shm.buf, offset=8 * slots)
+        if create:
+            self.sequences[:] = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, sequence: int, frame: np.ndarray) -> int:
+        slot = sequence % self.slots
+        self.sequences[slot] = 0
+        self.frames[slot] = frame
+        self.sequences[slot] = sequence
+        return slot
+
+    def read(self, sequence: int, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """Copies out the frame with this sequence number, or returns None if it has been overwritten."""
+        slot = sequence % self.slots
+        if self.sequences[slot] != sequence:
+            return None
+        if out is None:
+            out = self.frames[slot].copy()
+        else:
+            np.copyto(out, self.frames[slot])
+        return out if self.sequences[slot] == sequence else None
+
+    def close(self, unlink: bool = False):
+        # Drop the numpy views first, the mapping cannot close while they are alive.
+        del self.sequences, self.frames
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _detection_worker(spec: str, width: int, height: int, num_frames: int, seed: int,
+                      buffer_name: str, slots: int, first_sequence: int, results, stop_event):
+    """
+    Worker process body: reads the source, mirrors each frame like the game does, runs
+    the detector, publishes the frame through shared memory and sends only its sequence
+    number, capture timestamp and measurement through the results queue. A restarted
+    worker continues from `first_sequence`, so old slot contents never match a new number.
+    """
+    from src.utils.red_object_detector import RedObjectDetector
+
+    source = open_source(spec, width, height, num_frames, seed)
+    buffer = SharedFrameBuffer((height, width, 3), slots, buffer_name)
+    detector = RedObjectDetector()
+    sequence = first_sequence
+    try:
+        while not stop_event.is_set():
+            ret, frame = source.read() if source.isOpened() else (False, None)
+            timestamp = time.monotonic()
+            if not ret:
+                results.put(("eof", sequence, timestamp, None))
+                break
+            if frame.shape[:2] != (height, width):
+                frame = cv2.resize(frame, (width, height))
+            cv2.flip(frame, 1, dst=frame)
+            measurement = detector.detect(frame)
+            sequence += 1
+            buffer.write(sequence, frame)
+            results.put(("frame", sequence, timestamp, measurement))
+    finally:
+        source.release()
+        buffer.close()
+
+
+class DetectionWorker:
+    """One camera: its worker process, shared frame buffer and results queue, restarted on failure."""
+    def __init__(self, index: int, spec: str, width: int, height: int, num_frames: int, seed: int, context):
+        self.index = index
+        self.spec = spec
+        self.args = (spec, width, height, num_frames, seed)
+        self.context = context
+        self.buffer = SharedFrameBuffer((height, width, 3), WORKER_FRAME_SLOTS)
+        self.process = None
+        self.results = None
+        self.stop_event = context.Event()
+        self.finished = False
+        self.restarts = 0
+        self.frames = 0
+        self.skipped = 0
+        self.torn = 0
+        self.latest: Optional[Tuple[int, float, Optional[np.ndarray]]] = None  # (sequence, timestamp, measurement)
+        self.last_message = time.monotonic()
+        self.start()
+
+    def start(self):
+        self.results = self.context.Queue()
+        self.process = self.context.Process(
+            target=_detection_worker, name=f"detector-{self.index}", daemon=True,
+            args=self.args + (self.buffer.name, WORKER_FRAME_SLOTS, self.latest[0] if self.latest else 0,
+                              self.results, self.stop_event))
+        self.process.start()
+        self.last_message = time.monotonic()
+
+    def poll(self, timeout: float = 0.0) -> bool:
+        """Drains the results queue, keeping the newest frame; returns True if a new frame arrived."""
+        fresh = False
+        while True:
+            try:
+                kind, sequence, timestamp, measurement = self.results.get(timeout=timeout) if timeout else \
+                    self.results.get_nowait()
+            except queue.Empty:
+                return fresh
+            except (EOFError, OSError):
+                return fresh
+            timeout = 0.0
+            self.last_message = time.monotonic()
+            if kind == "eof":
+                self.finished = True
+                return fresh
+            if self.latest is not None and fresh:
+                self.skipped += 1
+            self.latest = (sequence, timestamp, measurement)
+            self.frames += 1
+            fresh = True
+
+    def supervise(self):
+        """
+        Restarts the worker if its process died or has not reported for WORKER_STALL_TIMEOUT
+        seconds; after WORKER_MAX_RESTARTS restarts the camera is given up.
+        """
+        if self.finished:
+            return
+        dead = not self.process.is_alive()
+        stalled = time.monotonic() - self.last_message > WORKER_STALL_TIMEOUT
+        if not (dead or stalled):
+            return
+        reason = f"exited with code {self.process.exitcode}" if dead else "stalled"
+        self.process.terminate()
+        self.process.join(timeout=1.0)
+        self.results.close()
+        if self.restarts >= WORKER_MAX_RESTARTS:
+            logger.error(f"Detection worker {self.index} ({self.spec}) {reason}, giving up after {self.restarts} restarts")
+            self.finished = True
+            return
+        logger.warning(f"Detection worker {self.index} ({self.spec}) {reason}, restarting")
+        self.restarts += 1
+        self.start()
+
+    def read_latest(self, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        if self.latest is None:
+            return None
+        frame = self.buffer.read(self.latest[0], out)
+        if frame is None:
+            self.torn += 1
+        return frame
+
+    def stop(self):
+        self.stop_event.set()
+        self.process.join(timeout=1.0)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(timeout=1.0)
+        self.results.close()
+        self.buffer.close(unlink=True)
+
+    def stats(self) -> Dict[str, float]:
+        return {"frames": self.frames, "skipped": self.skipped, "torn": self.torn, "restarts": self.restarts,
+                "alive": int(self.process.is_alive())}
+
+
+class MeasurementFusion:
+    """
+    Fuses the latest measurement of every camera into one. Each measurement is moved
+    forward by the tracker's velocity over its age and weighted by exp(-age / time_constant);
+    measurements older than `max_age` seconds, and cameras whose latest frame had no
+    detection, are ignored.
+    """
+    def __init__(self, max_age: float = FUSION_MAX_AGE, time_constant: float = FUSION_TIME_CONSTANT):
+        self.max_age = max_age
+        self.time_constant = time_constant
+
+    def fuse(self, reports: List[Tuple[float, Optional[np.ndarray]]], now: float,
+             velocity: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """`reports` holds (timestamp, measurement) pairs; `velocity` is in pixels per second."""
+        points, weights = [], []
+        for timestamp, measurement in reports:
+            age = now - timestamp
+            if measurement is None or age > self.max_age:
+                continue
+            points.append(measurement + velocity * age if velocity is not None else measurement)
+            weights.append(np.exp(-max(age, 0.0) / self.time_constant))
+        if not points:
+            return None
+        return np.average(np.array(points, dtype=float), axis=0, weights=weights)
+
+
+class CameraPool(FrameSource):
+    """
+    Several cameras or sources, each with its own detector process. The first source is
+    the one shown on screen. Frames come back through shared memory and measurements are
+    fused with their capture timestamps, so the game never runs OpenCV detection on its
+    own thread. A slow or stalled primary camera does not block the game: after
+    WORKER_FRAME_TIMEOUT seconds the last frame is shown again. Crashed or stalled
+    workers are restarted.
+    """
+    mirrored = True
+    detects = True
+
+    def __init__(self, specs: List[str], width: int, height: int, num_frames: int = 600, seed: int = 0):
+        context = mp.get_context(WORKER_START_METHOD)
+        self.workers = [DetectionWorker(i, spec, width, height, num_frames, seed + i, context)
+                        for i, spec in enumerate(specs)]
+        self.fusion = MeasurementFusion()
+        self.frame = np.zeros((height, width, 3), dtype=np.uint8)
+        self.scratch = np.zeros_like(self.frame)
+        self.has_frame = False
+        self.repeated = 0
+        self.frame_times: List[float] = []
+        self.timestamp = 0.0
+
+    def isOpened(self) -> bool:
+        return not all(w.finished for w in self.workers) or not self.has_frame
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Returns the primary camera's newest frame. It is a copy: frames belong to the caller,
+        which draws on them and, when pipelined, keeps several in flight, while the last
+        good frame has to stay untouched to be shown again when the camera is late.
+        """
+        primary = self.workers[0]
+        for worker in self.workers:
+            worker.supervise()
+            if worker is not primary:
+                worker.poll()
+
+        # Wait for the primary camera, but only briefly once something is on screen.
+        deadline = time.monotonic() + (WORKER_FRAME_TIMEOUT if self.has_frame else WORKER_STALL_TIMEOUT)
+        fresh = False
+        while not fresh and not primary.finished and time.monotonic() < deadline:
+            fresh = primary.poll(timeout=max(deadline - time.monotonic(), 1e-3))
+        if fresh and primary.read_latest(self.scratch) is not None:
+            # Swap, so a torn read never clobbers the last good frame.
+            self.frame, self.scratch = self.scratch, self.frame
+            self.has_frame = True
+            self.frame_times = (self.frame_times + [primary.latest[1]])[-30:]
+            timestamp = primary.latest[1]
+        elif primary.finished and not fresh:
+            return False, None
+        elif self.has_frame:
+            self.repeated += 1
+            # The game keeps running while the camera is late.
+            timestamp = time.monotonic()
+        else:
+            return False, None
+        # Never backwards, or the interval up to a late capture would be simulated twice.
+        self.timestamp = max(self.timestamp, timestamp)
+        return True, self.frame.copy()
+
+    def frame_time(self) -> float:
+        """Capture time of the primary camera's frame (the worker's monotonic clock), or the read time of a repeat."""
+        return self.timestamp
+
+    def frame_rate(self) -> float:
+        """Frames per second of the primary camera, from its capture timestamps."""
+        if len(self.frame_times) < 2 or self.frame_times[-1] <= self.frame_times[0]:
+            return 30.0
+        return (len(self.frame_times) - 1) / (self.frame_times[-1] - self.frame_times[0])
+
+    def measurement(self, velocity: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """Fused measurement of all cameras; `velocity` is the tracker's, in pixels per second."""
+        reports = [(w.latest[1], w.latest[2]) for w in self.workers if w.latest is not None]
+        return self.fusion.fuse(reports, time.monotonic(), velocity)
+
+    def release(self):
+        for worker in self.workers:
+            worker.stop()
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {f"camera{w.index}": w.stats() for w in self.workers}
+        stats["camera0"]["repeated"] = self.repeated
+        stats["camera0"]["fps"] = self.frame_rate()
+        return stats
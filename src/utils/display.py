@@ -0,0 +1,33 @@
+import cv2
+import numpy as np
+
+
+class OpenCVDisplay:
+    """Shows frames in an OpenCV window and polls the keyboard."""
+    def __init__(self, window_name: str):
+        self.window_name = window_name
+
+    def show(self, frame: np.ndarray) -> bool:
+        """Shows the frame and returns True if the player asked to quit."""
+        cv2.imshow(self.window_name, frame)
+        return cv2.waitKey(1) & 0xFF == ord('q')
+
+    def hold(self, frame: np.ndarray, delay_ms: int):
+        """Shows a frame and keeps it on screen for `delay_ms` milliseconds."""
+        cv2.imshow(self.window_name, frame)
+        cv2.waitKey(delay_ms)
+
+    def close(self):
+        cv2.destroyAllWindows()
+
+
+class NullDisplay:
+    """Display backend for headless runs: frames are discarded and nobody ever quits."""
+    def show(self, frame: np.ndarray) -> bool:
+        return False
+
+    def hold(self, frame: np.ndarray, delay_ms: int):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,221 @@
+import abc
+import csv
+import os
+import time
+import cv2
+import numpy as np
+from typing import Dict, List, Optional, Tuple, Union
+
+from src.settings import SOURCE_FRAME_RATE
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+def load_ground_truth(path: str) -> Dict[int, np.ndarray]:
+    """Reads a `frame,x,y` CSV of ground-truth tip positions; frames without a row have no visible object."""
+    truth = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            truth[int(row["frame"])] = np.array([float(row["x"]), float(row["y"])])
+    return truth
+
+
+class FrameSource(abc.ABC):
+    """
+    Base class for anything the game can read frames from. Mirrors the subset of the
+    cv2.VideoCapture interface used by the game, plus optional ground truth. Sources that
+    set `mirrored` deliver frames already flipped for display, and sources that set
+    `detects` run detection themselves and provide `measurement()`. Every frame returned
+    by `read` belongs to the caller, which may draw on it in place.
+    """
+    mirrored = False
+    detects = False
+
+    @abc.abstractmethod
+    def isOpened(self) -> bool:
+        ...
+
+    @abc.abstractmethod
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        ...
+
+    def release(self):
+        pass
+
+    def frame_time(self) -> float:
+        """
+        Capture time, in seconds, of the frame last returned by `read`. Live sources use
+        the clock when the frame was read; recorded and synthetic ones its position in the
+        clip, so a replay simulates the same game however fast it is processed.
+        """
+        return time.monotonic()
+
+    def measurement(self, velocity: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        """
+        Tip position detected in the last frame, for sources that set `detects`. `velocity`
+        is the tracker's current estimate in pixels per second, for sources that need to
+        compensate for latency.
+        """
+        return None
+
+    def ground_truth(self) -> Optional[np.ndarray]:
+        """
+        Returns the (K, 2) tip positions of the objects visible in the last frame read,
+        in source (unmirrored) pixel coordinates, or None if the source has no ground truth.
+        """
+        return None
+
+
+class CameraSource(FrameSource):
+    """Live webcam input."""
+    def __init__(self, index: int, width: int, height: int):
+        self.cap = cv2.VideoCapture(index)
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+
+class _RecordedSource(FrameSource):
+    """Shared ground-truth handling for sources replaying recorded frames."""
+    def __init__(self, ground_truth_path: Optional[str], fps: float = SOURCE_FRAME_RATE):
+        self.frame_index = -1
+        self.fps = fps
+        self.truth = load_ground_truth(ground_truth_path) if ground_truth_path else None
+
+    def frame_time(self) -> float:
+        return self.frame_index / self.fps
+
+    def ground_truth(self) -> Optional[np.ndarray]:
+        if self.truth is None:
+            return None
+        point = self.truth.get(self.frame_index)
+        return np.empty((0, 2)) if point is None else point[None, :]
+
+
+class VideoFileSource(_RecordedSource):
+    """
+    Replays a video file. Ground truth is read from a `frame,x,y` CSV next to the clip
+    (same name, .csv extension) if one exists.
+    """
+    def __init__(self, path: str, ground_truth_path: Optional[str] = None):
+        if ground_truth_path is None and os.path.exists(os.path.splitext(path)[0] + ".csv"):
+            ground_truth_path = os.path.splitext(path)[0] + ".csv"
+        self.cap = cv2.VideoCapture(path)
+        fps = self.cap.get(cv2.CAP_PROP_FPS)
+        super().__init__(ground_truth_path, fps if fps > 0 else SOURCE_FRAME_RATE)
+
+    def isOpened(self) -> bool:
+        return self.cap.isOpened()
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        ret, frame = self.cap.read()
+        if ret:
+            self.frame_index += 1
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class ImageDirectorySource(_RecordedSource):
+    """
+    Replays the images of a directory in file-name order. Ground truth is read from a
+    `ground_truth.csv` inside the directory if one exists.
+    """
+    def __init__(self, path: str, ground_truth_path: Optional[str] = None):
+        if ground_truth_path is None and os.path.exists(os.path.join(path, "ground_truth.csv")):
+            ground_truth_path = os.path.join(path, "ground_truth.csv")
+        super().__init__(ground_truth_path)
+        self.paths = sorted(os.path.join(path, name) for name in os.listdir(path)
+                            if name.lower().endswith(IMAGE_EXTENSIONS))
+
+    def isOpened(self) -> bool:
+        return self.frame_index + 1 < len(self.paths)
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self.isOpened():
+            return False, None
+        self.frame_index += 1
+        frame = cv2.imread(self.paths[self.frame_index])
+        return frame is not None, frame
+
+
+class SyntheticSource(FrameSource):
+    """
+    Generates frames of tapered red "pens" moving over a static textured background,
+    with exact ground truth for their tips. Every `occlusion_period` frames the pens
+    disappear for `occlusion_length` frames.
+    """
+    fps = 30.0
+
+    def __init__(self, width: int, height: int, num_frames: int = 600, num_objects: int = 1, seed: int = 0,
+                 occlusion_period: int = 200, occlusion_length: int = 15):
+        self.width = width
+        self.height = height
+        self.num_frames = num_frames
+        self.num_objects = num_objects
+        self.occlusion_period = occlusion_period
+        self.occlusion_length = occlusion_length
+        self.frame_index = -1
+
+        rng = np.random.default_rng(seed)
+        self.background = cv2.GaussianBlur(rng.integers(40, 200, (height, width, 3), dtype=np.uint8), (31, 31), 0)
+        # A few precomputed sensor-noise frames, cycled so generation stays cheap.
+        self.noise = [rng.integers(0, 6, (height, width, 3), dtype=np.uint8) for _ in range(4)]
+        self.phases = rng.uniform(0, 2 * np.pi, (num_objects, 3))
+        self._tips = np.empty((0, 2))
+
+    def isOpened(self) -> bool:
+        return self.frame_index + 1 < self.num_frames
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        if not self.isOpened():
+            return False, None
+        self.frame_index += 1
+        frame = cv2.add(self.background, self.noise[self.frame_index % len(self.noise)])
+
+        tips = []
+        if self.frame_index % self.occlusion_period >= self.occlusion_length or self.frame_index < self.occlusion_period:
+            t = self.frame_index / self.fps
+            for i, (px, py, pa) in enumerate(self.phases):
+                lane = (i + 0.5) / self.num_objects
+                base = np.array([self.width * (0.5 + 0.3 * np.sin(0.9 * t + px)),
+                                 self.height * (0.35 + 0.45 * lane + 0.1 * np.cos(1.3 * t + py))])
+                angle = -np.pi / 2 + 0.6 * np.sin(1.7 * t + pa)
+                tip = base + 140 * np.array([np.cos(angle), np.sin(angle)])
+                normal = np.array([-np.sin(angle), np.cos(angle)]) * 22
+                polygon = np.array([base + normal, base - normal, tip]).round().astype(np.int32)
+                cv2.fillPoly(frame, [polygon], (20, 20, 210), cv2.LINE_AA)
+                tips.append(tip)
+        self._tips = np.array(tips).reshape(-1, 2)
+        return True, frame
+
+    def frame_time(self) -> float:
+        return self.frame_index / self.fps
+
+    def ground_truth(self) -> Optional[np.ndarray]:
+        return self._tips
+
+
+def open_source(spec: Union[int, str], width: int, height: int, num_frames: int = 600, seed: int = 0) -> FrameSource:
+    """
+    Opens a frame source from a command-line style spec: a camera index, a video file,
+    a directory of images, or `synthetic` / `synthetic:<objects>` for generated frames.
+    """
+    if isinstance(spec, int) or str(spec).isdigit():
+        return CameraSource(int(spec), width, height)
+    if str(spec).startswith("synthetic"):
+        _, _, objects = str(spec).partition(":")
+        return SyntheticSource(width, height, num_frames, int(objects or 1), seed)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec)
+    if not os.path.exists(spec):
+        raise FileNotFoundError(f"Frame source '{spec}' does not exist")
+    return VideoFileSource(spec)
@@ -0,0 +1,137 @@
+import cv2
+import numpy as np
+from typing import Callable, Dict, Optional, Tuple
+
+Color = Tuple[int, int, int]
+
+
+class Sprite:
+    """
+    A pre-rasterised drawing, stored sparsely as the flat frame indices of the pixels it
+    covers together with their premultiplied colour and remaining background weight.
+    """
+    def __init__(self, indices: np.ndarray, premultiplied: np.ndarray, transparency: np.ndarray):
+        self.indices = indices
+        self.premultiplied = premultiplied
+        self.transparency = transparency
+
+    @staticmethod
+    def from_drawing(frame_shape: Tuple[int, ...], origin: Tuple[int, int], size: Tuple[int, int],
+                     draw: Callable[[np.ndarray, Optional[Color]], None]) -> 'Sprite':
+        """
+        Rasterises `draw` into a (width, height) `size` patch whose top-left corner sits at
+        `origin` in the frame. `draw(image, color)` is called twice: once on a black colour
+        patch with `color=None` (draw in your own colours) and once on a single-channel
+        coverage mask with `color=(255, 255, 255)`, so anti-aliased edges blend correctly.
+        """
+        width, height = size
+        patch = np.zeros((height, width, 3), dtype=np.uint8)
+        coverage = np.zeros((height, width), dtype=np.uint8)
+        draw(patch, None)
+        draw(coverage, (255, 255, 255))
+
+        # Keep only the covered pixels that fall inside the frame.
+        ys, xs = np.nonzero(coverage)
+        fx, fy = xs + origin[0], ys + origin[1]
+        inside = (fx >= 0) & (fx < frame_shape[1]) & (fy >= 0) & (fy < frame_shape[0])
+        ys, xs, fx, fy = ys[inside], xs[inside], fx[inside], fy[inside]
+
+        alpha = coverage[ys, xs].astype(np.float32) / 255
+        return Sprite(fy * frame_shape[1] + fx, patch[ys, xs].astype(np.float32), 1 - alpha)
+
+    @staticmethod
+    def from_text(frame_shape: Tuple[int, ...], text: str, origin: Tuple[int, int], color: Color,
+                  font: int, scale: float, thickness: int) -> 'Sprite':
+        """Rasterises one cv2.putText call into a patch just large enough for the text."""
+        (w, h), baseline = cv2.getTextSize(text, font, scale, thickness)
+        pad = thickness
+        top_left = (origin[0] - pad, origin[1] - h - pad)
+        size = (w + 2 * pad, h + baseline + 2 * pad)
+        local = (pad, h + pad)
+        return Sprite.from_drawing(frame_shape, top_left, size, lambda image, c: cv2.putText(
+            image, text, local, font, scale, c or color, thickness))
+
+
+class LayerStack:
+    """
+    Named static layers (target outlines, HUD text, ...) that are rasterised only when they
+    change and are blended onto each frame in one gather/scatter. Layers are stacked in the
+    order they were first set; later layers are drawn over earlier ones.
+    """
+    def __init__(self, frame_shape: Tuple[int, ...]):
+        self.frame_shape = frame_shape
+        self.layers: Dict[str, Sprite] = {}
+        self.keys: Dict[str, tuple] = {}
+        self._merged: Optional[tuple] = None
+
+    def set(self, name: str, sprite: Optional[Sprite], key: tuple = None):
+        """Replaces (or with None, hides) a layer. `key` records what the sprite shows, see `is_current`."""
+        if sprite is None:
+            self.layers.pop(name, None)
+            self.keys.pop(name, None)
+        else:
+            # Re-setting a layer keeps its position in the stack.
+            self.layers[name] = sprite
+            self.keys[name] = key
+        self._merged = None
+
+    def is_current(self, name: str, key: tuple) -> bool:
+        return name in self.layers and self.keys[name] == key
+
+    def set_text(self, name: str, text: Optional[str], origin: Tuple[int, int], color: Color,
+                 font: int, scale: float, thickness: int):
+        """Shows a line of text, re-rasterising it only if the text or its style changed."""
+        if text is None:
+            if name in self.layers:
+                self.set(name, None)
+            return
+        key = (text, origin, color, font, scale, thickness)
+        if not self.is_current(name, key):
+            self.set(name, Sprite.from_text(self.frame_shape, text, origin, color, font, scale, thickness), key)
+
+    def composite(self, frame: np.ndarray):
+        """Blends every layer onto the frame in place."""
+        if not frame.flags.c_contiguous:
+            # reshape(-1) would silently copy and the writes below would be lost, so a
+            # strided frame (e.g. a crop of a larger image) is composited through a copy.
+            contiguous = np.ascontiguousarray(frame)
+            self.composite(contiguous)
+            frame[...] = contiguous
+            return
+        if self._merged is None:
+            self._merge()
+        opaque_indices, opaque_colors, blend_indices, transparency, premultiplied = self._merged
+        # Indexing the flat channel array is several times faster than indexing pixel rows.
+        channels = frame.reshape(-1)
+        # Fully opaque pixels (the bulk of outlines and text) are a plain scatter; only
+        # anti-aliased edge pixels need the blend.
+        channels[opaque_indices] = opaque_colors
+        if len(blend_indices):
+            blended = channels[blend_indices] * transparency
+            blended += premultiplied
+            channels[blend_indices] = np.minimum(blended, 255, out=blended)
+
+    def _merge(self):
+        """Flattens the stack into the pixels covered by any layer, ready for `composite`."""
+        sprites = list(self.layers.values())
+        indices = np.unique(np.concatenate([s.indices for s in sprites] + [np.empty(0, dtype=np.intp)]))
+        premultiplied = np.zeros((len(indices), 3), dtype=np.float32)
+        transparency = np.ones(len(indices), dtype=np.float32)
+        for sprite in sprites:
+            # "Over" compositing of this layer onto what is already merged.
+            at = np.searchsorted(indices, sprite.indices)
+            premultiplied[at] = premultiplied[at] * sprite.transparency[:, None] + sprite.premultiplied
+            transparency[at] *= sprite.transparency
+
+        def channel_indices(pixel_indices):
+            return (pixel_indices[:, None] * 3 + np.arange(3)).ravel()
+
+        opaque = transparency == 0
+        self._merged = (
+            channel_indices(indices[opaque]),
+            np.minimum(premultiplied[opaque] + 0.5, 255).astype(np.uint8).ravel(),
+            channel_indices(indices[~opaque]),
+            np.repeat(transparency[~opaque], 3),
+            # +0.5 so the truncating store back into uint8 rounds to nearest.
+            premultiplied[~opaque].ravel() + 0.5,
+        )
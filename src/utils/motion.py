@@ -0,0 +1,159 @@
+import abc
+import cv2
+import numpy as np
+from typing import Callable, Dict, Optional
+
+from src.settings import (
+    MOTION_DIFF_THRESHOLD, MOTION_AVERAGE_RATE, MOTION_KNN_THRESHOLD,
+    MOTION_SUBSAMPLE_SCALE, MOTION_SUBSAMPLE_INTERVAL
+)
+
+
+class MotionSegmenter(abc.ABC):
+    """
+    Strategy for the motion gate of the detector: `apply` updates the model with a frame
+    and returns a uint8 mask that is non-zero where the frame is moving. It writes into
+    `out` when given, but may also return a buffer of its own; None means no gating,
+    every pixel counts as moving.
+    """
+    @abc.abstractmethod
+    def apply(self, frame: np.ndarray, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        ...
+
+
+class SubtractorSegmenter(MotionSegmenter):
+    """Any OpenCV BackgroundSubtractor (MOG2, KNN)."""
+    def __init__(self, subtractor):
+        self.subtractor = subtractor
+
+    def apply(self, frame: np.ndarray, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        return self.subtractor.apply(frame, out)
+
+
+class RunningAverageSegmenter(MotionSegmenter):
+    """
+    Keeps an exponential running average of the grey image as the background and marks
+    pixels differing from it by more than `threshold` grey levels.
+    """
+    def __init__(self, rate: float = MOTION_AVERAGE_RATE, threshold: int = MOTION_DIFF_THRESHOLD):
+        self.rate = rate
+        self.threshold = threshold
+        self.background = None
+
+    def apply(self, frame: np.ndarray, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        shape = frame.shape[:2]
+        if self.background is None or self.background.shape != shape:
+            self.gray = np.empty(shape, dtype=np.uint8)
+            self.background_u8 = np.empty(shape, dtype=np.uint8)
+            cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.gray)
+            self.background = self.gray.astype(np.float32)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self.gray)
+        cv2.convertScaleAbs(self.background, dst=self.background_u8)
+        diff = cv2.absdiff(self.gray, self.background_u8, dst=out)
+        cv2.accumulateWeighted(self.gray, self.background, self.rate)
+        return cv2.threshold(diff, self.threshold, 255, cv2.THRESH_BINARY, dst=diff)[1]
+
+
+class FrameDifferenceSegmenter(MotionSegmenter):
+    """
+    Three-frame differencing: a pixel is moving if the current grey image differs by more
+    than `threshold` from both of the two previous ones, which keeps the object's current
+    position but not the ghost it left behind. No model to learn, so it adapts instantly,
+    but only the leading and trailing edges of a uniformly coloured object change between
+    frames: small, slow or stopped objects can vanish from the mask.
+    """
+    def __init__(self, threshold: int = MOTION_DIFF_THRESHOLD):
+        self.threshold = threshold
+        self.history = []
+        self.older_diff = None
+        self.seen = 0
+
+    def apply(self, frame: np.ndarray, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        shape = frame.shape[:2]
+        if not self.history or self.history[0].shape != shape:
+            self.history = [np.zeros(shape, dtype=np.uint8) for _ in range(3)]
+            self.older_diff = np.empty(shape, dtype=np.uint8)
+            self.seen = 0
+        # Reuse the oldest grey image for the current one.
+        current = self.history.pop()
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=current)
+        self.history.insert(0, current)
+        self.seen += 1
+
+        diff = cv2.absdiff(current, self.history[1], dst=out)
+        cv2.threshold(diff, self.threshold, 255, cv2.THRESH_BINARY, dst=diff)
+        cv2.absdiff(current, self.history[2], dst=self.older_diff)
+        cv2.threshold(self.older_diff, self.threshold, 255, cv2.THRESH_BINARY, dst=self.older_diff)
+        cv2.bitwise_and(diff, self.older_diff, dst=diff)
+        if self.seen < 3:
+            diff.fill(0)
+        return diff
+
+
+class SubsampledSegmenter(MotionSegmenter):
+    """
+    Runs another segmenter on the frame downscaled by `scale`, and only every `interval`
+    frames; in between the last mask is reused. The mask is upscaled to the frame size.
+    """
+    def __init__(self, segmenter: MotionSegmenter, scale: float = MOTION_SUBSAMPLE_SCALE,
+                 interval: int = MOTION_SUBSAMPLE_INTERVAL):
+        self.segmenter = segmenter
+        self.scale = scale
+        self.interval = max(1, interval)
+        self.frame_index = 0
+        self.small = None
+        self.mask = None
+
+    def apply(self, frame: np.ndarray, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        height, width = frame.shape[:2]
+        if self.mask is None or self.mask.shape != (height, width):
+            size = (max(1, round(width * self.scale)), max(1, round(height * self.scale)))
+            self.small = np.empty((size[1], size[0], 3), dtype=np.uint8)
+            self.mask = np.zeros((height, width), dtype=np.uint8)
+            self.frame_index = 0
+        if self.frame_index % self.interval == 0:
+            cv2.resize(frame, (self.small.shape[1], self.small.shape[0]), dst=self.small, interpolation=cv2.INTER_AREA)
+            small_mask = self.segmenter.apply(self.small)
+            if small_mask is None:
+                self.mask.fill(255)
+            else:
+                cv2.resize(small_mask, (width, height), dst=self.mask, interpolation=cv2.INTER_NEAREST)
+        self.frame_index += 1
+        return self.mask
+
+
+class NoMotionSegmenter(MotionSegmenter):
+    """Colour only: nothing is gated by motion, so a still red object is detected too."""
+    def apply(self, frame: np.ndarray, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+        return None
+
+
+def _mog2(history: int, var_threshold: float, detect_shadows: bool, **_) -> MotionSegmenter:
+    return SubtractorSegmenter(cv2.createBackgroundSubtractorMOG2(
+        history=history, varThreshold=var_threshold, detectShadows=detect_shadows))
+
+
+def _knn(history: int, **_) -> MotionSegmenter:
+    return SubtractorSegmenter(cv2.createBackgroundSubtractorKNN(
+        history=history, dist2Threshold=MOTION_KNN_THRESHOLD, detectShadows=False))
+
+
+MOTION_BACKENDS: Dict[str, Callable[..., MotionSegmenter]] = {
+    "mog2": _mog2,
+    "mog2_noshadow": lambda **kwargs: _mog2(**dict(kwargs, detect_shadows=False)),
+    "knn": _knn,
+    "running_average": lambda **_: RunningAverageSegmenter(),
+    "frame_difference": lambda **_: FrameDifferenceSegmenter(),
+    "mog2_subsampled": lambda **kwargs: SubsampledSegmenter(_mog2(**kwargs)),
+    "none": lambda **_: NoMotionSegmenter(),
+}
+
+
+def create_motion_segmenter(name: str, history: int = 100, var_threshold: float = 16,
+                            detect_shadows: bool = True) -> MotionSegmenter:
+    """Builds a backend by name; backends without a model ignore the MOG2/KNN parameters."""
+    try:
+        factory = MOTION_BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"Unknown motion backend '{name}', expected one of {sorted(MOTION_BACKENDS)}") from None
+    return factory(history=history, var_threshold=var_threshold, detect_shadows=detect_shadows)
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+
+class LatestFrameQueue:
+    """
+    Bounded hand-off queue between pipeline stages. When full, the oldest item is
+    discarded so the consumer always sees the most recent frame (latest-frame-wins).
+    """
+    def __init__(self, name: str, maxsize: int = 1):
+        self.name = name
+        self.maxsize = max(1, maxsize)
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self.put_count = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def put(self, item: Any):
+        with self._cond:
+            if self._closed:
+                return
+            if len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self.put_count += 1
+            self.max_depth = max(self.max_depth, len(self._items))
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Returns the next item, or None on timeout or once the queue is closed and drained."""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if self._items:
+                return self._items.popleft()
+            return None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def depth(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "put": self.put_count,
+            "dropped": self.dropped,
+        }
+
+
+class PipelineStage(threading.Thread):
+    """
+    Worker thread that pulls items from an input queue, processes them and pushes
+    the result to an output queue. A source stage has no input queue and is
+    expected to produce items on every call; returning None from the worker
+    function ends the stage and closes its output queue, so downstream stages
+    finish what is already queued. An exception stops the whole pipeline.
+    """
+    def __init__(self, name: str, work: Callable[[Any], Any],
+                 input_queue: Optional[LatestFrameQueue], output_queue: Optional[LatestFrameQueue],
+                 stop_event: threading.Event):
+        super().__init__(name=name, daemon=True)
+        self.work = work
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.stop_event = stop_event
+        self.processed = 0
+        self.busy_time = 0.0
+        self.error: Optional[BaseException] = None
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                if self.input_queue is not None:
+                    item = self.input_queue.get(timeout=0.1)
+                    if item is None:
+                        if self.input_queue.closed:
+                            break
+                        continue
+                else:
+                    item = None
+
+                start = time.perf_counter()
+                result = self.work(item)
+                self.busy_time += time.perf_counter() - start
+                if result is None:
+                    break
+                self.processed += 1
+                if self.output_queue is not None:
+                    self.output_queue.put(result)
+        except BaseException as e:
+            self.error = e
+            self.stop_event.set()
+        finally:
+            if self.output_queue is not None:
+                self.output_queue.close()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "processed": self.processed,
+            "avg_ms": 1000.0 * self.busy_time / self.processed if self.processed else 0.0,
+        }
+        if self.input_queue is not None:
+            stats["input_depth"] = self.input_queue.depth
+            stats["input_max_depth"] = self.input_queue.max_depth
+        if self.output_queue is not None:
+            stats["dropped"] = self.output_queue.dropped
+        return stats
@@ -0,0 +1,121 @@
+import csv
+import json
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from typing import Deque, Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+from src.settings import PROFILER_ENABLED, PROFILER_WINDOW, PROFILER_TRACE_CAPACITY
+
+_NULL_SECTION = nullcontext()
+
+class _Section:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "FrameProfiler", name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+
+    def __exit__(self, *exc):
+        self.profiler._record(self.name, self.start, time.perf_counter_ns())
+
+
+class FrameProfiler:
+    """
+    Timing hooks for the stages of a frame. Stages and sub-steps are wrapped in
+    `with profiler.section("detect.motion"):` blocks; while disabled a section is a shared
+    no-op context, so the hooks can stay in the hot path. While enabled, each section
+    keeps a rolling window of durations for live statistics and appends a trace event
+    that can be exported as Chrome trace JSON or CSV for offline analysis.
+    """
+    def __init__(self, enabled: bool = False, window: int = 300, trace_capacity: int = 100000):
+        self.enabled = enabled
+        self.window = window
+        self.durations: Dict[str, Deque[float]] = {}
+        # (name, thread name, frame index, start ns, duration ns)
+        self.trace: Deque[Tuple[str, str, int, int, int]] = deque(maxlen=trace_capacity)
+        self.frame_index = 0
+
+    def section(self, name: str):
+        if not self.enabled:
+            return _NULL_SECTION
+        return _Section(self, name)
+
+    def end_frame(self):
+        self.frame_index += 1
+
+    def reset(self):
+        self.durations.clear()
+        self.trace.clear()
+        self.frame_index = 0
+
+    def _record(self, name: str, start: int, end: int):
+        durations = self.durations.get(name)
+        if durations is None:
+            durations = self.durations.setdefault(name, deque(maxlen=self.window))
+        durations.append((end - start) / 1e6)
+        self.trace.append((name, threading.current_thread().name, self.frame_index, start, end - start))
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Returns mean/p50/p99 milliseconds of every section over the rolling window."""
+        result = {}
+        for name, durations in list(self.durations.items()):
+            values = np.fromiter(durations, dtype=float)
+            if len(values):
+                p50, p99 = np.percentile(values, [50, 99])
+                result[name] = {"mean": float(values.mean()), "p50": float(p50), "p99": float(p99)}
+        return result
+
+    def histogram(self, name: str, bins: int = 16, max_ms: float = 33.0) -> np.ndarray:
+        """Returns the counts of the section's recent durations in `bins` buckets over [0, max_ms]; the last bucket includes overflow."""
+        values = np.minimum(np.fromiter(self.durations.get(name, ()), dtype=float), max_ms)
+        return np.histogram(values, bins=bins, range=(0.0, max_ms))[0]
+
+    def draw_overlay(self, frame: np.ndarray, origin: Tuple[int, int], names: List[str], max_ms: float = 33.0):
+        """Draws one row per section: its p50/p99 and a bar histogram of its recent durations."""
+        stats = self.stats()
+        x, y = origin
+        for name in names:
+            if name not in stats:
+                continue
+            cv2.putText(frame, f"{name} {stats[name]['p50']:.1f}/{stats[name]['p99']:.1f}ms", (x, y),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 255), 1)
+            counts = self.histogram(name, 16, max_ms)
+            heights = (counts * (14.0 / max(counts.max(), 1))).astype(int)
+            for i, h in enumerate(heights):
+                if h > 0:
+                    cv2.rectangle(frame, (x + 220 + 5 * i, y), (x + 223 + 5 * i, y - h), (0, 255, 255), -1)
+            y += 20
+
+    def export(self, path: str):
+        """Writes the trace as Chrome trace JSON (.json) or CSV (any other extension)."""
+        if path.endswith(".json"):
+            self.export_chrome_trace(path)
+        else:
+            self.export_csv(path)
+
+    def export_chrome_trace(self, path: str):
+        events = [
+            {"name": name, "ph": "X", "ts": start / 1000.0, "dur": duration / 1000.0,
+             "pid": 0, "tid": thread, "args": {"frame": frame}}
+            for name, thread, frame, start, duration in list(self.trace)
+        ]
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+    def export_csv(self, path: str):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["name", "thread", "frame", "start_us", "duration_us"])
+            for name, thread, frame, start, duration in list(self.trace):
+                writer.writerow([name, thread, frame, start / 1000.0, duration / 1000.0])
+
+
+profiler = FrameProfiler(PROFILER_ENABLED, PROFILER_WINDOW, PROFILER_TRACE_CAPACITY)
@@ -0,0 +1,269 @@
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class NullRecorder:
+    """Recorder used when recording is disabled; every call is a no-op."""
+    def record(self, stream: str, frame: np.ndarray, timestamp: Optional[float] = None) -> bool:
+        return False
+
+    def instant_replay(self, stream: str = "game", seconds: Optional[float] = None) -> Optional[threading.Thread]:
+        return None
+
+    def close(self):
+        pass
+
+
+class FrameRing:
+    """
+    Fixed-capacity ring of frames backed by two memory-mapped .npy files: the frames and
+    a (sequence, timestamp) row per slot. The sequence is written after the frame, so
+    after a crash the files on disk still hold the last `capacity` complete frames, and
+    `load_ring` / `export_ring` can read them back.
+    """
+    def __init__(self, path: str, capacity: int, shape: Tuple[int, int, int]):
+        self.path = path
+        self.capacity = capacity
+        self.shape = shape
+        self.frames = np.lib.format.open_memmap(path + ".frames.npy", mode="w+", dtype=np.uint8,
+                                                shape=(capacity,) + tuple(shape))
+        self.index = np.lib.format.open_memmap(path + ".index.npy", mode="w+", dtype=np.float64, shape=(capacity, 2))
+        self.index[:] = -1
+        self.written = 0
+
+    def push(self, frame: np.ndarray, timestamp: float) -> int:
+        """Stores the frame (resized to the ring's shape) and returns its sequence number."""
+        sequence = self.written
+        slot = sequence % self.capacity
+        self.index[slot, 0] = -1
+        if frame.shape == self.shape:
+            self.frames[slot] = frame
+        else:
+            cv2.resize(frame, (self.shape[1], self.shape[0]), dst=self.frames[slot], interpolation=cv2.INTER_AREA)
+        self.index[slot] = (sequence, timestamp)
+        self.written += 1
+        return sequence
+
+    def get(self, sequence: int) -> Optional[np.ndarray]:
+        """Returns a view of the frame with this sequence number, or None if it has been overwritten."""
+        slot = sequence % self.capacity
+        return self.frames[slot] if self.index[slot, 0] == sequence else None
+
+    def window(self, seconds: Optional[float] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns the sequence numbers and timestamps of the frames of the last `seconds` (default: all), oldest first."""
+        order = ring_order(self.index)
+        sequences, timestamps = self.index[order, 0].astype(np.int64), self.index[order, 1]
+        if seconds is not None and len(timestamps):
+            keep = timestamps >= timestamps[-1] - seconds
+            sequences, timestamps = sequences[keep], timestamps[keep]
+        return sequences, timestamps
+
+    def close(self):
+        self.frames.flush()
+        self.index.flush()
+        del self.frames, self.index
+
+
+def ring_order(index: np.ndarray) -> np.ndarray:
+    """Returns the slots holding a complete frame, oldest first."""
+    valid = np.flatnonzero(index[:, 0] >= 0)
+    return valid[np.argsort(index[valid, 0])]
+
+
+def load_ring(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Reads back every complete frame of a ring written by FrameRing and its timestamps, oldest first."""
+    frames = np.load(path + ".frames.npy", mmap_mode="r")
+    index = np.load(path + ".index.npy", mmap_mode="r")
+    order = ring_order(index)
+    return frames[order], index[order, 1]
+
+
+def export_ring(path: str, video_path: str, fps: float):
+    frames, timestamps = load_ring(path)
+    write_video(frames, timestamps, video_path, fps)
+
+
+def frame_schedule(timestamps: np.ndarray, fps: float) -> np.ndarray:
+    """
+    Returns, for every frame of a constant `fps` video spanning the timestamps, the index
+    of the frame on screen at that time, so the video plays back at the recorded speed
+    whatever rate the frames actually arrived at.
+    """
+    if len(timestamps) == 0:
+        return np.zeros(0, dtype=np.int64)
+    ticks = timestamps[0] + np.arange(int((timestamps[-1] - timestamps[0]) * fps + 1e-6) + 1) / fps
+    return np.searchsorted(timestamps, ticks + 1e-6, side="right") - 1
+
+
+def write_video(frames: np.ndarray, timestamps: np.ndarray, video_path: str, fps: float):
+    if len(frames) == 0:
+        return
+    height, width = frames.shape[1:3]
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, (width, height))
+    for index in frame_schedule(timestamps, fps):
+        writer.write(frames[index])
+    writer.release()
+
+
+class SessionRecorder:
+    """
+    Records named frame streams (e.g. the raw camera image and the composited game frame)
+    without ever blocking the game loop. `record` copies the frame and its timestamp into
+    the stream's memory-mapped FrameRing and hands its sequence number to a background
+    thread, which encodes it into a video file. Videos are written at `fps` by time: each
+    frame is repeated or skipped according to its timestamp, so they play back at the
+    recorded speed whatever rate the frames arrived at. When the encoder falls so far
+    behind that the frame it would need could be overwritten, new frames are dropped and
+    counted instead of waiting. `instant_replay` writes the last seconds of a stream to its
+    own video in the background, reading the frames from the ring as it goes.
+    """
+    def __init__(self, directory: str, seconds: float, fps: float, scale: float, frame_size: Tuple[int, int],
+                 encode: bool = True):
+        os.makedirs(directory, exist_ok=True)
+        self.prefix = os.path.join(directory, time.strftime("session_%Y%m%d_%H%M%S"))
+        # Holds `seconds` of frames arriving at up to `fps`; faster streams keep less history.
+        self.capacity = max(2, int(seconds * fps))
+        self.fps = fps
+        self.shape = (int(frame_size[1] * scale), int(frame_size[0] * scale), 3)
+        self.encode = encode
+        self.rings: Dict[str, FrameRing] = {}
+        self.writers: Dict[str, cv2.VideoWriter] = {}
+        self.pending: Dict[str, int] = {}
+        self.recorded: Dict[str, int] = {}
+        self.dropped: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue[Optional[Tuple[str, int, float]]]" = queue.Queue()
+        self._encoded: Dict[str, Tuple[int, float, int]] = {}
+        self._pins: Dict[str, List[List[int]]] = {}
+        self._replays = []
+        self._encoder = threading.Thread(target=self._encode_loop, name="recorder", daemon=True)
+        if encode:
+            self._encoder.start()
+
+    def record(self, stream: str, frame: np.ndarray, timestamp: Optional[float] = None) -> bool:
+        """
+        Copies the frame into the stream's ring, stamped with `timestamp` (seconds, default:
+        now on the monotonic clock); returns False if it had to be dropped.
+        """
+        ring = self.rings.get(stream)
+        if ring is None:
+            ring = self.rings[stream] = FrameRing(f"{self.prefix}_{stream}", self.capacity, self.shape)
+            self.pending[stream] = self.recorded[stream] = self.dropped[stream] = 0
+            self._pins[stream] = []
+        # Keep one slot of slack so the encoder and replays never read a slot that is being rewritten.
+        with self._lock:
+            oldest = min((pin[0] for pin in self._pins[stream]), default=ring.written)
+        if (self.encode and self.pending[stream] >= self.capacity - 1) or ring.written - oldest >= self.capacity - 1:
+            self.dropped[stream] += 1
+            return False
+        timestamp = time.monotonic() if timestamp is None else timestamp
+        sequence = ring.push(frame, timestamp)
+        self.recorded[stream] += 1
+        if self.encode:
+            with self._lock:
+                self.pending[stream] += 1
+            self._queue.put((stream, sequence, timestamp))
+        return True
+
+    def _encode_loop(self):
+        # A frame is written once the next one arrives, for every video frame due before that one's timestamp.
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            stream, sequence, timestamp = item
+            held = self._encoded.get(stream)
+            start, written = (timestamp, 0) if held is None else (held[1], self._write_held(stream, held, timestamp))
+            self._encoded[stream] = (sequence, start, written)
+        for stream, held in self._encoded.items():
+            self._write_held(stream, held, None)
+
+    def _write_held(self, stream: str, held: Tuple[int, float, int], until: Optional[float]) -> int:
+        """
+        Writes the held frame for every video frame due before `until` (once if None) and
+        returns the number of video frames written so far.
+        """
+        sequence, start, written = held
+        due = written + 1 if until is None else max(written, int(np.ceil((until - start) * self.fps - 1e-6)))
+        frame = self.rings[stream].get(sequence)
+        if frame is not None and due > written:
+            writer = self.writers.get(stream)
+            if writer is None:
+                writer = self.writers[stream] = cv2.VideoWriter(
+                    f"{self.prefix}_{stream}.mp4", cv2.VideoWriter_fourcc(*"mp4v"), self.fps,
+                    (self.shape[1], self.shape[0]))
+            for _ in range(due - written):
+                writer.write(frame)
+        with self._lock:
+            self.pending[stream] -= 1
+        return due
+
+    def instant_replay(self, stream: str = "game", seconds: Optional[float] = None) -> Optional[threading.Thread]:
+        """
+        Writes the frames of the last `seconds` (default: the whole ring) of a stream to a
+        video. Only the ring's index is read here; the frames are read on the replay's own
+        thread, and stay pinned in the ring until it has written them.
+        """
+        ring = self.rings.get(stream)
+        if ring is None:
+            return None
+        sequences, timestamps = ring.window(seconds)
+        if len(sequences) == 0:
+            return None
+        pin = [int(sequences[0])]
+        with self._lock:
+            self._pins[stream].append(pin)
+        path = f"{self.prefix}_{stream}_replay_{ring.written}.mp4"
+        thread = threading.Thread(target=self._write_replay, args=(stream, sequences, timestamps, path, pin),
+                                  name="instant-replay")
+        thread.start()
+        self._replays.append(thread)
+        logger.info(f"Writing the last {timestamps[-1] - timestamps[0]:.1f} s ({len(sequences)} frames) "
+                    f"of '{stream}' to {path}")
+        return thread
+
+    def _write_replay(self, stream: str, sequences: np.ndarray, timestamps: np.ndarray, path: str, pin: List[int]):
+        ring = self.rings[stream]
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), self.fps, (self.shape[1], self.shape[0]))
+        try:
+            for index in frame_schedule(timestamps, self.fps):
+                pin[0] = int(sequences[index])
+                frame = ring.get(pin[0])
+                if frame is not None:
+                    writer.write(frame)
+        finally:
+            writer.release()
+            with self._lock:
+                self._pins[stream].remove(pin)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {stream: {"recorded": self.recorded[stream], "dropped": self.dropped[stream],
+                         "pending": self.pending[stream]} for stream in self.rings}
+
+    def close(self):
+        if self.encode:
+            self._queue.put(None)
+            self._encoder.join()
+        for thread in self._replays:
+            thread.join()
+        for writer in self.writers.values():
+            writer.release()
+        for ring in self.rings.values():
+            ring.close()
+        for stream, stats in self.stats().items():
+            logger.info(f"Recorded '{stream}': {stats['recorded']} frames, {stats['dropped']} dropped")
+
+
+if __name__ == "__main__":
+    # Recovers a ring left behind by a crashed session: python -m src.utils.recorder <ring prefix> <out.mp4> [fps]
+    export_ring(sys.argv[1], sys.argv[2], float(sys.argv[3]) if len(sys.argv) > 3 else 30.0)
@@ -1,58 +1,249 @@
 import cv2
 import numpy as np
-from typing import Optional, Tuple
+from typing import List, Optional, Sequence, Tuple
 
-from src.settings import RED_LOWER1, RED_UPPER1, RED_LOWER2, RED_UPPER2
+from src.settings import (
+    RED_LOWER1, RED_UPPER1, RED_LOWER2, RED_UPPER2,
+    ROI_SPREAD_SCALE, ROI_MIN_HALF_SIZE, ROI_MAX_SPREAD,
+    DETECTION_SCALE, DETECTION_REFINE, DETECTION_REFINE_RADIUS, DETECTION_REUSE_BUFFERS, MOTION_BACKEND,
+    COLOR_LUT, COLOR_LUT_BITS, COLOR_LUT_CACHE_DIR
+)
+from src.utils.color_lut import ColorLookupTable, HsvRange
+from src.utils.motion import create_motion_segmenter
+from src.utils.profiler import profiler
+from src.utils.scratch import ScratchBuffers
 
 class RedObjectDetector:
     """
     Detects a moving red object in a video frame using background subtraction and color segmentation.
     """
-    def __init__(self, history: int = 100, var_threshold: int = 16, detect_shadows: bool = True):
-        self.bg_subtractor = cv2.createBackgroundSubtractorMOG2(
-            history=history, varThreshold=var_threshold, detectShadows=detect_shadows
-        )
+    def __init__(self, history: int = 100, var_threshold: int = 16, detect_shadows: bool = True,
+                 scale: float = DETECTION_SCALE, refine: bool = DETECTION_REFINE, use_color_lut: bool = COLOR_LUT,
+                 reuse_buffers: bool = DETECTION_REUSE_BUFFERS, motion: str = MOTION_BACKEND,
+                 red_ranges: Optional[Sequence[HsvRange]] = None):
+        """
+        `motion` names the motion segmentation backend (see src/utils/motion.py).
+        `red_ranges` are the (lower, upper) HSV bounds counted as red, by default the
+        RED_LOWER/RED_UPPER pairs of the settings.
+        """
+        self.motion = create_motion_segmenter(motion, history, var_threshold, detect_shadows)
+        self.red_ranges = list(red_ranges) if red_ranges is not None else [(RED_LOWER1, RED_UPPER1), (RED_LOWER2, RED_UPPER2)]
+        self.color_lut = None
+        if use_color_lut:
+            self.color_lut = ColorLookupTable(self.red_ranges, COLOR_LUT_BITS, COLOR_LUT_CACHE_DIR)
+        self.scale = scale
+        self.refine = refine and scale < 1.0
+        # With reuse_buffers every OpenCV call writes into a preallocated image (dst=).
+        self.buffers = ScratchBuffers() if reuse_buffers else None
+        self.roi_hits = 0
+        self.roi_fallbacks = 0
 
-    def detect(self, frame: np.ndarray) -> Optional[np.ndarray]:
+    def detect(self, frame: np.ndarray, prediction: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Optional[np.ndarray]:
         """
         Processes a frame to find the tip of the largest moving red object.
+
+        Segmentation runs on a copy of the frame downscaled by `scale`; the tip is mapped
+        back to frame coordinates and, if `refine` is set, snapped to the extreme red
+        pixel in a small full-resolution patch around it.
+
+        If a (position, spread) prediction from the tracker is given, only a window
+        around it is searched. The full frame is searched when the prediction is too
+        uncertain, nothing is found in the window, or the object touches its border.
         """
-        fg_mask = self.bg_subtractor.apply(frame)
-        hsv_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-        
-        mask1 = cv2.inRange(hsv_frame, RED_LOWER1, RED_UPPER1)
-        mask2 = cv2.inRange(hsv_frame, RED_LOWER2, RED_UPPER2)
-        red_mask = cv2.bitwise_or(mask1, mask2)
-        
-        combined_mask = cv2.bitwise_and(red_mask, red_mask, mask=fg_mask)
-        combined_mask = cv2.erode(combined_mask, None, iterations=2)
-        combined_mask = cv2.dilate(combined_mask, None, iterations=2)
-        combined_mask = cv2.GaussianBlur(combined_mask, (7, 7), 0)
+        small, fg_mask = self._prepare(frame)
 
-        contours, _ = cv2.findContours(combined_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        result = None
+        window = self._search_window(small.shape, prediction) if prediction is not None else None
+        if window is not None:
+            tip, centroid, clipped = self._find_tip(small, fg_mask, window)
+            if tip is not None and not clipped:
+                self.roi_hits += 1
+                result = tip, centroid
+            else:
+                self.roi_fallbacks += 1
 
-        if not contours:
+        if result is None:
+            tip, centroid, _ = self._find_tip(small, fg_mask, (0, 0, small.shape[1], small.shape[0]))
+            if tip is None:
+                return None
+            result = tip, centroid
+
+        return self._finish_tip(frame, *result)
+
+    def detect_all(self, frame: np.ndarray, max_candidates: int, min_area: float = 0.0) -> List[np.ndarray]:
+        """
+        Returns the tips of up to `max_candidates` moving red objects, one per contour,
+        largest first. Contours smaller than `min_area` (in full-resolution pixels) are ignored.
+        """
+        small, fg_mask = self._prepare(frame)
+        contours = self._find_contours(small, fg_mask, (0, 0, small.shape[1], small.shape[0]))
+        min_area *= self.scale ** 2
+
+        tips = []
+        for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:max_candidates]:
+            if cv2.contourArea(contour) < min_area:
+                break
+            result = self._contour_tip(contour)
+            if result is not None:
+                tips.append(self._finish_tip(frame, *result))
+        return tips
+
+    def _buffer(self, name: str, shape: Tuple[int, ...]) -> Optional[np.ndarray]:
+        """Returns the reusable image for `name`, or None (let OpenCV allocate) if reuse is off."""
+        return self.buffers.get(name, shape) if self.buffers is not None else None
+
+    def learn_background(self, frame: np.ndarray):
+        """Feeds a frame to the motion model only, e.g. to seed it before the game starts."""
+        self._prepare(frame)
+
+    def _prepare(self, frame: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Returns the frame at detection scale and its foreground mask (None: no motion gate)."""
+        if self.scale != 1.0:
+            with profiler.section("detect.resize"):
+                height, width = frame.shape[:2]
+                size = (round(width * self.scale), round(height * self.scale))
+                small = cv2.resize(frame, size, dst=self._buffer("small", (size[1], size[0], 3)),
+                                   interpolation=cv2.INTER_AREA)
+        else:
+            small = frame
+
+        # The motion model is always updated on the whole (scaled) frame so it
+        # stays consistent regardless of where the search window is.
+        with profiler.section("detect.motion"):
+            return small, self.motion.apply(small, self._buffer("foreground", small.shape[:2]))
+
+    def _finish_tip(self, frame: np.ndarray, tip: np.ndarray, centroid: np.ndarray) -> np.ndarray:
+        """Maps a tip found at detection scale back to frame coordinates, refining it if enabled."""
+        if self.scale == 1.0:
+            return tip
+        tip = self._to_frame_coords(tip, frame.shape)
+        if self.refine:
+            tip = self._refine_tip(frame, tip, self._to_frame_coords(centroid, frame.shape))
+        return tip
+
+    def _to_frame_coords(self, point: np.ndarray, frame_shape: Tuple[int, ...]) -> np.ndarray:
+        """Maps a pixel of the scaled frame to the centre of the matching full-resolution area."""
+        x = int((point[0] + 0.5) / self.scale - 0.5)
+        y = int((point[1] + 0.5) / self.scale - 0.5)
+        return np.array([min(max(x, 0), frame_shape[1] - 1), min(max(y, 0), frame_shape[0] - 1)])
+
+    def _refine_tip(self, frame: np.ndarray, tip: np.ndarray, centroid: np.ndarray) -> np.ndarray:
+        """Returns the red pixel near `tip` that lies farthest from the centroid along the centroid-to-tip direction."""
+        direction = (tip - centroid).astype(float)
+        norm = np.linalg.norm(direction)
+        if norm == 0:
+            return tip
+        direction /= norm
+
+        radius = int(np.ceil(1.0 / self.scale)) + DETECTION_REFINE_RADIUS
+        height, width = frame.shape[:2]
+        x0, y0 = max(tip[0] - radius, 0), max(tip[1] - radius, 0)
+        x1, y1 = min(tip[0] + radius + 1, width), min(tip[1] + radius + 1, height)
+
+        ys, xs = np.nonzero(self._red_mask(frame[y0:y1, x0:x1]))
+        if len(xs) == 0:
+            return tip
+
+        xs = xs + x0
+        ys = ys + y0
+        best = np.argmax((xs - centroid[0]) * direction[0] + (ys - centroid[1]) * direction[1])
+        return np.array([xs[best], ys[best]])
+
+    def _red_mask(self, image: np.ndarray) -> np.ndarray:
+        """Classifies red pixels; with reused buffers the mask is overwritten by the next call."""
+        shape = image.shape[:2]
+        if self.color_lut is not None:
+            return self.color_lut.classify(image, self._buffer("red", shape), self.buffers)
+        hsv_image = cv2.cvtColor(image, cv2.COLOR_BGR2HSV, dst=self._buffer("hsv", shape + (3,)))
+        (lower, upper), *others = self.red_ranges
+        mask = cv2.inRange(hsv_image, lower, upper, dst=self._buffer("red", shape))
+        for lower, upper in others:
+            cv2.bitwise_or(mask, cv2.inRange(hsv_image, lower, upper, dst=self._buffer("red2", shape)), dst=mask)
+        return mask
+
+    def _search_window(self, frame_shape: Tuple[int, ...], prediction: Tuple[np.ndarray, np.ndarray]) -> Optional[Tuple[int, int, int, int]]:
+        """
+        Returns the (x0, y0, x1, y1) search window in scaled-frame coordinates for a
+        full-resolution prediction, or None if the object is considered lost.
+        """
+        center, spread = prediction
+        if np.max(spread) > ROI_MAX_SPREAD:
+            return None
+        half_w, half_h = np.maximum(np.asarray(spread) * ROI_SPREAD_SCALE, ROI_MIN_HALF_SIZE) * self.scale
+        cx, cy = np.asarray(center) * self.scale
+        height, width = frame_shape[:2]
+        x0 = int(max(cx - half_w, 0))
+        y0 = int(max(cy - half_h, 0))
+        x1 = int(min(cx + half_w, width))
+        y1 = int(min(cy + half_h, height))
+        if x1 - x0 < 2 or y1 - y0 < 2:
             return None
+        return x0, y0, x1, y1
 
-        largest_contour = max(contours, key=cv2.contourArea)
-        M = cv2.moments(largest_contour)
+    def _find_contours(self, frame: np.ndarray, fg_mask: Optional[np.ndarray], window: Tuple[int, int, int, int]) -> List[np.ndarray]:
+        """Segments the window and returns the external contours of moving red regions in frame coordinates."""
+        x0, y0, x1, y1 = window
+        with profiler.section("detect.color"):
+            red_mask = self._red_mask(frame[y0:y1, x0:x1])
+
+        with profiler.section("detect.morphology"):
+            if fg_mask is None:
+                combined_mask = red_mask
+            else:
+                combined_mask = self._buffer("combined", red_mask.shape)
+                if combined_mask is not None:
+                    # Pixels outside the mask keep whatever dst held, so clear it first.
+                    combined_mask.fill(0)
+                combined_mask = cv2.bitwise_and(red_mask, red_mask, dst=combined_mask, mask=fg_mask[y0:y1, x0:x1])
+            # Erode, dilate and blur all run in place on the combined mask.
+            combined_mask = cv2.erode(combined_mask, None, dst=combined_mask, iterations=2)
+            combined_mask = cv2.dilate(combined_mask, None, dst=combined_mask, iterations=2)
+            combined_mask = cv2.GaussianBlur(combined_mask, (7, 7), 0, dst=combined_mask)
+
+        with profiler.section("detect.contours"):
+            contours, _ = cv2.findContours(combined_mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE, offset=(x0, y0))
+        return contours
+
+    def _contour_tip(self, contour: np.ndarray) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Returns the hull point farthest from the contour's centroid, and the centroid."""
+        M = cv2.moments(contour)
 
         if M["m00"] == 0:
             return None
-        
+
         cx = int(M["m10"] / M["m00"])
         cy = int(M["m01"] / M["m00"])
-        
-        hull = cv2.convexHull(largest_contour)
-        
-        farthest_point = None
-        max_distance = 0
-        
-        for point in hull:
-            pt = point[0]
-            distance = np.linalg.norm(np.array([cx, cy]) - pt)
-            if distance > max_distance:
-                max_distance = distance
-                farthest_point = pt
-                
-        return np.array(farthest_point) if farthest_point is not None else None
\ No newline at end of file
+
+        centroid = np.array([cx, cy])
+        hull = cv2.convexHull(contour).reshape(-1, 2)
+        # Squared distances keep the order (and the first-maximum tie break) of the Euclidean ones.
+        offsets = hull - centroid
+        distances = np.einsum("ij,ij->i", offsets, offsets)
+        farthest = int(np.argmax(distances))
+        if distances[farthest] == 0:
+            return None
+        return hull[farthest], centroid
+
+    def _find_tip(self, frame: np.ndarray, fg_mask: Optional[np.ndarray],
+                  window: Tuple[int, int, int, int]) -> Tuple[Optional[np.ndarray], Optional[np.ndarray], bool]:
+        """
+        Returns the tip point and contour centroid of the largest moving red object in
+        the window, plus whether that contour touches a window edge that is not also a
+        frame edge.
+        """
+        contours = self._find_contours(frame, fg_mask, window)
+
+        if not contours:
+            return None, None, False
+
+        largest_contour = max(contours, key=cv2.contourArea)
+        result = self._contour_tip(largest_contour)
+        if result is None:
+            return None, None, False
+
+        x0, y0, x1, y1 = window
+        bx, by, bw, bh = cv2.boundingRect(largest_contour)
+        height, width = frame.shape[:2]
+        clipped = ((bx <= x0 and x0 > 0) or (by <= y0 and y0 > 0) or
+                   (bx + bw >= x1 and x1 < width) or (by + bh >= y1 and y1 < height))
+        return result[0], result[1], clipped
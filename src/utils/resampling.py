@@ -0,0 +1,143 @@
+"""
+Vectorised O(N) resampling schemes for the particle filter.
+
+Each resampler takes normalised weights and returns the indices of the particles to
+keep. Instead of searching the CDF for every draw, they count how many sorted draws
+fall below each CDF entry and expand those counts with np.repeat, so the returned
+indices come out in ascending order.
+"""
+import numpy as np
+from statistics import NormalDist
+from typing import Callable, Dict, Optional
+
+
+def _expand(counts: np.ndarray) -> np.ndarray:
+    return np.repeat(np.arange(len(counts)), counts)
+
+
+def _cdf(weights: np.ndarray) -> np.ndarray:
+    cdf = np.cumsum(weights)
+    cdf /= cdf[-1]
+    return cdf
+
+
+def multinomial_resample(weights: np.ndarray, n: Optional[int] = None) -> np.ndarray:
+    """Independent draws; the per-particle copy counts are sampled directly from a multinomial."""
+    n = len(weights) if n is None else n
+    p = np.asarray(weights, dtype=float)
+    return _expand(np.random.multinomial(n, p / p.sum()))
+
+
+def systematic_resample(weights: np.ndarray, n: Optional[int] = None) -> np.ndarray:
+    """One uniform offset shared by n evenly spaced positions (k + u) / n."""
+    n = len(weights) if n is None else n
+    x = _cdf(weights) * n - np.random.uniform()
+    # Number of positions below each CDF entry: #{k : k < x} = ceil(x), clipped to [0, n].
+    below = np.clip(np.ceil(x), 0, n).astype(np.intp)
+    below[-1] = n
+    return _expand(np.diff(below, prepend=0))
+
+
+def stratified_resample(weights: np.ndarray, n: Optional[int] = None) -> np.ndarray:
+    """One independent uniform draw (k + u_k) / n inside each of the n strata."""
+    n = len(weights) if n is None else n
+    u = np.random.uniform(size=n + 1)
+    x = _cdf(weights) * n
+    # Strata fully below x contribute one position each; stratum floor(x) contributes
+    # one more if its draw lands before the fractional part of x.
+    strata = np.minimum(np.floor(x).astype(np.intp), n)
+    below = strata + (u[strata] < x - strata)
+    below = np.minimum(below, n)
+    below[-1] = n
+    return _expand(np.diff(below, prepend=0))
+
+
+def residual_resample(weights: np.ndarray, n: Optional[int] = None) -> np.ndarray:
+    """floor(n * w) deterministic copies, with the remainder drawn multinomially from the residual weights."""
+    n = len(weights) if n is None else n
+    scaled = np.asarray(weights, dtype=float) * (n / np.sum(weights))
+    counts = np.floor(scaled).astype(np.intp)
+    remaining = n - counts.sum()
+    if remaining > 0:
+        residual = scaled - counts
+        counts += np.random.multinomial(remaining, residual / residual.sum())
+    return _expand(counts)
+
+
+def systematic_resample_batch(weights: np.ndarray) -> np.ndarray:
+    """
+    Systematic resampling of every row of a (rows, N) weight matrix at once. Returns a
+    (rows, N) array of particle indices into the matching row.
+    """
+    rows, n = weights.shape
+    cdf = np.cumsum(weights, axis=1)
+    cdf /= cdf[:, -1:]
+    x = cdf * n - np.random.uniform(size=(rows, 1))
+    below = np.clip(np.ceil(x), 0, n).astype(np.intp)
+    below[:, -1] = n
+    counts = np.diff(below, axis=1, prepend=0)
+    # Every row yields exactly n indices, so the flat expansion reshapes cleanly.
+    return (np.repeat(np.arange(rows * n), counts.ravel()) % n).reshape(rows, n)
+
+
+def kld_bound(bins: np.ndarray, epsilon: float, delta: float) -> np.ndarray:
+    """
+    Particles needed so that, with probability 1 - delta, the KL divergence between the
+    sample-based and the true posterior stays below epsilon when the samples occupy
+    `bins` histogram bins (Fox, "Adapting the sample size in particle filters through
+    KLD-sampling"), using the Wilson-Hilferty approximation of the chi-square quantile.
+    """
+    z = NormalDist().inv_cdf(1 - delta)
+    k = np.maximum(np.asarray(bins, dtype=float) - 1, 1e-9)
+    a = 2.0 / (9.0 * k)
+    return np.where(bins > 1, k / (2 * epsilon) * (1 - a + np.sqrt(a) * z) ** 3, 0.0)
+
+
+def kld_resample(weights: np.ndarray, positions: np.ndarray, min_particles: int, max_particles: int,
+                 bin_size: float, epsilon: float, delta: float, chunk: int = 64) -> np.ndarray:
+    """
+    KLD-sampling: draws independent samples (in chunks) and counts the `bin_size` grid
+    cells their `positions` fall into, stopping as soon as the sample is large enough for
+    the bins seen so far (and at least `min_particles`, at most `max_particles`). A tight
+    cloud therefore yields few particles and a spread-out one many.
+    """
+    cdf = _cdf(weights)
+    cells = np.floor(positions / bin_size).astype(np.intp)
+    cells -= cells.min(axis=0)
+    _, bin_of = np.unique(cells[:, 0] * (cells[:, 1].max() + 1) + cells[:, 1], return_inverse=True)
+    required = np.maximum(kld_bound(np.arange(bin_of.max() + 2), epsilon, delta), min_particles)
+    seen = np.zeros(bin_of.max() + 1, dtype=bool)
+
+    drawn, bins, total = [], 0, 0
+    while total < max_particles:
+        size = min(max(min_particles - total, chunk), max_particles - total)
+        draws = np.minimum(np.searchsorted(cdf, np.random.random(size)), len(cdf) - 1)
+        # Running count of occupied bins after each draw of the chunk.
+        ids = bin_of[draws]
+        unique, first = np.unique(ids, return_index=True)
+        fresh = np.zeros(size, dtype=bool)
+        fresh[first[~seen[unique]]] = True
+        seen[unique] = True
+        running = bins + np.cumsum(fresh)
+        enough = total + np.arange(1, size + 1) >= required[running]
+        if enough.any():
+            drawn.append(draws[:int(np.argmax(enough)) + 1])
+            break
+        drawn.append(draws)
+        bins, total = int(running[-1]), total + size
+    return np.concatenate(drawn)
+
+
+RESAMPLERS: Dict[str, Callable[[np.ndarray, Optional[int]], np.ndarray]] = {
+    "multinomial": multinomial_resample,
+    "systematic": systematic_resample,
+    "stratified": stratified_resample,
+    "residual": residual_resample,
+}
+
+
+def get_resampler(name: str) -> Callable[[np.ndarray, Optional[int]], np.ndarray]:
+    try:
+        return RESAMPLERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown resampling scheme '{name}', expected one of {sorted(RESAMPLERS)}") from None
@@ -0,0 +1,25 @@
+import numpy as np
+from typing import Dict, Tuple
+
+
+class ScratchBuffers:
+    """
+    Named working arrays kept between frames, for hot paths that pass them to OpenCV and
+    numpy as `dst=` / `out=`. Each name owns one flat array that only grows; a requested
+    shape is a contiguous view of its start, so search windows of varying size do not
+    allocate array memory once the largest size has been seen.
+    """
+    def __init__(self):
+        self._flat: Dict[str, np.ndarray] = {}
+        self._views: Dict[str, np.ndarray] = {}
+
+    def get(self, name: str, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        view = self._views.get(name)
+        if view is not None and view.shape == shape and view.dtype == dtype:
+            return view
+        size = int(np.prod(shape))
+        flat = self._flat.get(name)
+        if flat is None or flat.size < size or flat.dtype != dtype:
+            flat = self._flat[name] = np.empty(size, dtype=dtype)
+        view = self._views[name] = flat[:size].reshape(shape)
+        return view
@@ -0,0 +1,8 @@
+import random
+import numpy as np
+
+
+def seed_everything(seed: int):
+    """Seeds both the `random` module and NumPy's global generator, which the game and tracker draw from."""
+    random.seed(seed)
+    np.random.seed(seed)
@@ -0,0 +1,126 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _pygame():
+    """Imports pygame on first use: it takes a noticeable part of a second to import and is only needed with audio."""
+    import pygame
+    return pygame
+
+
+class NullSoundBank:
+    """
+    Sound bank used when no audio device is available; every call is a no-op.
+    """
+    def play(self, name: str) -> bool:
+        return False
+
+    def wait_until_loaded(self, timeout: Optional[float] = None) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+
+class SoundBank:
+    """
+    Decodes every sound once up front and plays them through a fixed pool of reserved
+    mixer channels, so events never touch the disk inside the frame loop.
+
+    Overlap rules:
+    - a sound replayed within `cooldown_ms` of its last start is skipped;
+    - a free pool channel is used when there is one;
+    - otherwise the channel playing the lowest-priority (then oldest) sound is taken
+      over, as long as its priority does not exceed the new sound's; if it does, the
+      new sound is dropped.
+    Sounds still loading in the background are skipped rather than waited for.
+    """
+    def __init__(self, sounds: Dict[str, str], num_channels: int, cooldown_ms: int,
+                 priorities: Dict[str, int], background: bool = True):
+        pygame = _pygame()
+        self.paths = dict(sounds)
+        self.cooldown = cooldown_ms / 1000.0
+        self.priorities = priorities
+        self.dropped = 0
+
+        if pygame.mixer.get_num_channels() < num_channels:
+            pygame.mixer.set_num_channels(num_channels)
+        pygame.mixer.set_reserved(num_channels)
+        self.channels = [pygame.mixer.Channel(i) for i in range(num_channels)]
+        # Per channel: (priority, start time) of the sound it was last given.
+        self._channel_state = [(0, 0.0)] * num_channels
+        self._last_played: Dict[str, float] = {}
+
+        self._sounds: Dict[str, "pygame.mixer.Sound"] = {}
+        self._loaded = threading.Event()
+        if background:
+            threading.Thread(target=self._load_all, name="sound-loader", daemon=True).start()
+        else:
+            self._load_all()
+
+    def _load_all(self):
+        pygame = _pygame()
+        for name, path in self.paths.items():
+            try:
+                self._sounds[name] = pygame.mixer.Sound(path)
+            except (pygame.error, FileNotFoundError) as e:
+                logger.error(f"Sound '{name}' could not be loaded from {path}: {e}")
+        self._loaded.set()
+        logger.info(f"Loaded {len(self._sounds)}/{len(self.paths)} sounds.")
+
+    def wait_until_loaded(self, timeout: Optional[float] = None) -> bool:
+        return self._loaded.wait(timeout)
+
+    def play(self, name: str) -> bool:
+        """Starts the named sound if the overlap rules allow it; returns whether it was started."""
+        sound = self._sounds.get(name)
+        if sound is None:
+            if name not in self.paths or self._loaded.is_set():
+                logger.warning(f"Sound '{name}' is not available or failed to load.")
+            return False
+
+        now = time.monotonic()
+        if now - self._last_played.get(name, float("-inf")) < self.cooldown:
+            return False
+
+        priority = self.priorities.get(name, 0)
+        index = self._pick_channel(priority)
+        if index is None:
+            self.dropped += 1
+            return False
+
+        self.channels[index].play(sound)
+        self._channel_state[index] = (priority, now)
+        self._last_played[name] = now
+        return True
+
+    def _pick_channel(self, priority: int) -> Optional[int]:
+        for i, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                return i
+        victim = min(range(len(self.channels)), key=lambda i: self._channel_state[i])
+        if self._channel_state[victim][0] <= priority:
+            return victim
+        return None
+
+    def close(self):
+        for channel in self.channels:
+            channel.stop()
+        _pygame().mixer.quit()
+
+
+def create_sound_bank(sounds: Dict[str, str], num_channels: int, cooldown_ms: int,
+                      priorities: Dict[str, int], background: bool = True):
+    """Initialises the mixer and returns a SoundBank, or a NullSoundBank if no audio device is available."""
+    pygame = _pygame()
+    try:
+        pygame.mixer.init()
+    except pygame.error as e:
+        logger.warning(f"Pygame mixer could not be initialized, sound is disabled: {e}")
+        return NullSoundBank()
+    logger.info("Pygame mixer initialized successfully.")
+    return SoundBank(sounds, num_channels, cooldown_ms, priorities, background)
@@ -0,0 +1,56 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Optional
+
+
+class StartupTimer:
+    """
+    Records startup milestones (window shown, first camera frame, first game frame) and
+    the duration of each startup task, in seconds since `launch_time`, a
+    `time.perf_counter()` value taken as early as possible in the process.
+    """
+    def __init__(self, launch_time: Optional[float] = None):
+        self.launch_time = launch_time if launch_time is not None else time.perf_counter()
+        self.milestones: Dict[str, float] = {}
+        self.tasks: Dict[str, float] = {}
+
+    def mark(self, name: str) -> bool:
+        """Records the milestone the first time it is reached; returns whether it was new."""
+        if name in self.milestones:
+            return False
+        self.milestones[name] = time.perf_counter() - self.launch_time
+        return True
+
+    def timed(self, name: str, task: Callable[[], Any]) -> Any:
+        """Runs a startup task and records how long it took."""
+        start = time.perf_counter()
+        try:
+            return task()
+        finally:
+            self.tasks[name] = time.perf_counter() - start
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        return {"milestones": dict(self.milestones), "tasks": dict(self.tasks)}
+
+    def summary(self) -> str:
+        milestones = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.milestones.items())
+        tasks = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in self.tasks.items())
+        return f"{milestones} (tasks: {tasks})" if tasks else milestones
+
+
+def run_concurrently(tasks: Dict[str, Callable[[], Any]], timer: StartupTimer,
+                     while_waiting: Optional[Callable[[], None]] = None, poll_interval: float = 0.03) -> Dict[str, Any]:
+    """
+    Runs every task on its own thread and returns their results by name. `while_waiting`
+    is called on the calling thread every `poll_interval` seconds until all are done, e.g.
+    to keep a window responsive. If a task fails, its exception is raised once the
+    others have finished.
+    """
+    with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="startup") as pool:
+        futures = {name: pool.submit(timer.timed, name, task) for name, task in tasks.items()}
+        pending = set(futures.values())
+        while pending:
+            _, pending = wait(pending, timeout=poll_interval)
+            if while_waiting is not None:
+                while_waiting()
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,32 @@
+import cv2
+import numpy as np
+
+from src.settings import RED_LOWER1, RED_LOWER2, RED_UPPER1, RED_UPPER2
+from src.utils.color_lut import ColorLookupTable, all_colors, hsv_mask
+
+RANGES = [(RED_LOWER1, RED_UPPER1), (RED_LOWER2, RED_UPPER2)]
+
+
+def test_exact_table_matches_hsv_inrange_on_every_colour(tmp_path):
+    colors = all_colors()
+    lut = ColorLookupTable(RANGES, 8, str(tmp_path))
+    np.testing.assert_array_equal(lut.classify(colors), hsv_mask(colors, RANGES))
+
+
+def test_set_ranges_rebuilds_the_table(tmp_path):
+    lut = ColorLookupTable(RANGES, 4, str(tmp_path))
+    red = np.full((1, 1, 3), (20, 20, 210), dtype=np.uint8)
+    assert lut.classify(red)[0, 0] == 255
+
+    lut.set_ranges([(np.array([100, 0, 0]), np.array([130, 255, 255]))])
+    assert lut.classify(red)[0, 0] == 0
+    blue = np.full((1, 1, 3), (210, 20, 20), dtype=np.uint8)
+    hsv = cv2.cvtColor(blue, cv2.COLOR_BGR2HSV)
+    assert 100 <= hsv[0, 0, 0] <= 130
+    assert lut.classify(blue)[0, 0] == 255
+
+
+def test_ranges_cannot_change_behind_the_tables_back(tmp_path):
+    lut = ColorLookupTable(RANGES, 4, str(tmp_path))
+    lower, _ = lut.ranges[0]
+    assert not lower.flags.writeable
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from src.components.obstacle import Obstacle
+from src.components.target import TargetMap
+from src.game import Game
+from src.settings import CANVAS_SIZE, HEIGHT, WIDTH
+from src.utils.display import NullDisplay
+from src.utils.frame_source import open_source
+
+
+def hearts_lost_inside_an_obstacle(fps):
+    """Holds the ball inside a stationary obstacle for one second of capture time at `fps`."""
+    game = Game(source=open_source("synthetic", WIDTH, HEIGHT, 10, 0), display=NullDisplay(), audio=False, seed=0)
+    obstacle = Obstacle(CANVAS_SIZE, 1)
+    obstacle.position[:] = (600, 300)
+    obstacle.velocity[:] = 0
+    game.world.set_obstacles([obstacle])
+    game.world.set_targets(TargetMap([], CANVAS_SIZE))
+    game.powerup_spawn_ticks = 10 ** 9
+    game.ball.get_position = lambda: np.array([620.0, 320.0])
+    game.hearts = 1000
+    frame = np.zeros(CANVAS_SIZE, dtype=np.uint8)
+    for index in range(fps + 1):
+        game._simulate(frame, None, index / fps)
+    return 1000 - game.hearts, game.clock.ticks
+
+
+@pytest.mark.parametrize("fps", [30, 60, 120])
+def test_penalties_follow_simulation_time_not_frame_rate(fps):
+    lost, ticks = hearts_lost_inside_an_obstacle(fps)
+    assert ticks == 30
+    assert lost == ticks
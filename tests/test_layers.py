@@ -0,0 +1,26 @@
+import cv2
+import numpy as np
+
+from src.utils.layers import LayerStack
+
+SHAPE = (120, 160, 3)
+
+
+def make_stack():
+    layers = LayerStack(SHAPE)
+    layers.set_text("score", "Score: 12", (10, 40), (0, 255, 255), cv2.FONT_HERSHEY_SIMPLEX, 1.0, 2)
+    return layers
+
+
+def test_composite_draws_onto_a_non_contiguous_frame():
+    background = np.random.default_rng(0).integers(0, 256, SHAPE, dtype=np.uint8)
+    expected = background.copy()
+    make_stack().composite(expected)
+    assert not np.array_equal(expected, background)
+
+    wide = np.zeros((SHAPE[0], SHAPE[1] * 2, 3), dtype=np.uint8)
+    frame = wide[:, ::2]
+    frame[...] = background
+    assert not frame.flags.c_contiguous
+    make_stack().composite(frame)
+    np.testing.assert_array_equal(frame, expected)
@@ -0,0 +1,57 @@
+import numpy as np
+
+from src.components.multi_target_tracker import MultiTargetTracker
+
+CANVAS = (720, 1280, 3)
+
+
+def make_tracker(num_targets=4, num_particles=200, max_misses=5):
+    np.random.seed(0)
+    return MultiTargetTracker(CANVAS, num_targets, num_particles, gate=150.0, max_misses=max_misses)
+
+
+def test_tracks_keep_their_object():
+    tracker = make_tracker()
+    for step in range(60):
+        left = np.array([200.0 + 4 * step, 200.0])
+        right = np.array([1000.0 - 4 * step, 500.0])
+        assignment = tracker.update([left, right], motion_noise=5, accel_noise=1)
+        if step == 0:
+            first = assignment.copy()
+        else:
+            np.testing.assert_array_equal(assignment, first)
+    estimates = tracker.estimates()
+    assert tracker.active.sum() == 2
+    tracks = {int(d): t for t, d in enumerate(first) if d >= 0}
+    assert np.linalg.norm(estimates[tracks[0]] - left) < 30
+    assert np.linalg.norm(estimates[tracks[1]] - right) < 30
+
+
+def test_free_slots_are_not_predicted():
+    tracker = make_tracker()
+    tracker.update([np.array([640.0, 360.0])], motion_noise=5, accel_noise=1)
+    free = ~tracker.active
+    before = tracker.particles[free].copy()
+    for _ in range(5):
+        tracker.update([np.array([640.0, 360.0])], motion_noise=5, accel_noise=1)
+    np.testing.assert_array_equal(tracker.particles[free], before)
+
+
+def test_prediction_scales_with_dt():
+    tracker = make_tracker()
+    tracker.update([np.array([400.0, 300.0])], motion_noise=0, accel_noise=0)
+    track = int(np.flatnonzero(tracker.active)[0])
+    tracker.particles[track, :, 2:] = [3.0, -2.0]
+    start = tracker.particles[track, :, :2].copy()
+    tracker.update([], motion_noise=0, accel_noise=0, dt=2.5)
+    np.testing.assert_allclose(tracker.particles[track, :, :2], start + [7.5, -5.0])
+
+
+def test_lost_track_is_released():
+    tracker = make_tracker(max_misses=3)
+    tracker.update([np.array([640.0, 360.0])], motion_noise=5, accel_noise=1)
+    for _ in range(3):
+        tracker.update([], motion_noise=5, accel_noise=1)
+    assert tracker.active.sum() == 1
+    tracker.update([], motion_noise=5, accel_noise=1)
+    assert tracker.active.sum() == 0
@@ -0,0 +1,85 @@
+import threading
+
+import cv2
+import numpy as np
+
+from src.utils.recorder import SessionRecorder, frame_schedule, load_ring
+
+
+def solid(value):
+    return np.full((72, 128, 3), value, dtype=np.uint8)
+
+
+def video_frames(path):
+    capture = cv2.VideoCapture(path)
+    frames = []
+    while True:
+        ret, frame = capture.read()
+        if not ret:
+            break
+        frames.append(frame)
+    capture.release()
+    return frames
+
+
+def test_schedule_follows_the_timestamps():
+    timestamps = np.array([0.0, 0.1, 0.15, 0.5])
+    np.testing.assert_array_equal(frame_schedule(timestamps, 10), [0, 1, 2, 2, 2, 3])
+    np.testing.assert_array_equal(frame_schedule(np.arange(4) / 30.0, 30), [0, 1, 2, 3])
+
+
+def test_videos_play_at_the_recorded_speed(tmp_path):
+    recorder = SessionRecorder(str(tmp_path), 10, 10, 1.0, (128, 72))
+    # Five frames 0.2 s apart are two seconds of video at 10 fps.
+    for index in range(5):
+        recorder.record("camera", solid(40 * index), 100.0 + 0.2 * index)
+    recorder.close()
+    frames = video_frames(f"{recorder.prefix}_camera.mp4")
+    assert len(frames) == 9
+    assert abs(int(frames[1].mean()) - 0) < 8 and abs(int(frames[2].mean()) - 40) < 8
+
+
+def test_instant_replay_slices_by_time(tmp_path):
+    recorder = SessionRecorder(str(tmp_path), 10, 10, 1.0, (128, 72), encode=False)
+    for index in range(20):
+        recorder.record("game", solid(10 * index), 0.5 * index)
+    recorder.instant_replay("game", 2.0).join()
+    recorder.close()
+    # The last two seconds hold the frames at 7.5 .. 9.5 s.
+    assert len(video_frames(f"{recorder.prefix}_game_replay_20.mp4")) == 21
+    frames, timestamps = load_ring(f"{recorder.prefix}_game")
+    assert len(frames) == 20 and timestamps[-1] == 9.5
+
+
+def test_replay_keeps_its_frames_from_being_overwritten(tmp_path, monkeypatch):
+    started, release_writes, written = threading.Event(), threading.Event(), []
+
+    class BlockingWriter:
+        """Stands in for cv2.VideoWriter: keeps what it is given and holds every write until released."""
+        def __init__(self, *args):
+            pass
+
+        def write(self, frame):
+            started.set()
+            release_writes.wait(5)
+            written.append(frame.copy())
+
+        def release(self):
+            pass
+
+    monkeypatch.setattr(cv2, "VideoWriter", BlockingWriter)
+    recorder = SessionRecorder(str(tmp_path), 1, 10, 1.0, (128, 72), encode=False)
+    for index in range(10):
+        recorder.record("game", solid(index), index / 10.0)
+    replay = recorder.instant_replay("game")
+    assert started.wait(5)
+
+    # The replay is still on its first frame, so every slot of the ring is pinned.
+    assert not recorder.record("game", solid(99), 1.0)
+    assert recorder.stats()["game"]["dropped"] == 1
+
+    release_writes.set()
+    replay.join()
+    assert [int(frame.mean()) for frame in written] == list(range(10))
+    assert recorder.record("game", solid(99), 1.1)
+    recorder.close()
@@ -0,0 +1,39 @@
+import random
+
+import numpy as np
+import pytest
+
+from src.components.target import Target, TargetMap
+from src.settings import CANVAS_SIZE, SHAPES, TARGET_PARAMS
+
+
+def first_hits(targets, points):
+    """What a first-hit loop over Target.point_inside returns for every point."""
+    return np.array([next((i for i, t in enumerate(targets) if t.point_inside(p)), -1) for p in points])
+
+
+@pytest.mark.parametrize("shape", ["circle", "square", "rectangle", "triangle"])
+def test_sub_pixel_points_at_the_edge(shape):
+    target = Target(shape, np.array([300, 200]), CANVAS_SIZE, TARGET_PARAMS)
+    target_map = TargetMap([target], CANVAS_SIZE)
+    # Points a fraction of a pixel either side of the outline, all around the shape.
+    angles = np.linspace(0, 2 * np.pi, 720, endpoint=False)
+    directions = np.stack([np.cos(angles), np.sin(angles)], axis=1)
+    radius = Target.get_margin(shape, TARGET_PARAMS) * 1.5
+    points = []
+    for direction in directions:
+        steps = np.linspace(0, radius, 4000)[:, None] * direction + target.position
+        inside = target.contains(steps)
+        crossing = np.flatnonzero(inside[:-1] != inside[1:])[0]
+        points += [steps[crossing] + direction * offset for offset in (-0.3, -0.05, 0.05, 0.3)]
+    points = np.array(points)
+    np.testing.assert_array_equal(target_map.lookup(points), first_hits([target], points))
+
+
+def test_random_points_match_point_inside():
+    random.seed(0)
+    rng = np.random.default_rng(0)
+    targets = Target.create_targets(CANVAS_SIZE, TARGET_PARAMS, SHAPES)
+    points = np.concatenate([t.position + rng.uniform(-120, 120, (500, 2)) for t in targets])
+    points = np.clip(points, 0, [CANVAS_SIZE[1] - 1, CANVAS_SIZE[0] - 1])
+    np.testing.assert_array_equal(TargetMap(targets, CANVAS_SIZE).lookup(points), first_hits(targets, points))
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from src.components.trackers import TRACKERS, ParticleTracker, Tracker, create_tracker
+from src.settings import ACCELERATION_NOISE, MOTION_NOISE
+from tests.tracks import synthetic_track
+
+CANVAS = (720, 1280, 3)
+
+
+@pytest.mark.parametrize("backend", sorted(TRACKERS))
+def test_estimate_is_a_read_only_snapshot(backend):
+    np.random.seed(0)
+    tracker = create_tracker(backend, CANVAS, np.array([640.0, 360.0]), 200)
+    tracker.update(np.array([650.0, 370.0]))
+    mean, covariance = tracker.estimate(), tracker.covariance()
+    assert mean.dtype == np.float64 and not mean.flags.writeable
+    assert not covariance.flags.writeable
+    kept = mean.copy()
+    tracker.predict(1.0, 5.0, 1.0)
+    tracker.update(np.array([700.0, 400.0]))
+    np.testing.assert_array_equal(mean, kept)
+    assert not np.array_equal(tracker.estimate(), kept)
+
+
+def test_tracker_is_abstract():
+    with pytest.raises(TypeError):
+        Tracker()
+
+
+def track_errors(seed, compact, num_particles=300, steps=300):
+    """Returns the per-step tracking errors of a particle filter over a synthetic track, after 20 steps to settle."""
+    np.random.seed(seed)
+    truth, measurements = synthetic_track(steps, np.random.default_rng(seed))
+    tracker = ParticleTracker(CANVAS, truth[0], num_particles, compact=compact)
+    errors = []
+    for z, x in zip(measurements, truth):
+        tracker.predict(1.0, MOTION_NOISE, ACCELERATION_NOISE)
+        tracker.update(z)
+        errors.append(np.linalg.norm(tracker.estimate()[:2] - x))
+    return np.array(errors[20:])
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_seeded_runs_are_reproducible(compact):
+    np.testing.assert_array_equal(track_errors(3, compact, steps=100), track_errors(3, compact, steps=100))
+
+
+def test_compact_state_tracks_as_well_as_float64():
+    # The two modes draw different noise, so they are compared over several seeds.
+    float64 = np.array([track_errors(seed, False).mean() for seed in range(8)])
+    compact = np.array([track_errors(seed, True).mean() for seed in range(8)])
+    assert compact.max() < 2 * float64.mean()
+    assert abs(compact.mean() - float64.mean()) < 0.1 * float64.mean()
@@ -0,0 +1,13 @@
+import numpy as np
+
+
+def synthetic_track(steps: int, rng: np.random.Generator):
+    """
+    Returns the true positions of an object on a Lissajous path across the canvas and its
+    measurements: the truth plus 8 px of Gaussian noise, None for the 5% of frames missed.
+    """
+    t = np.arange(steps)
+    truth = np.stack([640 + 400 * np.sin(0.03 * t), 360 + 200 * np.sin(0.05 * t)], axis=1)
+    measurements = truth + rng.normal(0, 8, truth.shape)
+    missing = rng.random(steps) < 0.05
+    return truth, [None if m else z for z, m in zip(measurements, missing)]